@@ -3,108 +3,65 @@
 add_person.py
 Interactive script to add new people to the shrine timeline.
 
+Batch mode imports many people at once from CSV (name, born, died, gender,
+wiki_title, id - only name is required), a JSON list of such objects, or the
+unchecked "- [ ] Name" entries of src/lib/data/men.md / women.md:
+  1. every title is resolved to a Q-id, and birth / death / gender / P18 are
+     read from Wikidata, in batches of 50
+  2. missing years and gender are filled from Wikidata (values given in the
+     file win)
+  3. new people are merged into people.json with one sort and one write
+  4. every portrait is queued on the concurrent FetchEngine
+
 Usage: python add_person.py
+       python add_person.py --batch new.csv [more.json ...] [--dry-run] [--no-images]
+       python add_person.py --batch ../src/lib/data/men.md ../src/lib/data/women.md
 """
 
+import argparse
+import csv
 import json
 import os
 import pathlib
 import re
 import sys
-import time
-from urllib.parse import quote
-
-import requests
-from tqdm import tqdm
-
-# Import the existing portrait fetching functions
-# Reuse the existing infrastructure from patch.py
-WIKI_API = "https://en.wikipedia.org/w/api.php"
-WIKIDATA_API = "https://www.wikidata.org/wiki/Special:EntityData/{}.json"
-COMMONS_FILE = "https://commons.wikimedia.org/wiki/Special:FilePath/{}"
-HEADERS = {"User-Agent": "TimelineBot/0.2 (https://github.com/timeline)"}
-
-def wikipedia_to_qid(title: str) -> str | None:
-    """Return the Wikidata Q-identifier for a Wikipedia page title."""
-    params = {
-        "action": "query",
-        "format": "json",
-        "titles": title,
-        "prop": "pageprops",
-        "redirects": 1,
-    }
-    try:
-        r = requests.get(WIKI_API, params=params, headers=HEADERS, timeout=15)
-        r.raise_for_status()
-        pages = r.json()["query"]["pages"].values()
-        for page in pages:
-            return page.get("pageprops", {}).get("wikibase_item")
-    except Exception as e:
-        print(f"Error fetching Wikipedia data: {e}")
-    return None
 
-def qid_to_image_filename(qid: str) -> str | None:
-    """Return the Commons file name (e.g. 'Albert Einstein Head.jpg')."""
-    try:
-        r = requests.get(WIKIDATA_API.format(qid), headers=HEADERS, timeout=15)
-        r.raise_for_status()
-        entity = r.json()["entities"][qid]
-        claims = entity["claims"]
-        if "P18" not in claims:
-            return None
-        # Use the first image in P18
-        return claims["P18"][0]["mainsnak"]["datavalue"]["value"]
-    except Exception as e:
-        print(f"Error fetching Wikidata: {e}")
-    return None
+from datastore import Dataset
+from fetch_engine import FetchEngine
+from http_cache import MetadataCache, add_cache_args, cache_from_args
+from wikimedia import (PRECISION_YEAR, person_facts, qid_to_image_filename,
+                       resolve_qids, save_p18_image, wikipedia_to_qid)
 
-def download_commons_file(filename: str, local_path: pathlib.Path) -> bool:
-    """Download a file from Wikimedia Commons."""
-    if local_path.exists():
-        print(f"Image already exists: {local_path}")
-        return False
-    
-    try:
-        # Ensure directory exists
-        local_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Download from Commons
-        url = COMMONS_FILE.format(quote(filename))
-        r = requests.get(url, headers=HEADERS, timeout=30)
-        r.raise_for_status()
-        
-        # Save file
-        with open(local_path, 'wb') as f:
-            f.write(r.content)
-        
-        print(f"Downloaded: {local_path}")
-        return True
-    except Exception as e:
-        print(f"Error downloading {filename}: {e}")
-        return False
+ROOT_DIR = pathlib.Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+STATIC_DIR = ROOT_DIR / "static"
+PEOPLE_JSON = DATA_DIR / "people.json"
+
+# Checklist files and the gender of everyone listed in them
+CHECKLISTS = {"men.md": 1, "women.md": 0}
+YEAR_RE = re.compile(r"^(-)?(\d{1,4})\s*(BCE|BC|CE|AD)?$", re.IGNORECASE)
+CHECKLIST_ITEM = re.compile(r"^\s*[-*]\s*\[ \]\s*(.+?)\s*$")
 
 def validate_year(year_str: str) -> int | None:
-    """Validate and convert year string to integer, handling BC years."""
-    if not year_str:
-        return None
-    
-    year_str = year_str.strip()
+    """
+    Validate and convert a year string to an integer, handling BC years.
+
+    Accepts "1879", "-470", "470BC", "470 BCE", "79 AD" / "79 CE"; anything else
+    (e.g. a typo like "18a79") returns None instead of silently dropping characters.
+    """
     if not year_str:
         return None
-    
-    # Handle BC years
-    if year_str.lower().endswith('bc') or year_str.lower().endswith('bce'):
-        try:
-            year = int(re.sub(r'[^\d]', '', year_str))
-            return -year  # BC years are negative
-        except ValueError:
-            return None
-    
-    # Handle AD years
-    try:
-        return int(re.sub(r'[^\d]', '', year_str))
-    except ValueError:
+
+    match = YEAR_RE.match(year_str.strip())
+    if not match:
         return None
+    sign, digits, era = match.groups()
+    year = int(digits)
+    if year == 0 or (sign and era):
+        return None  # there is no year 0, and "-470BC" is ambiguous
+    if sign or (era and era.lower().startswith("b")):
+        return -year  # BC years are negative
+    return year
 
 def create_person_id(name: str) -> str:
     """Create a URL-safe ID from a person's name."""
@@ -130,12 +87,20 @@ def get_person_info():
         return None
     
     # Get birth year
-    birth_input = input("Birth year (e.g., 1879, 470BC): ").strip()
-    birth_year = validate_year(birth_input) if birth_input else None
+    while True:
+        birth_input = input("Birth year (e.g., 1879, 470BC): ").strip()
+        birth_year = validate_year(birth_input) if birth_input else None
+        if birth_year is not None or not birth_input:
+            break
+        print(f"'{birth_input}' is not a year; use e.g. 1879, -470 or 470BC")
     
     # Get death year
-    death_input = input("Death year (leave empty if still alive): ").strip()
-    death_year = validate_year(death_input) if death_input else None
+    while True:
+        death_input = input("Death year (leave empty if still alive): ").strip()
+        death_year = validate_year(death_input) if death_input else None
+        if death_year is not None or not death_input:
+            break
+        print(f"'{death_input}' is not a year; use e.g. 1934, -399 or 399BC")
     
     # Get gender
     while True:
@@ -170,32 +135,18 @@ def get_person_info():
     return person_data
 
 def add_person_to_json(person_data: dict, json_path: str = "people.json"):
-    """Add person to the people.json file."""
-    try:
-        with open(json_path, 'r') as f:
-            people = json.load(f)
-    except FileNotFoundError:
-        people = []
-    
-    # Check if person already exists
-    existing_ids = [p["id"] for p in people]
-    if person_data["id"] in existing_ids:
-        print(f"Person with ID '{person_data['id']}' already exists!")
-        return False
-    
+    """Add person to the people.json file (sorted insert, atomic write)."""
+    people = Dataset.open("people", json_path)
+
     # Remove temporary wiki_title field before saving
     clean_data = {k: v for k, v in person_data.items() if k != "wiki_title"}
-    
-    # Add person
-    people.append(clean_data)
-    
-    # Sort by birth year
-    people.sort(key=lambda p: p.get("born", 0) or 0)
-    
-    # Save back to file
-    with open(json_path, 'w') as f:
-        json.dump(people, f, indent=2)
-    
+
+    # Check for an existing id and insert at its birth-year position
+    if not people.add(clean_data):
+        print(f"Person with ID '{person_data['id']}' already exists!")
+        return False
+    people.save()
+
     print(f"Added {person_data['name']} to {json_path}")
     return True
 
@@ -206,32 +157,177 @@ def download_person_image(person_data: dict):
     
     print(f"\nAttempting to download image for {person_data['name']}...")
     
+    engine = FetchEngine(cache=MetadataCache())
     try:
         # Get Wikidata Q-ID
-        qid = wikipedia_to_qid(wiki_title)
+        qid = engine.call(wikipedia_to_qid(engine, wiki_title))
         if not qid:
             print(f"⚠️  Could not find Wikidata Q-ID for '{wiki_title}'")
             return False
         
         print(f"Found Wikidata ID: {qid}")
         
-        # Get image filename
-        filename = qid_to_image_filename(qid)
-        if not filename:
-            print(f"⚠️  No image found on Wikidata for {qid}")
-            return False
-        
-        print(f"Found image: {filename}")
-        
-        # Download image
-        success = download_commons_file(filename, image_path)
-        if success:
+        # Get image filename and download it
+        filename = engine.call(qid_to_image_filename(engine, qid))
+        if filename:
+            print(f"Found image: {filename}")
+        status = engine.call(save_p18_image(engine, person_data["name"], qid, filename, image_path))
+        if status == "skipped":
+            print(f"Image already exists: {image_path}")
+        elif status == "saved":
             print(f"✅ Successfully downloaded image for {person_data['name']}")
-        return success
+        return status == "saved"
         
     except Exception as e:
         print(f"❌ Error downloading image: {e}")
         return False
+    finally:
+        engine.cache.close()
+
+# --------------------------------------------------------------------------- #
+# Batch import
+# --------------------------------------------------------------------------- #
+def read_checklist(path: pathlib.Path) -> list[dict]:
+    """Unchecked "- [ ] Name" entries, stopping at a "do NOT include" heading."""
+    gender = CHECKLISTS.get(path.name)
+    records = []
+    for line in path.read_text().splitlines():
+        if line.startswith("#") and "not include" in line.lower():
+            break
+        match = CHECKLIST_ITEM.match(line)
+        if match:
+            # "Charles Dodgson / Lewis Carroll": the first name is the page title
+            name = match.group(1).split(" / ")[0].strip()
+            records.append({"name": name, "gender": gender})
+    return records
+
+def read_batch(path: pathlib.Path) -> list[dict]:
+    """Read raw person records from a .csv, .json or checklist .md file."""
+    if path.suffix == ".md":
+        return read_checklist(path)
+    if path.suffix == ".json":
+        records = json.loads(path.read_text())
+        if not isinstance(records, list):
+            raise ValueError(f"{path}: expected a JSON list of people")
+        return records
+    if path.suffix == ".csv":
+        with open(path, newline="") as f:
+            return [{k.strip(): (v or "").strip() for k, v in row.items() if k}
+                    for row in csv.DictReader(f)]
+    raise ValueError(f"{path}: unsupported file type (use .csv, .json or .md)")
+
+def parse_year(value) -> int | None:
+    """Accept ints, "-470", "470BC" or "1879"; None when empty or unparseable."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    return validate_year(str(value))
+
+def parse_gender(value) -> int | None:
+    if value is None or value == "":
+        return None
+    value = str(value).strip().lower()
+    if value in ("m", "male", "1"):
+        return 1
+    if value in ("f", "female", "0"):
+        return 0
+    return None
+
+def normalise_record(raw: dict) -> dict:
+    """Raw CSV/JSON/checklist row → person_data (with a temporary wiki_title)."""
+    name = str(raw.get("name", "")).strip()
+    if not name:
+        raise ValueError(f"record without a name: {raw}")
+    person_id = raw.get("id") or create_person_id(name)
+    return {
+        "id": person_id,
+        "name": name,
+        "born": parse_year(raw.get("born")),
+        "died": parse_year(raw.get("died")),
+        "image": raw.get("image") or f"/images/people/{person_id}.jpg",
+        "gender": parse_gender(raw.get("gender")),
+        "wiki_title": raw.get("wiki_title") or name,
+    }
+
+def batch_import(records, json_path=PEOPLE_JSON, download=True, dry_run=False, cache=None,
+                 transport=None):
+    """
+    Add many people in one pass: bulk Wikidata lookups, one sort, one write,
+    then all portraits on the concurrent engine.
+
+    Wikidata years coarser than a year (decade, century) are not used, as in
+    enrich_people.py; such people are skipped unless the batch file has the year.
+    """
+    people = Dataset.open("people", json_path)
+    known = set(people.index)
+
+    new_people, skipped = [], []
+    for raw in records:
+        try:
+            person = normalise_record(raw)
+        except ValueError as e:
+            skipped.append(str(e))
+            continue
+        if person["id"] in known:
+            skipped.append(f"{person['name']}: id '{person['id']}' already exists")
+            continue
+        known.add(person["id"])
+        new_people.append(person)
+
+    engine = FetchEngine(cache=cache, transport=transport)
+    try:
+        titles = {p["wiki_title"] for p in new_people}
+        qids = engine.call(resolve_qids(engine, titles)) if titles else {}
+        facts = engine.call(person_facts(engine, qids.values())) if titles else {}
+
+        added = []
+        for person in new_people:
+            qid = qids.get(person["wiki_title"])
+            fact = facts.get(qid, {})
+            precision = fact.get("precision", {})
+            coarse = [f for f in ("born", "died")
+                      if person[f] is None and precision.get(f, PRECISION_YEAR) < PRECISION_YEAR]
+            for field in ("born", "died", "gender"):
+                if person[field] is None and field not in coarse:
+                    person[field] = fact.get(field)
+            missing = [f for f in ("born", "gender") if person[f] is None]
+            missing += [f for f in coarse if f not in missing]
+            if missing:
+                detail = qid or "no Wikidata Q-id"
+                if coarse:
+                    detail += f", {' / '.join(coarse)} only known to the decade or century"
+                skipped.append(f"{person['name']}: no {' / '.join(missing)} "
+                               f"({detail}); add it to the batch file")
+                continue
+            person["qid"], person["p18"] = qid, fact.get("image")
+            added.append(person)
+
+        print(f"{len(added)} to add, {len(skipped)} skipped")
+        for line in skipped:
+            print(f"  ⚠️  {line}")
+        for person in added:
+            died = person["died"] if person["died"] is not None else "alive"
+            print(f"  + {person['name']} ({person['born']} – {died}) {person['qid'] or ''}")
+
+        if dry_run or not added:
+            return added
+
+        temporary = ("wiki_title", "qid", "p18")
+        people.add_many({k: v for k, v in p.items() if k not in temporary} for p in added)
+        people.save()
+        print(f"Added {len(added)} people to {people.path}")
+
+        if download:
+            async def worker(engine, person):
+                dest = STATIC_DIR / person["image"].lstrip("/")
+                return await save_p18_image(engine, person["name"], person["qid"], person["p18"], dest)
+
+            engine.run(added, worker, unit="portrait", label=lambda p: p["name"])
+        return added
+    finally:
+        if engine.cache:
+            engine.cache.close()
 
 def main():
     """Main function."""
@@ -284,5 +380,23 @@ if __name__ == "__main__":
         print("Error: Required packages not found.")
         print("Please install: pip install requests tqdm")
         sys.exit(1)
-    
-    main() 
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Add people to the timeline")
+    parser.add_argument("--batch", nargs="+", type=pathlib.Path, metavar="FILE",
+                        help="import from .csv / .json files or men.md / women.md checklists")
+    parser.add_argument("--json", type=pathlib.Path, default=PEOPLE_JSON,
+                        help="people.json to update (batch mode)")
+    parser.add_argument("--dry-run", action="store_true", help="show what would be added")
+    parser.add_argument("--no-images", action="store_true", help="skip portrait downloads")
+    add_cache_args(parser)
+    args = parser.parse_args()
+
+    if not args.batch:
+        main()
+        sys.exit()
+    try:
+        records = [r for path in args.batch for r in read_batch(path)]
+    except (OSError, ValueError) as e:
+        sys.exit(f"❌ {e}")
+    batch_import(records, args.json, download=not args.no_images,
+                 dry_run=args.dry_run, cache=cache_from_args(args)) 
\ No newline at end of file
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JPEG quality search used by downsample.py.
+
+Compares, per image of the corpus (default: static/images/*-original/*.jpg):
+  linear : the old loop - save to disk at 85, 80, ... 25 until the file fits
+  binary : downsample.find_quality - in-memory binary search, one final write
+
+Each image is decoded and resized once up front, so only the encode/write
+strategy is timed.
+
+Usage: python scripts/bench_encode.py [--target-mb 0.1] [--corpus 'static/images/people/*.jpg']
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+from pathlib import Path
+from PIL import Image
+
+from downsample import (IMAGES_DIR, MAX_DIMENSION, MAX_QUALITY, MIN_QUALITY,
+                        QUALITY_STEP, find_quality, resize_to_fit, write_atomic)
+
+def prepare(path, max_dimension=MAX_DIMENSION):
+    """Decode and resize an image exactly like downsample_image does"""
+    img = Image.open(path)
+    if img.mode == 'RGBA':
+        img = img.convert('RGB')
+    img.load()
+    return resize_to_fit(img, max_dimension)
+
+def linear_search(img, target_bytes, output_path):
+    """The pre-binary-search strategy: repeated save-to-disk + getsize"""
+    passes = 0
+    quality = MAX_QUALITY
+    while quality >= MIN_QUALITY:
+        img.save(output_path, 'JPEG', quality=quality, optimize=True)
+        passes += 1
+        if os.path.getsize(output_path) <= target_bytes:
+            break
+        quality -= QUALITY_STEP
+    return max(quality, MIN_QUALITY), passes
+
+def binary_search(img, target_bytes, output_path):
+    quality, data, passes = find_quality(img, target_bytes)
+    write_atomic(output_path, data)
+    return quality, passes
+
+def main(corpus, target_mb):
+    files = sorted(Path(p) for p in glob.glob(corpus))
+    if not files:
+        print(f"No images match {corpus}")
+        return
+
+    target_bytes = int(target_mb * 1024 * 1024)
+    print(f"Preparing {len(files)} images (target {target_mb}MB)...")
+    images = [(f, prepare(f)) for f in files]
+
+    totals = {"linear": [0.0, 0], "binary": [0.0, 0]}
+    with tempfile.TemporaryDirectory() as tmp:
+        for f, img in images:
+            row = []
+            for name, strategy in (("linear", linear_search), ("binary", binary_search)):
+                out = Path(tmp) / f"{name}-{f.name}"
+                start = time.perf_counter()
+                quality, passes = strategy(img, target_bytes, out)
+                elapsed = time.perf_counter() - start
+                totals[name][0] += elapsed
+                totals[name][1] += passes
+                row.append(f"{name} q{quality:>2} x{passes:<2} {elapsed * 1000:7.1f}ms")
+            print(f"  {f.name:<40} " + "  |  ".join(row))
+
+    print()
+    print("=" * 50)
+    print("SUMMARY")
+    print("=" * 50)
+    for name, (elapsed, passes) in totals.items():
+        print(f"{name:>6}: {elapsed:.2f}s, {passes} encode passes "
+              f"({passes / len(images):.1f}/image)")
+    if totals["binary"][0]:
+        print(f"Speed-up: {totals['linear'][0] / totals['binary'][0]:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare JPEG quality search strategies")
+    parser.add_argument("--corpus", default=str(IMAGES_DIR / "*-original" / "*.jpg"),
+                        help="glob of source images (default: static/images/*-original/*.jpg)")
+    parser.add_argument("--target-mb", type=float, default=1.0,
+                        help="size budget per image in MB (default 1.0)")
+    args = parser.parse_args()
+    main(args.corpus, args.target_mb)
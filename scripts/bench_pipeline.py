@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark each stage of the asset pipeline separately, against fixed corpora.
+
+Stages
+------
+  qid       : wikimedia.resolve_qids, one 50-title batch per call   (people.json names)
+  p18       : wikimedia.image_filenames, one 50-Q-id batch per call
+  download  : FetchEngine.download of the P18 images, one file per call
+  decode    : PIL open + load                                      (--corpus images)
+  resize    : downsample.resize_to_fit to --max-dimension
+  encode    : downsample.find_quality against --target-mb
+  add_person: add_person.add_person_to_json into a scratch people.json
+
+The network stages never touch the network unless asked to: they replay HTTP
+cassettes (see replay.py) from --cassettes, which `--record` fills from the live
+APIs once. Without a cassette directory they are skipped.
+
+Every stage runs in its own spawned process so its peak RSS is its own. Each
+reports items, throughput (items/s), p50/p95 latency per call and peak RSS; the
+results are written as JSON. With a baseline (`--save-baseline` stores one),
+the run fails when a stage's throughput drops, or its p95 grows, by more than
+--threshold.
+
+scripts/bench-baseline.json is committed, covering the local stages on the default
+corpus; network stages are only compared once a baseline taken with --cassettes
+includes them. Timings depend on the machine: re-save the baseline on the machine
+that gates (e.g. the CI runner) rather than comparing against another one's.
+
+Usage:
+    python scripts/bench_pipeline.py --cassettes /tmp/bench-cassettes --record   # once, online
+    python scripts/bench_pipeline.py --cassettes /tmp/bench-cassettes --save-baseline
+    python scripts/bench_pipeline.py --cassettes /tmp/bench-cassettes            # compare
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+ROOT_DIR = SCRIPTS_DIR.parent
+PEOPLE_JSON = ROOT_DIR / "src" / "lib" / "data" / "people.json"
+DEFAULT_CORPUS = str(ROOT_DIR / "static" / "images" / "people" / "*.jpg")
+RESULTS_PATH = SCRIPTS_DIR / "bench-results.json"
+BASELINE_PATH = SCRIPTS_DIR / "bench-baseline.json"
+
+NETWORK_STAGES = ("qid", "p18", "download")
+LOCAL_STAGES = ("decode", "resize", "encode", "add_person")
+STAGES = NETWORK_STAGES + LOCAL_STAGES
+
+THRESHOLD = 0.25        # allowed relative regression before failing
+DOWNLOAD_LIMIT = 20     # images downloaded by the download stage
+ADD_PERSON_COUNT = 200  # synthetic people inserted by the add_person stage
+TARGET_MB = 0.1
+# Below downsample.MAX_DIMENSION so the already-downsampled default corpus still
+# exercises the resampler
+MAX_DIMENSION = 400
+
+# --------------------------------------------------------------------------- #
+# Stages (each runs in a spawned child and returns items, per-call latencies and
+# the wall time of the measured section, so untimed setup is excluded)
+# --------------------------------------------------------------------------- #
+def _engine(opts):
+    from fetch_engine import FetchEngine
+    from replay import CassetteAdapter
+
+    mode = "record" if opts["record"] else "replay"
+    transport = CassetteAdapter(opts["cassettes"], mode, latency=opts["latency"])
+    return FetchEngine(transport=transport)  # no lookup cache: measure the requests
+
+def _names():
+    return sorted(p["name"] for p in json.loads(PEOPLE_JSON.read_text()))
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def _sequential(fn, calls):
+    """Time fn(*args) for each args tuple, one after the other"""
+    latencies, wall = _timed(lambda: [_timed(fn, *args)[1] for args in calls])
+    return latencies, wall
+
+def stage_qid(opts):
+    from wikimedia import _chunks, resolve_qids
+    engine = _engine(opts)
+    names = _names()
+    calls = [(resolve_qids(engine, chunk),) for chunk in _chunks(names)]
+    return (len(names), *_sequential(engine.call, calls))
+
+def stage_p18(opts):
+    from wikimedia import _chunks, image_filenames, resolve_qids
+    engine = _engine(opts)
+    qids = sorted(q for q in engine.call(resolve_qids(engine, _names())).values() if q)
+    calls = [(image_filenames(engine, chunk),) for chunk in _chunks(qids)]
+    return (len(qids), *_sequential(engine.call, calls))
+
+def stage_download(opts):
+    from wikimedia import commons_file_url, resolve_images
+    engine = _engine(opts)
+    _, images = engine.call(resolve_images(engine, _names()))
+    files = sorted(f for f in images.values() if f)[:DOWNLOAD_LIMIT]
+
+    async def fetch_all(dest):
+        async def one(n, filename):
+            start = time.perf_counter()
+            await engine.download(commons_file_url(filename), dest / f"{n}{Path(filename).suffix}")
+            return time.perf_counter() - start
+        return await asyncio.gather(*(one(n, f) for n, f in enumerate(files)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        latencies, wall = _timed(engine.call, fetch_all(Path(tmp)))
+    return len(files), latencies, wall
+
+def _corpus(opts):
+    return sorted(glob.glob(opts["corpus"]))
+
+def _decoded(opts):
+    from PIL import Image
+    images = []
+    for path in _corpus(opts):
+        img = Image.open(path)
+        img.load()
+        images.append(img.convert("RGB") if img.mode == "RGBA" else img)
+    return images
+
+def stage_decode(opts):
+    from PIL import Image
+
+    def decode(path):
+        with Image.open(path) as img:
+            img.load()
+
+    paths = _corpus(opts)
+    return (len(paths), *_sequential(decode, [(p,) for p in paths]))
+
+def stage_resize(opts):
+    from downsample import resize_to_fit
+    images = _decoded(opts)
+    return (len(images), *_sequential(resize_to_fit, [(img, opts["max_dimension"]) for img in images]))
+
+def stage_encode(opts):
+    from downsample import find_quality, resize_to_fit
+    target = int(opts["target_mb"] * 1024 * 1024)
+    images = [resize_to_fit(img, opts["max_dimension"]) for img in _decoded(opts)]
+    return (len(images), *_sequential(find_quality, [(img, target) for img in images]))
+
+def stage_add_person(opts):
+    from add_person import add_person_to_json
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "people.json"
+        shutil.copy(PEOPLE_JSON, path)
+        people = [{"id": f"bench{n}", "name": f"Bench Person {n}", "born": (n * 37) % 2000 - 500,
+                   "died": (n * 37) % 2000 - 440, "image": f"/images/people/bench{n}.jpg", "gender": n % 2}
+                  for n in range(ADD_PERSON_COUNT)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies, wall = _sequential(add_person_to_json, [(p, str(path)) for p in people])
+    return ADD_PERSON_COUNT, latencies, wall
+
+def _run_stage(name, opts):
+    """Child-process entry point: run one stage and measure it"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    items, latencies, elapsed = globals()[f"stage_{name}"](opts)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes there, KiB on Linux
+        peak_kb //= 1024
+    return {
+        "items": items,
+        "calls": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput": round(items / elapsed, 2) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+    }
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+# --------------------------------------------------------------------------- #
+# Baseline comparison
+# --------------------------------------------------------------------------- #
+def compare(results, baseline, threshold):
+    """
+    Return a list of human-readable regressions against `baseline`, or None
+    when the baseline was taken with other fixtures/settings
+    """
+    settings = ("corpus", "target_mb", "max_dimension", "latency")
+    if any(results.get(k) != baseline.get(k) for k in settings):
+        return None  # different fixtures: not comparable
+    regressions = []
+    for name, stage in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or base["items"] != stage["items"]:
+            continue  # different corpus: not comparable
+        if base["throughput"] and stage["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {stage['throughput']}/s vs {base['throughput']}/s")
+        if base["p95_ms"] and stage["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {stage['p95_ms']}ms vs {base['p95_ms']}ms")
+    return regressions
+
+def _portable(pattern):
+    """The corpus glob relative to the repo when inside it, so baselines compare across checkouts"""
+    path = Path(pattern)
+    return path.relative_to(ROOT_DIR).as_posix() if path.is_relative_to(ROOT_DIR) else pattern
+
+def main(stages, opts, output, baseline_path, save_baseline, threshold):
+    ctx = multiprocessing.get_context("spawn")
+    results = {"python": platform.python_version(), "machine": platform.machine(),
+               "corpus": _portable(opts["corpus"]), "target_mb": opts["target_mb"],
+               "max_dimension": opts["max_dimension"], "latency": opts["latency"], "stages": {}}
+
+    print(f"{'stage':<12}{'items':>7}{'items/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>9}")
+    for name in stages:
+        if name in NETWORK_STAGES and not opts["cassettes"]:
+            print(f"{name:<12}  skipped (no --cassettes)")
+            continue
+        with ctx.Pool(1) as pool:
+            try:
+                stage = pool.apply(_run_stage, (name, opts))
+            except Exception as e:
+                print(f"{name:<12}  ❌ {type(e).__name__}: {e}")
+                continue
+        results["stages"][name] = stage
+        print(f"{name:<12}{stage['items']:>7}{stage['throughput'] or 0:>11.1f}"
+              f"{stage['p50_ms']:>10.2f}{stage['p95_ms']:>10.2f}{stage['peak_rss_mb']:>9.1f}")
+
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\nResults: {output}")
+
+    if save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("No baseline to compare against (use --save-baseline).")
+        return 0
+
+    regressions = compare(results, json.loads(baseline_path.read_text()), threshold)
+    if regressions is None:
+        print(f"Baseline {baseline_path.name} used other corpus/settings; not compared.")
+        return 0
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\n✅ No stage regressed beyond {threshold:.0%} of {baseline_path.name}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the asset pipeline stage by stage")
+    parser.add_argument("stages", nargs="*", metavar="stage",
+                        help=f"any of {', '.join(STAGES)} (default: all)")
+    parser.add_argument("--cassettes", type=lambda p: str(Path(p).resolve()), metavar="DIR",
+                        help="HTTP cassette directory for the network stages")
+    parser.add_argument("--record", action="store_true",
+                        help="fill --cassettes from the live APIs instead of replaying")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="SECONDS",
+                        help="simulated network latency per replayed request")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS,
+                        help="glob of images for decode/resize/encode (default: static/images/people/*.jpg)")
+    parser.add_argument("--target-mb", type=float, default=TARGET_MB,
+                        help=f"encode stage size budget (default {TARGET_MB})")
+    parser.add_argument("--max-dimension", type=int, default=MAX_DIMENSION,
+                        help=f"resize/encode bounding box in px (default {MAX_DIMENSION})")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH,
+                        help=f"results JSON (default {RESULTS_PATH.name})")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH,
+                        help=f"baseline JSON (default {BASELINE_PATH.name})")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"allowed relative regression (default {THRESHOLD})")
+    args = parser.parse_args()
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    if args.record and not args.cassettes:
+        parser.error("--record needs --cassettes")
+
+    opts = {"cassettes": args.cassettes, "record": args.record, "latency": args.latency,
+            "corpus": args.corpus, "target_mb": args.target_mb,
+            "max_dimension": args.max_dimension}
+    sys.exit(main(args.stages or list(STAGES), opts, args.output, args.baseline,
+                  args.save_baseline, args.threshold))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Pack low-res thumbnails for each dataset into a few atlas (sprite-sheet) images.
+
+Every `image` in people.json / artworks.json / books.json is scaled to a fixed
+height (keeping its aspect ratio) and shelf-packed, row by row, into sheets of
+at most SHEET_WIDTH x SHEET_HEIGHT. The timeline can then load a handful of
+sheets instead of one request per portrait.
+
+Outputs
+-------
+static/images/atlas/<dataset>-<n>.jpg (and .webp when supported)
+src/lib/data/atlas.json:
+
+    {"people": {"thumbHeight": 96, "hash": "<sha256 of the source images>",
+                "sheets": [{"src": "/images/atlas/people-0.jpg", "webp": "...", "width": 2048, "height": 1200}],
+                "items": {"plato": [sheet, x, y, w, h], ...}}, ...}
+
+Sheets are only re-encoded when a dataset's layout or source images changed,
+so rebuilding an unchanged tree leaves the committed files alone; `--check`
+reports (exit 1) when atlas.json is out of date instead of writing anything.
+
+Usage: python scripts/build_atlas.py [people artworks books] [--thumb-height 96] [--check]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+from pathlib import Path
+from PIL import Image, features
+
+from datastore import write_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+STATIC_DIR = ROOT_DIR / "static"
+ATLAS_DIR = STATIC_DIR / "images" / "atlas"
+ATLAS_MANIFEST = DATA_DIR / "atlas.json"
+
+DATASETS = {"people": "people.json", "artworks": "artworks.json", "books": "books.json"}
+
+THUMB_HEIGHT = 96
+SHEET_WIDTH = 2048
+SHEET_HEIGHT = 2048
+PADDING = 2  # px between thumbnails so filtering never bleeds into a neighbour
+
+def load_thumbnails(records, thumb_height, max_width=SHEET_WIDTH):
+    """
+    Return [(id, thumbnail)] for every record whose image exists on disk.
+
+    Panoramas wider than max_width at thumb_height are scaled down to fit it.
+    """
+    thumbs, missing = [], []
+    for record in records:
+        path = STATIC_DIR / record["image"].lstrip("/")
+        if not path.exists():
+            missing.append(record["id"])
+            continue
+        img = Image.open(path)
+        img = img.convert("RGB")
+        scale = min(thumb_height / img.height, max_width / img.width)
+        size = (max(1, min(max_width, round(img.width * scale))), max(1, round(img.height * scale)))
+        thumbs.append((record["id"], img.resize(size, Image.LANCZOS)))
+    return thumbs, missing
+
+def shelf_pack(sizes, sheet_width=SHEET_WIDTH, sheet_height=SHEET_HEIGHT, padding=PADDING):
+    """
+    Place (w, h) boxes left-to-right in rows, opening a new row when one is
+    full and a new sheet when the rows run out.
+
+    Returns ([(sheet, x, y)] in input order, [(sheet_width, sheet_height)] used).
+    Raises ValueError for a box larger than a sheet.
+    """
+    placements = []
+    sheets = [[0, 0]]  # used (width, height) per sheet
+    x = y = row_height = 0
+    for w, h in sizes:
+        if w > sheet_width or h > sheet_height:
+            raise ValueError(f"{w}x{h} box does not fit a {sheet_width}x{sheet_height} sheet")
+        if x > 0 and x + w > sheet_width:  # next row
+            x, y = 0, y + row_height + padding
+            row_height = 0
+        if y > 0 and y + h > sheet_height:  # next sheet
+            sheets.append([0, 0])
+            x = y = row_height = 0
+        placements.append((len(sheets) - 1, x, y))
+        sheets[-1][0] = max(sheets[-1][0], x + w)
+        sheets[-1][1] = max(sheets[-1][1], y + h)
+        x += w + padding
+        row_height = max(row_height, h)
+    return placements, [tuple(s) for s in sheets]
+
+def sources_hash(records):
+    """sha256 over the ids and bytes of every image on disk, in record order"""
+    digest = hashlib.sha256()
+    for record in records:
+        path = STATIC_DIR / record["image"].lstrip("/")
+        if path.exists():
+            digest.update(record["id"].encode() + b"\0" + path.read_bytes())
+    return digest.hexdigest()[:16]
+
+def layout_atlas(dataset, thumb_height=THUMB_HEIGHT):
+    """
+    Place one dataset's thumbnails without encoding anything.
+
+    Returns (atlas manifest entry or None, [(id, thumbnail)], missing ids).
+    """
+    records = json.loads((DATA_DIR / DATASETS[dataset]).read_text())
+    thumbs, missing = load_thumbnails(records, thumb_height)
+    if not thumbs:
+        return None, thumbs, missing
+
+    placements, sheet_sizes = shelf_pack([t.size for _, t in thumbs])
+    items = {item_id: [sheet, x, y, thumb.width, thumb.height]
+             for (item_id, thumb), (sheet, x, y) in zip(thumbs, placements)}
+    sheets = []
+    for n, (width, height) in enumerate(sheet_sizes):
+        name = f"{dataset}-{n}"
+        sheet = {"src": f"/images/atlas/{name}.jpg", "width": width, "height": height}
+        if features.check("webp"):
+            sheet["webp"] = f"/images/atlas/{name}.webp"
+        sheets.append(sheet)
+
+    atlas = {"thumbHeight": thumb_height, "hash": sources_hash(records), "sheets": sheets, "items": items}
+    return atlas, thumbs, missing
+
+def write_sheets(atlas, thumbs):
+    """Paste the thumbnails where layout_atlas placed them and encode every sheet"""
+    canvases = [Image.new("RGB", (s["width"], s["height"]), "white") for s in atlas["sheets"]]
+    for item_id, thumb in thumbs:
+        sheet, x, y, _, _ = atlas["items"][item_id]
+        canvases[sheet].paste(thumb, (x, y))
+
+    ATLAS_DIR.mkdir(parents=True, exist_ok=True)
+    for sheet, canvas in zip(atlas["sheets"], canvases):
+        buf = io.BytesIO()
+        canvas.save(buf, "JPEG", quality=80, optimize=True, progressive=True)
+        write_atomic(STATIC_DIR / sheet["src"].lstrip("/"), buf.getvalue())
+        if "webp" in sheet:
+            buf = io.BytesIO()
+            canvas.save(buf, "WEBP", quality=80, method=6)
+            write_atomic(STATIC_DIR / sheet["webp"].lstrip("/"), buf.getvalue())
+
+def sheets_exist(atlas):
+    return all((STATIC_DIR / sheet[key].lstrip("/")).exists()
+               for sheet in atlas["sheets"] for key in ("src", "webp") if key in sheet)
+
+def main(datasets, thumb_height=THUMB_HEIGHT, check=False):
+    try:
+        current = ATLAS_MANIFEST.read_text()
+    except FileNotFoundError:
+        current = None
+    manifest = json.loads(current) if current else {}
+
+    stale = []
+    for dataset in datasets:
+        atlas, thumbs, missing = layout_atlas(dataset, thumb_height)
+        if atlas is None:
+            print(f"{dataset}: no images found")
+            continue
+        for item_id in missing:
+            print(f"  ⚠️  {item_id}: image not found")
+        if atlas == manifest.get(dataset) and sheets_exist(atlas):
+            print(f"{dataset}: up to date")
+            continue
+        if check:
+            print(f"{dataset}: out of date")
+            stale.append(dataset)
+            continue
+        write_sheets(atlas, thumbs)
+        manifest[dataset] = atlas
+        sizes = ", ".join(f"{s['width']}x{s['height']}" for s in atlas["sheets"])
+        print(f"{dataset}: {len(atlas['items'])} thumbnails → {len(atlas['sheets'])} sheet(s) ({sizes})")
+
+    manifest_path = ATLAS_MANIFEST.relative_to(ROOT_DIR)
+    if check:
+        if stale:
+            print(f"\n{manifest_path} is out of date; run scripts/build_atlas.py")
+            return 1
+        print(f"\n{manifest_path} is up to date")
+        return 0
+    text = json.dumps(manifest, separators=(",", ":")) + "\n"
+    if text == current:
+        print(f"\n{manifest_path} unchanged")
+        return 0
+    write_atomic(ATLAS_MANIFEST, text.encode())
+    print(f"\nWrote {manifest_path}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack dataset thumbnails into atlas images")
+    parser.add_argument("datasets", nargs="*", metavar="dataset",
+                        help=f"any of {', '.join(DATASETS)} (default: all)")
+    parser.add_argument("--thumb-height", type=int, default=THUMB_HEIGHT,
+                        help=f"thumbnail height in px (default {THUMB_HEIGHT})")
+    parser.add_argument("--check", action="store_true",
+                        help="only report whether atlas.json is up to date (exit 1 if not)")
+    args = parser.parse_args()
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(sorted(unknown))}")
+    sys.exit(main(args.datasets or list(DATASETS), args.thumb_height, args.check))
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+build_layout.py
+Precompute the top / bottom placement and row of every timeline item, so the
+charts do not have to work it out in the browser.
+
+How it works
+------------
+1. Placement      : items sorted by start year alternate top / bottom, exactly as
+                    TimelineChart.svelte and EventTimeline.svelte split them
+2. Spans          : each item becomes (start, reach, tail, look): another item starting
+                    before `reach` - or before `tail + look` of its own title - would
+                    collide with it. These mirror the components' overlap tests: a 70-year
+                    buffer for people, title-width gaps for book / artwork dots, and an
+                    80 px + title buffer on the event x-axis (linear or piecewise asinh)
+3. Sweep line     : items are visited in start order; a heap of busy rows keyed by
+                    `reach` releases rows into a heap of free row numbers as the sweep
+                    passes them, and each item takes the lowest free row its title fits
+                    in - the same row the old first-fit scan chose, in O(n log n)
+                    instead of O(n² · rows)
+4. Overflow       : past MAX_BARS_PER_SIDE rows, items stack on the last row, as before
+
+Outputs
+-------
+src/lib/data/layout.json, one line per item so data edits give small diffs:
+
+    {"people": {
+      "plato": ["top", 1],
+      ...}, ...}
+
+build_routes.py copies each dataset's slice into its route chunk.
+
+The components use the precomputed rows while every item id is in the layout, and
+fall back to their own scan otherwise - re-run this after editing a dataset
+(`--check` exits 1 when layout.json is stale). Living people's bars are laid out
+as if they ran to OPEN_END_YEAR rather than the current year, so the committed rows
+stay overlap-free as the years pass; `--check` also fails once the current year
+passes it, as a reminder to move it on.
+
+Usage: python scripts/build_layout.py [people books ...] [--check]
+"""
+
+import argparse
+import datetime
+import heapq
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+from datastore import write_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+LAYOUT_JSON = DATA_DIR / "layout.json"
+
+# ----------------------------------------------------------------------------- #
+# Chart constants - keep in sync with the Svelte components
+# ----------------------------------------------------------------------------- #
+# TimelineChart.svelte
+CHART_MAX_ROWS = 25
+# Bars of living people are drawn up to the current year; reserve their rows up to
+# this one so the layout does not depend on the year it was built in
+OPEN_END_YEAR = 2035
+YEAR_PIXEL_RATIO = 1.2
+BAR_BUFFER_YEARS = 70
+DOT_MIN_YEARS = 50
+DOT_CHAR_PX = 6
+
+# EventTimeline.svelte
+EVENT_MAX_ROWS = 20
+PADDING = 60
+BASE_WIDTH = 4000
+LINEAR_PX_PER_YEAR = 0.2
+EVENT_BUFFER_PX = 80
+EVENT_CHAR_PX = 7
+CENOZOIC_BOUNDARY = -66_000_000
+HUMAN_BOUNDARY = -2_000_000
+HISTORICAL_BOUNDARY = -10_000
+PORTIONS = (0.15, 0.2, 0.3, 0.35)  # ancient, middle, human, historical
+
+# name → (file, chart, scale); the scale is the route's `scaleType` for events
+DATASETS = {
+    "people":   ("people.json",   "chart", None),
+    "books":    ("books.json",    "chart", None),
+    "artworks": ("artworks.json", "chart", None),
+    "cosmic":   ("cosmic.json",   "event", "log"),
+    "humanity": ("humanity.json", "event", "linear"),
+}
+
+
+def js_length(text) -> int:
+    """String length as JavaScript counts it (UTF-16 code units)."""
+    return len(text.encode("utf-16-le")) // 2 if text else 0
+
+
+# ----------------------------------------------------------------------------- #
+# Spans
+# ----------------------------------------------------------------------------- #
+def chart_start(item):
+    return item.get("born") or item.get("published") or item.get("created") or 0
+
+
+def chart_spans(items):
+    """(start, reach, tail, look, inclusive) per item, in TimelineChart's units (years)."""
+    spans = []
+    for item in items:
+        start = chart_start(item)
+        if "title" in item and ("published" in item or "created" in item):
+            # Dots collide when closer than max(50 years, the wider title)
+            look = js_length(item["title"]) * DOT_CHAR_PX / YEAR_PIXEL_RATIO
+            spans.append((start, start + max(DOT_MIN_YEARS, look), start, look, False))
+        else:
+            end = item.get("died") or item.get("created") or item.get("published") or OPEN_END_YEAR
+            spans.append((start, end + BAR_BUFFER_YEARS, end + BAR_BUFFER_YEARS, 0, True))
+    return spans
+
+
+def event_x_scale(items, scale):
+    """EventTimeline's timeToX, at the width it lays rows out with (before mount)."""
+    min_time = min(i["start"] for i in items)
+    max_time = max(i["end"] for i in items)
+    if scale == "log":
+        width = BASE_WIDTH
+    else:
+        width = max(BASE_WIDTH, (max_time - min_time) * LINEAR_PX_PER_YEAR)
+    usable = width + PADDING * 4 - PADDING * 2
+    ancient, middle, human, historical = (usable * p for p in PORTIONS)
+
+    def ratio(time, lo, hi, compression):
+        scaled = math.asinh(time / compression)
+        return (scaled - math.asinh(lo / compression)) / (
+            math.asinh(hi / compression) - math.asinh(lo / compression))
+
+    def to_x(time):
+        if scale != "log":
+            return PADDING + (time - min_time) / (max_time - min_time) * usable
+        if time <= CENOZOIC_BOUNDARY:
+            return PADDING + ratio(time, min_time, CENOZOIC_BOUNDARY, 1e8) * ancient
+        if time <= HUMAN_BOUNDARY:
+            return PADDING + ancient + ratio(time, CENOZOIC_BOUNDARY, HUMAN_BOUNDARY, 1e6) * middle
+        if time <= HISTORICAL_BOUNDARY:
+            return (PADDING + ancient + middle
+                    + ratio(time, HUMAN_BOUNDARY, HISTORICAL_BOUNDARY, 1e4) * human)
+        return (PADDING + ancient + middle + human
+                + (time - HISTORICAL_BOUNDARY) / (max_time - HISTORICAL_BOUNDARY) * historical)
+
+    return to_x
+
+
+def event_spans(items, scale):
+    """(start, reach, tail, look, inclusive) per item, in EventTimeline's units (px)."""
+    to_x = event_x_scale(items, scale)
+    spans = []
+    for item in items:
+        half_title = js_length(item.get("title")) * EVENT_CHAR_PX / 2
+        end = to_x(item["end"]) + EVENT_BUFFER_PX
+        spans.append((to_x(item["start"]), end + half_title, end, half_title, True))
+    return spans
+
+
+# ----------------------------------------------------------------------------- #
+# Row assignment
+# ----------------------------------------------------------------------------- #
+def assign_rows(spans, max_rows) -> list[int]:
+    """
+    First-fit rows (1-based) for spans in start order.
+
+    A row blocks a span starting at `s` while its reach is past `s` (or at it, for
+    inclusive spans), or while its tail plus the span's own `look` is.
+    """
+    reach, tail = {}, {}
+    busy = []        # (reach, row), stale entries skipped on pop
+    free = []        # row numbers whose reach the sweep has passed
+    is_free = set()
+    opened = 0
+    rows = []
+
+    for start, span_reach, span_tail, look, inclusive in spans:
+        def blocks(edge):
+            return edge >= start if inclusive else edge > start
+
+        while busy and not blocks(busy[0][0]):
+            edge, row = heapq.heappop(busy)
+            if edge == reach[row] and row not in is_free:
+                heapq.heappush(free, row)
+                is_free.add(row)
+
+        row, rejected = None, []
+        while free:
+            candidate = heapq.heappop(free)
+            if blocks(tail[candidate] + look):
+                rejected.append(candidate)
+            else:
+                row = candidate
+                is_free.discard(row)
+                break
+        for candidate in rejected:
+            heapq.heappush(free, candidate)
+
+        if row is None and opened < max_rows:
+            opened += 1
+            row = opened
+        if row is None:
+            # Every row is taken: stack on the last one, which now ends at the later edge
+            row = max_rows
+            is_free.discard(row)
+            reach[row] = max(reach[row], span_reach)
+            tail[row] = max(tail[row], span_tail)
+        else:
+            reach[row], tail[row] = span_reach, span_tail
+        heapq.heappush(busy, (reach[row], row))
+        rows.append(row)
+    return rows
+
+
+def layout(items, chart, scale=None) -> dict:
+    """{id: [placement, row]} for one dataset."""
+    if not items:
+        return {}
+    if chart == "chart":
+        ordered = sorted(items, key=chart_start)
+        spans, max_rows = chart_spans(ordered), CHART_MAX_ROWS
+    else:
+        ordered = sorted(items, key=lambda i: i["start"])
+        if min(i["start"] for i in items) == max(i["end"] for i in items):
+            # A zero-length axis: timeToX divides 0 / 0, so the components' NaN
+            # overlap tests never fire and every item lands on row 1
+            sides = {item["id"]: ["top", 1] if n % 2 == 0 else ["bottom", 1] for n, item in enumerate(ordered)}
+            return {item["id"]: sides[item["id"]] for item in items}
+        spans, max_rows = event_spans(ordered, scale), EVENT_MAX_ROWS
+
+    result = {}
+    for side, parity in (("top", 0), ("bottom", 1)):
+        picked = range(parity, len(ordered), 2)
+        rows = assign_rows([spans[n] for n in picked], max_rows)
+        for n, row in zip(picked, rows):
+            result[ordered[n]["id"]] = [side, row]
+    return {item["id"]: result[item["id"]] for item in items}  # file order
+
+
+def dumps(layouts: dict) -> str:
+    """One item per line, so a dataset edit only touches the rows that moved."""
+    blocks = []
+    for name, rows in layouts.items():
+        lines = ",\n".join(f"    {json.dumps(i)}: {json.dumps(r)}" for i, r in rows.items())
+        blocks.append(f"  {json.dumps(name)}: {{\n{lines}\n  }}" if rows else f"  {json.dumps(name)}: {{}}")
+    return "{\n" + ",\n".join(blocks) + "\n}\n"
+
+
+def main(names, check=False):
+    existing = json.loads(LAYOUT_JSON.read_text()) if LAYOUT_JSON.exists() else {}
+    layouts = dict(existing)
+    for name in names:
+        filename, chart, scale = DATASETS[name]
+        items = json.loads((DATA_DIR / filename).read_text())
+        start = time.perf_counter()
+        layouts[name] = layout(items, chart, scale)
+        elapsed = (time.perf_counter() - start) * 1000
+        max_rows = CHART_MAX_ROWS if chart == "chart" else EVENT_MAX_ROWS
+        used = {side: max((r for s, r in layouts[name].values() if s == side), default=0)
+                for side in ("top", "bottom")}
+        full = sum(r == max_rows for _, r in layouts[name].values())
+        print(f"{name:<9} {len(items):4d} items: {used['top']} top / {used['bottom']} bottom rows"
+              f"{f', {full} on the last row' if full else ''} ({elapsed:.1f}ms)")
+    layouts = {name: layouts[name] for name in DATASETS if name in layouts}
+
+    text = dumps(layouts)
+    if datetime.date.today().year > OPEN_END_YEAR:
+        print(f"Living people's bars now run past OPEN_END_YEAR {OPEN_END_YEAR} and may overlap; "
+              f"raise it in scripts/build_layout.py")
+        if check:
+            return 1
+    if check:
+        if text != (LAYOUT_JSON.read_text() if LAYOUT_JSON.exists() else None):
+            print(f"{LAYOUT_JSON.relative_to(ROOT_DIR)} is out of date; run scripts/build_layout.py")
+            return 1
+        print(f"{LAYOUT_JSON.relative_to(ROOT_DIR)} is up to date")
+        return 0
+    if existing and text == LAYOUT_JSON.read_text():
+        print(f"{LAYOUT_JSON.relative_to(ROOT_DIR)} unchanged")
+    else:
+        write_atomic(LAYOUT_JSON, text.encode())
+        print(f"Wrote {LAYOUT_JSON.relative_to(ROOT_DIR)}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute timeline rows for each dataset")
+    parser.add_argument("datasets", nargs="*", metavar="dataset",
+                        help=f"any of {', '.join(DATASETS)} (default: all)")
+    parser.add_argument("--check", action="store_true",
+                        help="only report whether layout.json is up to date (exit 1 if not)")
+    args = parser.parse_args()
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(sorted(unknown))}")
+    sys.exit(main(args.datasets or list(DATASETS), args.check))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+build_routes.py
+Write one minified data chunk per route, holding only the fields that route renders.
+
+How it works
+------------
+1. Project        : each route's records keep only the fields in ROUTES (the ones its
+                    components read); null values are dropped, since every reader
+                    treats a missing field like null
+2. Layout         : timeline routes also get their own slice of layout.json
+                    (build_layout.py), instead of importing every dataset's rows;
+                    routes in ATLAS_ROUTES get their dataset's slice of atlas.json
+                    (build_atlas.py) the same way
+3. Minify         : chunks are written without whitespace (compact separators, raw
+                    UTF-8), and only rewritten when their content changes
+4. Report         : bytes the route bundled before (the whole dataset JSON it used to
+                    import) vs. now (its chunk), raw and gzipped
+
+/search loads static/search-index.json (build_search_index.py) and needs no chunk.
+
+Outputs
+-------
+src/lib/data/routes/<route>.json, imported by src/routes/<route>/+page.svelte:
+
+    {"items": [{"id": "plato", "name": "Plato", "born": -428, ...}, ...],
+     "layout": {"plato": ["top", 1], ...}}
+
+    list.json: {"items": [...], "atlas": {"thumbHeight": 96, "sheets": [...], "items": {...}}}
+
+Usage: python scripts/build_routes.py [people list ...] [--check]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from pathlib import Path
+
+from datastore import write_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+ROUTES_DIR = DATA_DIR / "routes"
+LAYOUT_JSON = DATA_DIR / "layout.json"
+ATLAS_JSON = DATA_DIR / "atlas.json"
+
+EVENT_FIELDS = ("id", "title", "subtitle", "start", "end", "labelTime", "tags", "region")
+
+# route → (dataset, fields its page and components read, uses layout.json)
+ROUTES = {
+    "people":   ("people", ("id", "name", "born", "died", "image"), True),
+    "books":    ("books", ("id", "title", "author", "published", "image"), True),
+    "artworks": ("artworks", ("id", "title", "artist", "created", "image"), True),
+    "cosmic":   ("cosmic", EVENT_FIELDS, True),
+    "humanity": ("humanity", EVENT_FIELDS, True),
+    "list":     ("people", ("id", "name", "born", "died", "image", "gender"), False),
+}
+
+# Routes drawing a thumbnail per item, from the dataset's sprite atlas
+ATLAS_ROUTES = ("list",)
+
+
+def project(records, fields):
+    return [{f: r[f] for f in fields if r.get(f) is not None} for r in records]
+
+
+def build_chunk(route, layouts, atlases) -> str:
+    dataset, fields, uses_layout = ROUTES[route]
+    records = json.loads((DATA_DIR / f"{dataset}.json").read_text())
+    chunk = {"items": project(records, fields)}
+    if uses_layout:
+        chunk["layout"] = layouts.get(dataset, {})
+    if route in ATLAS_ROUTES and dataset in atlases:
+        chunk["atlas"] = atlases[dataset]
+    return json.dumps(chunk, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def sizes(data: bytes):
+    return len(data), len(gzip.compress(data, mtime=0))
+
+
+def main(routes, check=False):
+    layouts = json.loads(LAYOUT_JSON.read_text()) if LAYOUT_JSON.exists() else {}
+    if not layouts:
+        print("⚠️  layout.json missing - run scripts/build_layout.py first; chunks get empty layouts")
+    # Optional: without it /list falls back to one <img> per person
+    atlases = json.loads(ATLAS_JSON.read_text()) if ATLAS_JSON.exists() else {}
+
+    stale = []
+    total_before = total_after = 0
+    print(f"{'route':<10} {'before':>10} {'after':>10} {'saved':>7}   (gzipped)")
+    for route in routes:
+        dataset = ROUTES[route][0]
+        text = build_chunk(route, layouts, atlases)
+        path = ROUTES_DIR / f"{route}.json"
+
+        # What the page bundled before chunks: its whole dataset. layout.json only
+        # ever reached pages through the chunks, so it is not part of "before"
+        before = (DATA_DIR / f"{dataset}.json").read_bytes()
+        (raw_before, gz_before), (raw_after, gz_after) = sizes(before), sizes(text.encode())
+        total_before += raw_before
+        total_after += raw_after
+        print(f"{route:<10} {raw_before:>9,}B {raw_after:>9,}B {1 - raw_after / raw_before:>6.0%}"
+              f"   ({gz_before:,}B → {gz_after:,}B)")
+
+        current = path.read_text() if path.exists() else None
+        if text == current:
+            continue
+        if check:
+            stale.append(route)
+        else:
+            ROUTES_DIR.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, text.encode())
+
+    print(f"{'total':<10} {total_before:>9,}B {total_after:>9,}B {1 - total_after / total_before:>6.0%}")
+    if check and stale:
+        print(f"Out of date: {', '.join(stale)}; run scripts/build_routes.py")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write minimal per-route data chunks")
+    parser.add_argument("routes", nargs="*", metavar="route",
+                        help=f"any of {', '.join(ROUTES)} (default: all)")
+    parser.add_argument("--check", action="store_true",
+                        help="only report whether the chunks are up to date (exit 1 if not)")
+    args = parser.parse_args()
+    unknown = set(args.routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown route(s): {', '.join(sorted(unknown))}")
+    sys.exit(main(args.routes or list(ROUTES), args.check))
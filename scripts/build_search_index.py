@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+build_search_index.py
+Build the inverted index the /search page loads, instead of scanning all five
+datasets on every keystroke.
+
+How it works
+------------
+1. Documents      : every person, book, artwork and event becomes one result row,
+                    with its display name and date line already formatted, plus the
+                    few fields the detail panel shows
+2. Folding        : text is NFKD-decomposed, stripped of accents, lower-cased and run
+                    through FOLD (ß → ss, ø → o, ...), so "Godel" finds "Gödel"; the
+                    table ships in the index so the page folds queries the same way
+3. Tokens         : names, titles, authors, artists, subtitles, tags, regions and
+                    years are split into words
+4. Postings       : each word's trigrams (for substring queries) and its 1-2 letter
+                    prefixes (for short queries) map to the sorted, delta-encoded list
+                    of documents containing them
+
+A query word of 3+ letters intersects its trigrams' postings (shortest list first)
+and checks the few candidates against their folded text; shorter words use the
+prefix postings directly. The work depends on the posting lengths, not on the
+dataset size.
+
+Output: static/search-index.json (served as <base>/search-index.json)
+
+    {"version": 1, "gram": 3, "fold": {"ß": "ss", ...},
+     "columns": ["type", "id", "displayName", "dateRange", "sort", "text", ...],
+     "docs": [["person", "plato", "Plato", "-428 - -348", -428, "plato 428 348", ...], ...],
+     "grams": {"pla": [5, 12, 3], ...}, "prefixes": {"p": [...], "pl": [...]}}
+
+Usage: python scripts/build_search_index.py [--check]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+from datastore import write_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+INDEX_JSON = ROOT_DIR / "static" / "search-index.json"
+
+VERSION = 1
+GRAM = 3
+
+# Documents are stored as rows of these columns (trailing nulls dropped)
+COLUMNS = ("type", "id", "displayName", "dateRange", "sort", "text", "image",
+           "born", "died", "published", "author", "created", "artist",
+           "start", "labelTime", "subtitle", "region", "tags")
+
+# Letters NFKD does not decompose
+FOLD = {"ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i"}
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def fold(text: str) -> str:
+    """Accent- and case-folded text (mirrored by fold() in src/lib/utils/search.js)."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.category(c).startswith("M"))
+    return "".join(FOLD.get(c, c) for c in stripped.lower())
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(fold(text))
+
+
+def js_number(value) -> str:
+    """A number as JavaScript's template strings print it (1500.0 → "1500")."""
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def format_time(time) -> str:
+    """The search page's formatTime for cosmic / humanity events."""
+    if abs(time) >= 1e9:
+        return f"{time / 1e9:.1f} Ga"
+    if abs(time) >= 1e6:
+        return f"{time / 1e6:.1f} Ma"
+    if time < 0:
+        return f"{js_number(abs(time))} BC"
+    return f"{js_number(time)} AD"
+
+
+# ----------------------------------------------------------------------------- #
+# Documents
+# ----------------------------------------------------------------------------- #
+def person_doc(p):
+    return {"type": "person", "displayName": p["name"],
+            "dateRange": f"{p.get('born') or '?'} - {p.get('died') or 'present'}",
+            "sort": p.get("born") or 0,
+            "fields": [p["name"], p.get("born"), p.get("died")],
+            "detail": ("image", "born", "died")}
+
+
+def book_doc(b):
+    return {"type": "book", "displayName": b["title"],
+            "dateRange": f"{b['published']} • {b['author']}",
+            "sort": b.get("published") or 0,
+            "fields": [b["title"], b["author"], b.get("published")],
+            "detail": ("image", "published", "author")}
+
+
+def artwork_doc(a):
+    return {"type": "artwork", "displayName": a["title"],
+            "dateRange": f"{a['created']} • {a['artist']}",
+            "sort": a.get("created") or 0,
+            "fields": [a["title"], a["artist"], a.get("created")],
+            "detail": ("image", "created", "artist")}
+
+
+def event_doc(kind):
+    def doc(e):
+        if kind == "cosmic":
+            date = e.get("labelTime") or format_time(e["start"])
+        else:
+            date = f"{format_time(e['start'])} • {e['region']}" if e.get("region") else format_time(e["start"])
+        return {"type": kind, "displayName": e["title"], "dateRange": date,
+                "sort": e.get("start") or 0,
+                "fields": [e["title"], e.get("subtitle"), e.get("region"), *e.get("tags", [])],
+                "detail": ("start", "labelTime", "subtitle", "region", "tags")}
+    return doc
+
+
+# dataset file → document builder, in the order results used to be listed
+DATASETS = {
+    "people.json": person_doc,
+    "books.json": book_doc,
+    "artworks.json": artwork_doc,
+    "cosmic.json": event_doc("cosmic"),
+    "humanity.json": event_doc("humanity"),
+}
+
+
+def build_index(datasets: dict) -> dict:
+    """Index {builder: records}; returns the JSON-ready index."""
+    docs = []
+    grams = defaultdict(set)
+    prefixes = defaultdict(set)
+    for builder, records in datasets.items():
+        for record in records:
+            built = builder(record)
+            n = len(docs)
+            values = [js_number(v) if isinstance(v, (int, float)) else v
+                      for v in built.pop("fields") if v is not None]
+            words = list(dict.fromkeys(w for value in values for w in tokenize(value)))
+            for word in words:
+                for size in range(1, min(GRAM, len(word) + 1)):
+                    prefixes[word[:size]].add(n)
+                for i in range(len(word) - GRAM + 1):
+                    grams[word[i:i + GRAM]].add(n)
+            detail = {k: record[k] for k in built.pop("detail") if record.get(k) is not None}
+            doc = {"id": record["id"], **built, **detail, "text": " ".join(words)}
+            row = [doc.get(column) for column in COLUMNS]
+            while row[-1] is None:
+                row.pop()
+            docs.append(row)
+
+    return {"version": VERSION, "gram": GRAM, "fold": FOLD, "columns": COLUMNS, "docs": docs,
+            "grams": {g: delta(ids) for g, ids in sorted(grams.items())},
+            "prefixes": {p: delta(ids) for p, ids in sorted(prefixes.items())}}
+
+
+def delta(ids) -> list[int]:
+    """Sorted ids as gaps (first id, then differences): smaller numbers, shorter JSON."""
+    ids = sorted(ids)
+    return [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+
+
+def main(check=False):
+    start = time.perf_counter()
+    datasets = {builder: json.loads((DATA_DIR / filename).read_text())
+                for filename, builder in DATASETS.items()}
+    index = build_index(datasets)
+    text = json.dumps(index, ensure_ascii=False, separators=(",", ":"))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    postings = sum(len(ids) for ids in index["grams"].values())
+    print(f"{len(index['docs'])} documents, {len(index['grams'])} trigrams ({postings} postings), "
+          f"{len(index['prefixes'])} prefixes, {len(text.encode()) / 1024:.1f} KB in {elapsed:.0f}ms")
+    current = INDEX_JSON.read_text() if INDEX_JSON.exists() else None
+    if check:
+        if text != current:
+            print(f"{INDEX_JSON.relative_to(ROOT_DIR)} is out of date; run scripts/build_search_index.py")
+            return 1
+        print(f"{INDEX_JSON.relative_to(ROOT_DIR)} is up to date")
+        return 0
+    if text == current:
+        print(f"{INDEX_JSON.relative_to(ROOT_DIR)} unchanged")
+        return 0
+    write_atomic(INDEX_JSON, text.encode())
+    print(f"Wrote {INDEX_JSON.relative_to(ROOT_DIR)}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the /search inverted index")
+    parser.add_argument("--check", action="store_true",
+                        help="only report whether search-index.json is up to date (exit 1 if not)")
+    sys.exit(main(parser.parse_args().check))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+build_tiles.py
+Group the cosmic / humanity events into a multi-resolution tile pyramid along the
+event timeline's x-axis, so a chart can load and draw only what is on screen.
+
+How it works
+------------
+1. Axis           : every event's start / end goes through EventTimeline's scale
+                    (build_layout.event_x_scale: piecewise asinh for cosmic, linear for
+                    humanity) and is normalised to u in [0, 1]
+2. Pyramid        : tile (z, i) holds events starting in u [i / 2^z, (i + 1) / 2^z).
+                    From the single level-0 tile, a tile with more than --capacity
+                    events keeps the ones too wide for a child tile and hands the rest
+                    to its two children by start, down to --max-zoom. Tiles are loose:
+                    an event may run past its tile's end, by at most one tile width
+3. Storage        : each event is stored once, at the level matching its on-screen
+                    width, so coarse tiles hold the wide events worth drawing when
+                    zoomed out
+4. Summaries      : every tile also carries a collapsed summary of its whole subtree -
+                    event count, time range, tag counts and how far right it reaches -
+                    to draw in place of the tiles below it at coarse zoom
+5. Index          : index.json lists every tile with its subtree count; a client draws
+                    the events of each tile whose [range[0], reach] meets the viewport
+                    down to the current zoom, and the summaries one level further
+
+Outputs
+-------
+static/tiles/<dataset>/index.json
+static/tiles/<dataset>/<z>/<i>.json:
+
+    {"z": 2, "i": 1, "range": [0.25, 0.5], "reach": 0.61, "split": true,
+     "summary": {"count": 12, "start": -4.5e9, "end": -6.6e7, "tags": {"life": 5, ...}},
+     "events": [{"id": "first-life", "title": ..., "u": [0.27, 0.27]}, ...]}
+
+Usage: python scripts/build_tiles.py [cosmic humanity] [--capacity 8] [--max-zoom 12] [--check]
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from collections import Counter
+from pathlib import Path
+
+from build_layout import DATASETS as LAYOUT_DATASETS, event_x_scale
+from build_routes import EVENT_FIELDS, project
+from datastore import write_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+TILES_DIR = ROOT_DIR / "static" / "tiles"
+
+DATASETS = {name: scale for name, (_, chart, scale) in LAYOUT_DATASETS.items() if chart == "event"}
+
+CAPACITY = 8
+MAX_ZOOM = 12
+
+
+def normalised_axis(events, scale):
+    """time → u in [0, 1] along the chart's x-axis."""
+    to_x = event_x_scale(events, scale)
+    x0 = to_x(min(e["start"] for e in events))
+    x1 = to_x(max(e["end"] for e in events))
+    return lambda t: (to_x(t) - x0) / (x1 - x0) if x1 > x0 else 0.0
+
+
+def child_of(u, z):
+    """Index of the level-z tile that u falls in."""
+    return min(int(u * 2 ** z), 2 ** z - 1)
+
+
+def build_pyramid(records, scale, capacity=CAPACITY, max_zoom=MAX_ZOOM) -> dict:
+    """{(z, i): tile} for one dataset."""
+    axis = normalised_axis(records, scale)
+    spans = [(axis(r["start"]), axis(r["end"])) for r in records]
+    items = project(records, EVENT_FIELDS)
+    for item, (u0, u1) in zip(items, spans):
+        item["u"] = [round(u0, 6), round(u1, 6)]
+
+    tiles = {}
+    pending = [(0, 0, list(range(len(records))))]
+    while pending:
+        z, i, members = pending.pop()
+        size = 1 / 2 ** z
+        tile = {"z": z, "i": i, "range": [i * size, (i + 1) * size],
+                "reach": round(max(spans[n][1] for n in members), 6),
+                "split": False,
+                "summary": {"count": len(members),
+                            "start": min(records[n]["start"] for n in members),
+                            "end": max(records[n]["end"] for n in members),
+                            "tags": dict(Counter(t for n in members for t in records[n].get("tags", [])))}}
+        own = members
+        if len(members) > capacity and z < max_zoom:
+            # Events wider than a child tile stay here; the rest go down by start
+            own = [n for n in members if spans[n][1] - spans[n][0] > size / 2]
+            children = {}
+            for n in members:
+                if spans[n][1] - spans[n][0] <= size / 2:
+                    children.setdefault(child_of(spans[n][0], z + 1), []).append(n)
+            for child, inside in children.items():
+                pending.append((z + 1, child, inside))
+            tile["split"] = bool(children)
+        tile["events"] = [items[n] for n in sorted(own, key=lambda n: spans[n][0])]
+        tiles[(z, i)] = tile
+    return tiles
+
+
+def tile_files(name, capacity=CAPACITY, max_zoom=MAX_ZOOM):
+    """({path relative to the dataset's tile directory: bytes}, tiles, index) for one dataset."""
+    records = json.loads((DATA_DIR / f"{name}.json").read_text())
+    tiles = build_pyramid(records, DATASETS[name], capacity, max_zoom)
+    files = {f"{z}/{i}.json": json.dumps(tile, ensure_ascii=False, separators=(",", ":")).encode()
+             for (z, i), tile in tiles.items()}
+
+    levels = {}
+    for (z, i), tile in sorted(tiles.items()):
+        levels.setdefault(str(z), {})[str(i)] = tile["summary"]["count"]
+    index = {"dataset": name, "scale": DATASETS[name], "capacity": capacity,
+             "minTime": min(r["start"] for r in records), "maxTime": max(r["end"] for r in records),
+             "depth": max(z for z, _ in tiles), "tiles": levels}
+    files["index.json"] = json.dumps(index, separators=(",", ":")).encode()
+    return files, tiles, index
+
+
+def main(names, capacity=CAPACITY, max_zoom=MAX_ZOOM, check=False):
+    stale = []
+    for name in names:
+        files, tiles, index = tile_files(name, capacity, max_zoom)
+        out_dir = TILES_DIR / name
+
+        if check:
+            on_disk = {p.relative_to(out_dir).as_posix(): p.read_bytes()
+                       for p in out_dir.rglob("*.json")} if out_dir.exists() else {}
+            print(f"{name:<9} {'up to date' if on_disk == files else 'out of date'}")
+            if on_disk != files:
+                stale.append(name)
+            continue
+
+        if out_dir.exists():
+            shutil.rmtree(out_dir)  # tiles that no longer exist must not linger
+        for relative, data in files.items():
+            path = out_dir / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, data)
+
+        total = sum(len(data) for relative, data in files.items() if relative != "index.json")
+        largest = max(len(tile["events"]) for tile in tiles.values())
+        events = tiles[(0, 0)]["summary"]["count"]
+        print(f"{name:<9} {events:4d} events → {len(tiles)} tiles over {index['depth'] + 1} levels, "
+              f"≤{largest} events per tile, {total / 1024:.1f} KB")
+
+    if stale:
+        print(f"Out of date: {', '.join(stale)}; run scripts/build_tiles.py")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build level-of-detail tiles for the event timelines")
+    parser.add_argument("datasets", nargs="*", metavar="dataset",
+                        help=f"any of {', '.join(DATASETS)} (default: all)")
+    parser.add_argument("--capacity", type=int, default=CAPACITY,
+                        help=f"split tiles holding more events than this (default {CAPACITY})")
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM,
+                        help=f"deepest level to split to (default {MAX_ZOOM})")
+    parser.add_argument("--check", action="store_true",
+                        help="only report whether static/tiles is up to date (exit 1 if not)")
+    args = parser.parse_args()
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(sorted(unknown))}")
+    if args.capacity < 1:
+        parser.error("--capacity must be at least 1")
+    sys.exit(main(args.datasets or list(DATASETS), args.capacity, args.max_zoom, args.check))
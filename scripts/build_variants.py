@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Build responsive image variants for people / artworks / books.
+
+For every `image` path in people.json, artworks.json and books.json this writes
+static/images/<collection>/variants/<stem>-<size>.<ext> at each of VARIANT_SIZES
+(longest side, never upscaled) as JPEG and WebP, plus AVIF when Pillow can
+encode it. The source is the original in <collection>-original when present,
+otherwise the downsampled image itself.
+
+A manifest, src/lib/data/image-variants.json, maps each `image` path to its
+variants so the frontend can pick the smallest adequate asset:
+
+    "/images/people/plato.jpg": {
+        "width": 640, "height": 800,
+        "sources": {"avif": [{"width": 76, "height": 96, "src": "/images/people/variants/plato-96.avif"}, ...],
+                    "webp": [...], "jpeg": [...]}
+    }
+
+Regenerating a collection drops manifest entries and variant files for images
+it no longer lists. The variants and the manifest are build output (about four
+times the size of the images themselves, and AVIF depends on the Pillow build),
+so both are gitignored and made on the machine that deploys the site.
+
+Usage: python scripts/build_variants.py [people artworks books] [--force] [--jobs N] [--report PATH]
+"""
+
+import argparse
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image, features
+
+import instrument
+from downsample import IMAGES_DIR, resize_to_fit, write_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+STATIC_DIR = ROOT_DIR / "static"
+VARIANTS_MANIFEST = DATA_DIR / "image-variants.json"
+
+DATASETS = {"people": "people.json", "artworks": "artworks.json", "books": "books.json"}
+
+VARIANT_SIZES = (96, 240, 480, 800)
+
+# Smallest first, so <picture> can list them in order of preference
+ENCODERS = {
+    "avif": ("AVIF", {"quality": 55, "speed": 6}),
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+
+def available_formats():
+    """Formats this Pillow build can encode (AVIF needs Pillow >= 11.2 or pillow-avif-plugin)"""
+    formats = ["jpeg"]
+    if features.check("webp"):
+        formats.insert(0, "webp")
+    try:
+        import pillow_avif  # noqa: F401  (registers the AVIF plugin on older Pillow)
+    except ImportError:
+        pass
+    if "AVIF" in Image.SAVE or features.check("avif"):
+        formats.insert(0, "avif")
+    return formats
+
+def source_for(image_path, collection):
+    """Prefer the full-size original, fall back to the 800px derivative"""
+    name = Path(image_path).name
+    original = IMAGES_DIR / f"{collection}-original" / name
+    if original.exists():
+        return original
+    return STATIC_DIR / image_path.lstrip("/")
+
+def variant_path(image_path, size, fmt):
+    """/images/people/plato.jpg -> /images/people/variants/plato-96.webp"""
+    p = Path(image_path)
+    return str(p.parent / "variants" / f"{p.stem}-{size}.{EXTENSIONS[fmt]}")
+
+def variant_sizes(width, height):
+    """Bounding boxes to encode: VARIANT_SIZES, never upscaled (larger ones collapse onto the source)"""
+    longest = max(width, height)
+    return sorted({min(size, longest) for size in VARIANT_SIZES})
+
+def build_variants(image_path, source, formats, force=False):
+    """
+    Write every size/format variant of one image.
+
+    Returns (image_path, manifest entry or None, number of files written, error or None,
+             instrument record)
+    """
+    with instrument.item(image_path) as metrics:
+        result = _build_variants(image_path, source, formats, force)
+        metrics.status = "error" if result[3] else "saved" if result[2] else "skipped"
+    return (*result, metrics.to_dict())
+
+def _build_variants(image_path, source, formats, force):
+    try:
+        with instrument.phase("decode"):
+            img = Image.open(source)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+        width, height = img.size
+        source_mtime = os.path.getmtime(source)
+
+        entry = {"width": width, "height": height, "sources": {fmt: [] for fmt in formats}}
+        written = 0
+        for size in variant_sizes(width, height):
+            resized = None
+            for fmt in formats:
+                rel = variant_path(image_path, size, fmt)
+                out = STATIC_DIR / rel.lstrip("/")
+                if force or not out.exists() or os.path.getmtime(out) < source_mtime:
+                    if resized is None:
+                        with instrument.phase("resize"):
+                            resized = resize_to_fit(img, size)
+                    pil_format, options = ENCODERS[fmt]
+                    buf = io.BytesIO()
+                    with instrument.phase(f"encode_{fmt}"):
+                        resized.save(buf, pil_format, **options)
+                    instrument.count("bytes_out", buf.tell())
+                    with instrument.phase("write"):
+                        out.parent.mkdir(parents=True, exist_ok=True)
+                        write_atomic(out, buf.getvalue())
+                    written += 1
+                w, h = _fit_size(width, height, size)
+                entry["sources"][fmt].append({"width": w, "height": h, "src": rel})
+        return image_path, entry, written, None
+    except Exception as e:
+        return image_path, None, 0, str(e)
+
+def _fit_size(width, height, size):
+    """Dimensions resize_to_fit produces for a size x size bounding box"""
+    if width <= size and height <= size:
+        return width, height
+    if width > height:
+        return size, int((size / width) * height)
+    return int((size / height) * width), size
+
+def _process(task):
+    return build_variants(*task)
+
+def merge_manifest(manifest, collections, entries):
+    """
+    The manifest after rebuilding `collections`: their rows are replaced by
+    `entries`, so images no longer listed (or that failed) drop out; other
+    collections' rows are kept as they were.
+    """
+    rebuilt = tuple(f"/images/{collection}/" for collection in collections)
+    kept = {path: entry for path, entry in manifest.items() if not path.startswith(rebuilt)}
+    return {**kept, **entries}
+
+def stale_variants(manifest, collections):
+    """Files under the rebuilt collections' variants/ directories that no manifest entry lists"""
+    listed = {source["src"] for entry in manifest.values()
+              for sources in entry["sources"].values() for source in sources}
+    return [path for collection in collections
+            for path in sorted((IMAGES_DIR / collection / "variants").glob("*"))
+            if "/" + path.relative_to(STATIC_DIR).as_posix() not in listed]
+
+def main(collections, force=False, jobs=None):
+    formats = available_formats()
+    print(f"Formats: {', '.join(formats)}; sizes: {', '.join(map(str, VARIANT_SIZES))}")
+
+    try:
+        manifest = json.loads(VARIANTS_MANIFEST.read_text())
+    except FileNotFoundError:
+        manifest = {}
+
+    tasks = []
+    missing = []
+    for collection in collections:
+        records = json.loads((DATA_DIR / DATASETS[collection]).read_text())
+        for record in records:
+            image_path = record.get("image")
+            if not image_path:
+                continue
+            source = source_for(image_path, collection)
+            if source.exists():
+                tasks.append((image_path, source, formats, force))
+            else:
+                missing.append(image_path)
+
+    print(f"Building variants for {len(tasks)} images\n")
+    entries = {}
+    written = errors = 0
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        for image_path, entry, count, error, metrics in pool.map(_process, tasks, chunksize=4):
+            instrument.record(metrics)
+            if error:
+                print(f"  ✗ {image_path}: {error}")
+                errors += 1
+                continue
+            entries[image_path] = entry
+            written += count
+
+    manifest = merge_manifest(manifest, collections, entries)
+    stale = stale_variants(manifest, collections)
+    for path in stale:
+        path.unlink()
+    write_atomic(VARIANTS_MANIFEST, (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode())
+
+    print("=" * 50)
+    print("SUMMARY")
+    print("=" * 50)
+    print(f"Images: {len(tasks)} ({errors} errors), files written: {written}, stale files removed: {len(stale)}")
+    if missing:
+        print(f"\nNo source image for {len(missing)} entries:")
+        for image_path in missing:
+            print(f"  {image_path}")
+    print(f"\nManifest: {VARIANTS_MANIFEST.relative_to(ROOT_DIR)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build responsive image variants and their manifest")
+    parser.add_argument("collections", nargs="*", metavar="collection",
+                        help=f"any of {', '.join(DATASETS)} (default: all)")
+    parser.add_argument("--force", action="store_true", help="re-encode existing variants")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: CPU count)")
+    instrument.add_report_args(parser)
+    args = parser.parse_args()
+    unknown = set(args.collections) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown collection(s): {', '.join(sorted(unknown))}")
+    instrument.start_from_args("build_variants", args)
+    main(args.collections or list(DATASETS), force=args.force, jobs=args.jobs)
+    instrument.finish(args.slowest)
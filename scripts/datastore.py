@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+datastore.py
+Small data-store layer for the JSON datasets in src/lib/data.
+
+How it works
+------------
+1. Index          : records are kept in file order plus an id → record dict, so
+                    duplicate checks and lookups are O(1)
+2. Sorted insert  : datasets with a sort key (people by `born`, cosmic / humanity
+                    by `start`) insert with bisect after any equal keys - the same
+                    place list.sort() + append would put them; curated datasets
+                    (books, artworks) keep their order and append
+3. Bulk edits     : add_many() appends everything and sorts once, O(n log n)
+4. Format         : indent, \\u-escaping and trailing whitespace are sniffed from
+                    the file, so a rewrite only changes the records that changed
+5. Save           : the new text is compared with what is on disk and only written
+                    (atomically: temp file + rename) when it differs
+
+    people = Dataset.open("people")
+    people.add({"id": "curie", "name": "Marie Curie", "born": 1867, ...})
+    people.save()   # → True if people.json changed
+"""
+
+import bisect
+import json
+import os
+import pathlib
+import tempfile
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+
+
+def _year(field):
+    """Sort key on a year field; missing / null years sort as 0, as add_person always did."""
+    return lambda record: record.get(field, 0) or 0
+
+
+# name → (file, sort key or None for hand-curated order)
+DATASETS = {
+    "people":   ("people.json",   _year("born")),
+    "books":    ("books.json",    None),
+    "artworks": ("artworks.json", None),
+    "cosmic":   ("cosmic.json",   _year("start")),
+    "humanity": ("humanity.json", _year("start")),
+}
+
+
+def write_atomic(path, data: bytes):
+    """Write bytes to a temp file next to path, then rename it into place"""
+    path = pathlib.Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class Dataset:
+    """One JSON list of records with unique `id`s."""
+
+    def __init__(self, path, sort_key=None):
+        self.path = pathlib.Path(path)
+        self.sort_key = sort_key
+        try:
+            self._text = self.path.read_text()
+        except FileNotFoundError:
+            self._text = None
+        self.records = json.loads(self._text) if self._text else []
+        self._format = _sniff_format(self._text)
+
+        self.index = {}
+        for record in self.records:
+            if record["id"] in self.index:
+                raise ValueError(f"{self.path.name}: duplicate id '{record['id']}'")
+            self.index[record["id"]] = record
+        if sort_key:
+            self._keys = [sort_key(r) for r in self.records]
+            if any(a > b for a, b in zip(self._keys, self._keys[1:])):
+                self._resort()
+
+    @classmethod
+    def open(cls, name: str, path=None):
+        """Open a dataset by name; `path` points at another copy of the file."""
+        filename, sort_key = DATASETS[name]
+        return cls(path or DATA_DIR / filename, sort_key)
+
+    # ----------------------------------------------------------------------- #
+    # Reads
+    # ----------------------------------------------------------------------- #
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, record_id):
+        return record_id in self.index
+
+    def get(self, record_id, default=None):
+        return self.index.get(record_id, default)
+
+    # ----------------------------------------------------------------------- #
+    # Edits
+    # ----------------------------------------------------------------------- #
+    def add(self, record: dict) -> bool:
+        """Insert one record in sort order; False if its id already exists."""
+        if record["id"] in self.index:
+            return False
+        self.index[record["id"]] = record
+        if self.sort_key:
+            key = self.sort_key(record)
+            pos = bisect.bisect_right(self._keys, key)
+            self._keys.insert(pos, key)
+            self.records.insert(pos, record)
+        else:
+            self.records.append(record)
+        return True
+
+    def add_many(self, records) -> list[dict]:
+        """Add records in bulk with a single sort; returns the ones skipped as duplicates."""
+        skipped = []
+        for record in records:
+            if record["id"] in self.index:
+                skipped.append(record)
+                continue
+            self.index[record["id"]] = record
+            self.records.append(record)
+        if self.sort_key:
+            self._resort()
+        return skipped
+
+    def update(self, record_id, **fields) -> dict:
+        """Change fields of one record, moving it if its sort key changed."""
+        record = self.index[record_id]
+        if not self.sort_key:
+            record.update(fields)
+            return record
+        old_key = self.sort_key(record)
+        record.update(fields)
+        if self.sort_key(record) != old_key:
+            pos = self._position(record, old_key)
+            del self._keys[pos]
+            del self.records[pos]
+            del self.index[record_id]
+            self.add(record)
+        return record
+
+    def update_many(self, changes: dict) -> None:
+        """Apply {id: {field: value}} in bulk with a single sort."""
+        for record_id, fields in changes.items():
+            self.index[record_id].update(fields)
+        if self.sort_key:
+            self._resort()
+
+    def remove(self, record_id) -> dict:
+        record = self.index.pop(record_id)
+        if self.sort_key:
+            pos = self._position(record, self.sort_key(record))
+            del self._keys[pos]
+            del self.records[pos]
+        else:
+            self.records.remove(record)
+        return record
+
+    def _position(self, record, key) -> int:
+        """Index of `record` among the records sharing sort key `key`."""
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_right(self._keys, key)
+        for pos in range(lo, hi):
+            if self.records[pos] is record:
+                return pos
+        raise ValueError(f"{record['id']} is not at its sort position")
+
+    def _resort(self):
+        self.records.sort(key=self.sort_key)  # stable: equal keys keep file order
+        self._keys = [self.sort_key(r) for r in self.records]
+
+    # ----------------------------------------------------------------------- #
+    # Save
+    # ----------------------------------------------------------------------- #
+    def dumps(self) -> str:
+        indent, ensure_ascii, tail = self._format
+        return json.dumps(self.records, indent=indent, ensure_ascii=ensure_ascii) + tail
+
+    def save(self) -> bool:
+        """Write the file atomically if its content changed; True if written."""
+        text = self.dumps()
+        if text == self._text:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, text.encode())
+        self._text = text
+        return True
+
+
+def _sniff_format(text: str | None):
+    """(indent, ensure_ascii, trailing whitespace) as used by an existing file."""
+    if not text:
+        return 2, True, "\n"
+    lines = text.splitlines()
+    second = lines[1] if len(lines) > 1 else ""
+    indent = (len(second) - len(second.lstrip(" "))) or 2
+    # Files holding raw non-ASCII characters were not written with ensure_ascii
+    ensure_ascii = text.isascii()
+    return indent, ensure_ascii, text[len(text.rstrip()):]
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Script to downsample images from static/images/<collection>-original to static/images/<collection>.
+Target: < 1MB per image while maintaining quality
+
+Images are processed in parallel on a process pool sized to the CPU count;
+each worker returns its log lines so output is still printed in file order.
+JPEG quality is binary-searched on in-memory buffers and only the final bytes
+are written (atomically) to disk.
+
+A manifest (scripts/manifests/<collection>.json) records, per derivative, the
+source content hash, the processing parameters and the output hash. Only
+entries whose source, parameters or output changed are rebuilt, and outputs
+with no source are reported as orphans.
+
+Each worker also times decode / resize / encode / write per image (instrument.py);
+`--report PATH` writes them as JSON lines, and the slowest images are listed.
+
+Usage: python scripts/downsample.py {people,artworks,books} [--force] [--jobs N]
+                                    [--max-dimension PX] [--target-mb MB] [--report PATH]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image
+
+import instrument
+from datastore import write_atomic
+
+COLLECTIONS = ("people", "artworks", "books")
+IMAGES_DIR = Path(__file__).parent.parent / "static" / "images"
+MANIFEST_DIR = Path(__file__).parent / "manifests"
+
+# Bump when the encoding pipeline changes so every derivative is rebuilt
+PIPELINE_VERSION = 1
+
+TARGET_SIZE_MB = 1.0
+MAX_DIMENSION = 800
+
+# Quality search grid: 85, 80, ... 25
+MAX_QUALITY = 85
+MIN_QUALITY = 25
+QUALITY_STEP = 5
+
+def get_file_size_mb(filepath):
+    """Get file size in MB"""
+    return os.path.getsize(filepath) / (1024 * 1024)
+
+def file_sha256(filepath):
+    """Hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def resize_to_fit(img, max_dimension=MAX_DIMENSION):
+    """LANCZOS-resize img so neither side exceeds max_dimension, keeping aspect ratio"""
+    width, height = img.size
+    if width <= max_dimension and height <= max_dimension:
+        return img
+    if width > height:
+        new_width = max_dimension
+        new_height = int((max_dimension / width) * height)
+    else:
+        new_height = max_dimension
+        new_width = int((max_dimension / height) * width)
+    return img.resize((new_width, new_height), Image.LANCZOS)
+
+def encode_jpeg(img, quality):
+    """Encode img as JPEG into memory and return the bytes"""
+    buf = io.BytesIO()
+    img.save(buf, 'JPEG', quality=quality, optimize=True)
+    return buf.getvalue()
+
+def find_quality(img, target_bytes, lo=MIN_QUALITY, hi=MAX_QUALITY, step=QUALITY_STEP):
+    """
+    Binary-search the highest JPEG quality whose encoding fits in target_bytes.
+
+    Candidates are hi, hi - step, ... lo (the same grid the old linear loop
+    walked), so the chosen quality matches it in at most ~5 encodes instead
+    of up to 13. Returns (quality, data, passes); falls back to `lo` if
+    nothing fits.
+    """
+    qualities = list(range(hi, lo - 1, -step))  # descending
+    encoded = {}
+
+    def fits(q):
+        if q not in encoded:
+            encoded[q] = encode_jpeg(img, q)
+        return len(encoded[q]) <= target_bytes
+
+    # Most images fit at the top quality straight away
+    best = qualities[-1]
+    if fits(qualities[0]):
+        best = qualities[0]
+    else:
+        # qualities[i] fits for every i >= some boundary; find the smallest such i
+        left, right = 1, len(qualities) - 1
+        while left <= right:
+            mid = (left + right) // 2
+            if fits(qualities[mid]):
+                best = qualities[mid]
+                right = mid - 1
+            else:
+                left = mid + 1
+    if best not in encoded:
+        fits(best)
+    return best, encoded[best], len(encoded)
+
+def downsample_image(input_path, output_path, target_size_mb=TARGET_SIZE_MB, max_dimension=MAX_DIMENSION):
+    """
+    Downsample an image to be under target_size_mb
+
+    Args:
+        input_path: Path to input image
+        output_path: Path to save downsampled image
+        target_size_mb: Target size in MB (default 1.0)
+        max_dimension: Maximum width or height (default 800px)
+
+    Returns:
+        (log lines for the parent process to print, SHA-256 of the output or None on error,
+         instrument record with decode/resize/encode/write timings)
+    """
+    log = [f"Processing: {input_path.name}"]
+    digest = None
+    with instrument.item(input_path.name) as metrics:
+        metrics.status = "error"
+        try:
+            digest = _downsample(input_path, output_path, target_size_mb, max_dimension, log)
+            metrics.status = "saved"
+        except Exception as e:
+            log.append(f"  ✗ Error processing {input_path.name}: {e}")
+    return log, digest, metrics.to_dict()
+
+def _downsample(input_path, output_path, target_size_mb, max_dimension, log):
+    """Body of downsample_image; returns the output's SHA-256"""
+    # Open image
+    with instrument.phase("decode"):
+        img = Image.open(input_path)
+        img.load()
+
+        # Convert RGBA to RGB if necessary
+        if img.mode == 'RGBA':
+            img = img.convert('RGB')
+
+    # Get original dimensions
+    width, height = img.size
+    original_size_mb = get_file_size_mb(input_path)
+    instrument.count("bytes_in", input_path.stat().st_size)
+
+    log.append(f"  Original: {width}x{height}, {original_size_mb:.2f}MB")
+
+    # Resize if larger than max_dimension
+    with instrument.phase("resize"):
+        img = resize_to_fit(img, max_dimension)
+    if img.size != (width, height):
+        log.append(f"  Resized to: {img.width}x{img.height}")
+
+    # Highest quality (85 down to 25) that fits, searched in memory
+    target_bytes = int(target_size_mb * 1024 * 1024)
+    with instrument.phase("encode"):
+        quality, data, passes = find_quality(img, target_bytes)
+    instrument.count("encode_passes", passes)
+    instrument.count("bytes_out", len(data))
+    with instrument.phase("write"):
+        write_atomic(output_path, data)
+    digest = hashlib.sha256(data).hexdigest()
+
+    final_size_mb = len(data) / (1024 * 1024)
+    log.append(f"  Saved: {quality}% quality, {final_size_mb:.2f}MB ({passes} encode passes)")
+    reduction = ((original_size_mb - final_size_mb) / original_size_mb) * 100
+    log.append(f"  ✓ Reduced by {reduction:.1f}%")
+    return digest
+
+def _process(task):
+    """Pool entry point: unpack (input, output, target_size_mb, max_dimension) and downsample."""
+    return downsample_image(*task)
+
+# --------------------------------------------------------------------------- #
+# Manifest
+# --------------------------------------------------------------------------- #
+def load_manifest(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+
+def save_manifest(path, manifest):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode())
+
+def _stat_key(filepath):
+    st = os.stat(filepath)
+    return [st.st_size, st.st_mtime_ns]
+
+def cached_sha256(filepath, entry, field):
+    """
+    Hash filepath, reusing entry[field] when size and mtime are unchanged,
+    so an up-to-date tree is checked without re-reading every image.
+    """
+    stat = _stat_key(filepath)
+    if entry and entry.get(f"{field}_stat") == stat and entry.get(field):
+        return entry[field], stat
+    return file_sha256(filepath), stat
+
+def stale_reason(entry, source_path, output_path, params):
+    """Return why output_path must be rebuilt, or None if it is up to date"""
+    if not entry:
+        return "new"
+    if not output_path.exists():
+        return "output missing"
+    if entry.get("params") != params:
+        return "settings changed"
+    source_hash, source_stat = cached_sha256(source_path, entry, "source_sha256")
+    if source_hash != entry.get("source_sha256"):
+        return "source changed"
+    output_hash, output_stat = cached_sha256(output_path, entry, "output_sha256")
+    if output_hash != entry.get("output_sha256"):
+        return "output modified"
+    # Same content, maybe a new mtime: remember it so the next run skips hashing
+    entry["source_sha256_stat"] = source_stat
+    entry["output_sha256_stat"] = output_stat
+    return None
+
+def main(collection, force=False, jobs=None, target_size_mb=TARGET_SIZE_MB,
+         max_dimension=MAX_DIMENSION):
+    # Set up paths
+    source_dir = IMAGES_DIR / f"{collection}-original"
+    downsampled_dir = IMAGES_DIR / collection
+    manifest_path = MANIFEST_DIR / f"{collection}.json"
+
+    # Create output directory if it doesn't exist
+    downsampled_dir.mkdir(exist_ok=True)
+
+    # Get all jpg files in the originals directory
+    image_files = sorted(source_dir.glob("*.jpg"))
+
+    if not image_files:
+        print(f"No JPG files found in {source_dir.name} directory")
+        return
+
+    params = {
+        "max_dimension": max_dimension,
+        "target_size_mb": target_size_mb,
+        "pipeline": PIPELINE_VERSION,
+    }
+    manifest = load_manifest(manifest_path)
+
+    # Rebuild only derivatives whose source, settings or output changed
+    files_to_process = []
+    skipped_files = []
+
+    for img_path in image_files:
+        output_path = downsampled_dir / img_path.name
+        reason = "forced" if force else stale_reason(
+            manifest.get(img_path.name), img_path, output_path, params)
+        if reason:
+            files_to_process.append((img_path, reason))
+        else:
+            skipped_files.append(img_path.name)
+
+    # Outputs with no original, and manifest rows whose original disappeared
+    sources = {f.name for f in image_files}
+    orphans = sorted(p.name for p in downsampled_dir.glob("*.jpg") if p.name not in sources)
+    for name in [n for n in manifest if n not in sources]:
+        del manifest[name]
+
+    print(f"Found {len(image_files)} images total")
+    print(f"Skipping {len(skipped_files)} up-to-date images")
+    print(f"Processing {len(files_to_process)} new or stale images\n")
+
+    if skipped_files:
+        print("Skipped files:")
+        for name in skipped_files:
+            print(f"  ✓ {name}")
+        print()
+
+    if orphans:
+        print(f"Orphaned outputs with no original ({len(orphans)}):")
+        for name in orphans:
+            print(f"  ? {name}")
+        print()
+
+    if not files_to_process:
+        save_manifest(manifest_path, manifest)
+        print("No new images to process!")
+        return
+
+    # Process images in parallel; map() yields results in submission order
+    tasks = [(img_path, downsampled_dir / img_path.name, target_size_mb, max_dimension)
+             for img_path, _ in files_to_process]
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        results = pool.map(_process, tasks, chunksize=1)
+        for (img_path, reason), (log, digest, metrics) in zip(files_to_process, results):
+            log[0] += f" ({reason})"
+            print("\n".join(log))
+            print()
+            instrument.record(metrics)
+            if digest is None:
+                manifest.pop(img_path.name, None)
+                continue
+            source_hash, source_stat = cached_sha256(img_path, None, "source_sha256")
+            manifest[img_path.name] = {
+                "params": params,
+                "source_sha256": source_hash,
+                "source_sha256_stat": source_stat,
+                "output_sha256": digest,
+                "output_sha256_stat": _stat_key(downsampled_dir / img_path.name),
+            }
+    save_manifest(manifest_path, manifest)
+    files_to_process = [img_path for img_path, _ in files_to_process]
+
+    # Summary
+    print("=" * 50)
+    print("SUMMARY")
+    print("=" * 50)
+
+    processed = [f for f in files_to_process if (downsampled_dir / f.name).exists()]
+    total_original = sum(get_file_size_mb(f) for f in processed)
+    total_downsampled = sum(get_file_size_mb(downsampled_dir / f.name) for f in processed)
+
+    print(f"Processed {len(files_to_process)} images")
+    print(f"Total original size: {total_original:.2f}MB")
+    print(f"Total downsampled size: {total_downsampled:.2f}MB")
+    if total_original:
+        print(f"Total reduction: {((total_original - total_downsampled) / total_original) * 100:.1f}%")
+
+    # Check for any files over 1MB
+    large_files = []
+    for img_path in processed:
+        output_path = downsampled_dir / img_path.name
+        size = get_file_size_mb(output_path)
+        if size > target_size_mb:
+            large_files.append((img_path.name, size))
+
+    if large_files:
+        print(f"\nFiles still over {target_size_mb:g}MB ({len(large_files)}):")
+        for name, size in large_files:
+            print(f"  {name}: {size:.2f}MB")
+    else:
+        print(f"\n✓ All processed files are under {target_size_mb:g}MB!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Downsample <collection>-original images")
+    parser.add_argument("collection", choices=COLLECTIONS)
+    parser.add_argument("--force", action="store_true",
+                        help="reprocess every image, even if the manifest says it is up to date")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-dimension", type=int, default=MAX_DIMENSION,
+                        help=f"maximum width or height in px (default {MAX_DIMENSION})")
+    parser.add_argument("--target-mb", type=float, default=TARGET_SIZE_MB,
+                        help=f"size budget per image in MB (default {TARGET_SIZE_MB})")
+    instrument.add_report_args(parser)
+    args = parser.parse_args()
+    instrument.start_from_args("downsample", args)
+    main(args.collection, force=args.force, jobs=args.jobs,
+         target_size_mb=args.target_mb, max_dimension=args.max_dimension)
+    instrument.finish(args.slowest)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+enrich_people.py
+Check people.json's born / died / gender against Wikidata, in bulk.
+
+How it works
+------------
+1. Wikipedia API  : every name (via fetch_portraits.OVERRIDE_LOOKUP) → Q-id, 50 per request
+2. Wikidata API   : P569 / P570 / P21 for 50 Q-ids per request (wikimedia.person_facts)
+3. Compare        : each field is "missing" (empty here, known on Wikidata), "conflict",
+                    "approx" (differs, but only within Wikidata's decade / century
+                    precision) or matches; names without a Q-id are "unresolved"
+4. Fill           : with --fill, missing values are written back (year-precise ones
+                    only) through datastore.Dataset: one sort, one atomic write
+
+Years are signed ints as in people.json (-469 = 469 BC); Wikidata uses the same
+numbering, with no year 0.
+
+Usage: python scripts/enrich_people.py [--fill] [--output diff.json]
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+
+from datastore import Dataset
+from fetch_engine import FetchEngine
+from fetch_portraits import OVERRIDE_LOOKUP
+from http_cache import add_cache_args, cache_from_args
+from wikimedia import PRECISION_YEAR, person_facts, resolve_qids
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent
+PEOPLE_JSON = ROOT_DIR / "src" / "lib" / "data" / "people.json"
+
+FIELDS = ("born", "died", "gender")
+
+# Years of slack allowed by a Wikidata precision coarser than a year
+TOLERANCE = {8: 10, 7: 100, 6: 1000}
+
+
+def compare(person: dict, fact: dict) -> list[dict]:
+    """Return the differences between one people.json record and its Wikidata facts."""
+    rows = []
+    for field in FIELDS:
+        ours, theirs = person.get(field), fact.get(field)
+        if theirs is None or ours == theirs:
+            continue
+        precision = fact["precision"].get(field, PRECISION_YEAR) if field != "gender" else PRECISION_YEAR
+        if ours is None:
+            status = "missing"
+        elif precision < PRECISION_YEAR and abs(ours - theirs) <= TOLERANCE.get(precision, 1000):
+            status = "approx"
+        else:
+            status = "conflict"
+        rows.append({"id": person["id"], "name": person["name"], "field": field,
+                     "people_json": ours, "wikidata": theirs, "precision": precision,
+                     "status": status})
+    return rows
+
+
+def main(json_path=PEOPLE_JSON, fill=False, output=None, cache=None):
+    people = Dataset.open("people", json_path)
+    engine = FetchEngine(cache=cache)
+
+    qids = engine.call(resolve_qids(engine, [p["name"] for p in people], OVERRIDE_LOOKUP))
+    facts = engine.call(person_facts(engine, qids.values()))
+
+    unresolved = [p["name"] for p in people if not qids.get(p["name"])]
+    rows = []
+    for person in people:
+        fact = facts.get(qids.get(person["name"]))
+        if fact:
+            rows.extend({**row, "qid": qids[person["name"]]} for row in compare(person, fact))
+
+    order = {"conflict": 0, "missing": 1, "approx": 2}
+    rows.sort(key=lambda r: (order[r["status"]], r["name"], r["field"]))
+    for row in rows:
+        note = f" (precision {row['precision']})" if row["precision"] < PRECISION_YEAR else ""
+        print(f"  {row['status']:<9} {row['name']:<35} {row['field']:<7} "
+              f"{row['people_json']!s:>6} → {row['wikidata']!s:<6} {row['qid']}{note}")
+    for name in unresolved:
+        print(f"  unresolved {name}")
+
+    counts = {s: sum(r["status"] == s for r in rows) for s in order}
+    print(f"\n{len(people)} people: {counts['conflict']} conflicts, {counts['missing']} missing, "
+          f"{counts['approx']} approximate, {len(unresolved)} unresolved.")
+
+    if output:
+        output.write_text(json.dumps({"differences": rows, "unresolved": unresolved}, indent=2) + "\n")
+        print(f"Report: {output}")
+
+    if fill:
+        filled = [r for r in rows if r["status"] == "missing" and r["precision"] >= PRECISION_YEAR]
+        changes = {}
+        for row in filled:
+            changes.setdefault(row["id"], {})[row["field"]] = row["wikidata"]
+        people.update_many(changes)
+        people.save()
+        print(f"Filled {len(filled)} missing values in {json_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare people.json with Wikidata birth/death/gender")
+    parser.add_argument("--json", type=pathlib.Path, default=PEOPLE_JSON, help="people.json to check")
+    parser.add_argument("--fill", action="store_true",
+                        help="write missing values (year precision only) back to people.json")
+    parser.add_argument("--output", type=pathlib.Path, help="also write the differences as JSON")
+    add_cache_args(parser)
+    args = parser.parse_args()
+    if not args.json.exists():
+        sys.exit(f"{args.json} not found.")
+    main(args.json, args.fill, args.output, cache_from_args(args))
@@ -12,27 +12,25 @@ Sources
 Author: Shrine Timeline project
 """
 
+import argparse
+import asyncio
 import json
-import os
 import pathlib
-import time
-from urllib.parse import quote, urlencode
 
-import requests
 from tqdm import tqdm
 
+import instrument
+from fetch_engine import FetchEngine
+from http_cache import add_cache_args, cache_from_args
+from replay import add_replay_args, transport_from_args
+from wikimedia import resolve_images, save_p18_image
+
 # --------------------------------------------------------------------------- #
 # Config
 # --------------------------------------------------------------------------- #
-HEADERS = {"User-Agent": "TimelineBot/0.2 (https://github.com/timeline)"}
-
 OPENLIB_SEARCH = "https://openlibrary.org/search.json"
 OPENLIB_COVER  = "https://covers.openlibrary.org/b/id/{id}-L.jpg"   # L = ~600 px tall
 
-WIKI_API      = "https://en.wikipedia.org/w/api.php"
-WIKIDATA_API  = "https://www.wikidata.org/wiki/Special:EntityData/{}.json"
-COMMONS_FILE  = "https://commons.wikimedia.org/wiki/Special:FilePath/{}"
-
 # Manual last-resort images (URL → local filename)
 URL_OVERRIDES = {
     "Plato's Dialogues": "https://upload.wikimedia.org/wikipedia/commons/thumb/5/57/Platon_Complete_Works_1903.jpg/512px-Platon_Complete_Works_1903.jpg",
@@ -40,49 +38,13 @@ URL_OVERRIDES = {
 }
 
 # --------------------------------------------------------------------------- #
-# Helper functions (re-use from your portrait script + a few new ones)
+# Helper functions (Wikimedia side lives in wikimedia.py)
 # --------------------------------------------------------------------------- #
-def wikipedia_to_qid(title: str) -> str | None:
-    params = {
-        "action": "query",
-        "format": "json",
-        "titles": title,
-        "prop": "pageprops",
-        "redirects": 1,
-    }
-    r = requests.get(WIKI_API, params=params, headers=HEADERS, timeout=15)
-    r.raise_for_status()
-    pages = r.json()["query"]["pages"].values()
-    for page in pages:
-        return page.get("pageprops", {}).get("wikibase_item")
-    return None
-
-
-def qid_to_image_filename(qid: str) -> str | None:
-    r = requests.get(WIKIDATA_API.format(qid), headers=HEADERS, timeout=15)
-    r.raise_for_status()
-    entity = r.json()["entities"][qid]
-    claims = entity["claims"]
-    if "P18" not in claims:
-        return None
-    return claims["P18"][0]["mainsnak"]["datavalue"]["value"]
-
-
-def download_commons_file(filename: str, dest_path: pathlib.Path) -> bool:
-    if dest_path.exists():
-        return False
-    fname = filename.replace(" ", "_")
-    safe = "_().'-"
-    url = COMMONS_FILE.format(quote(fname, safe=safe))
-    return _stream_to_file(url, dest_path)
-
-
-def openlibrary_cover(title: str, author: str) -> str | None:
+async def openlibrary_cover(engine: FetchEngine, title: str, author: str) -> str | None:
     """Return full cover URL or None."""
     params = {"title": title, "author": author, "limit": 1}
-    r = requests.get(OPENLIB_SEARCH, params=params, headers=HEADERS, timeout=15)
-    r.raise_for_status()
-    docs = r.json().get("docs")
+    data = await engine.get_json(OPENLIB_SEARCH, params=params)
+    docs = data.get("docs")
     if not docs:
         return None
     cover_id = docs[0].get("cover_i")
@@ -91,78 +53,79 @@ def openlibrary_cover(title: str, author: str) -> str | None:
     return None
 
 
-def _stream_to_file(url: str, dest_path: pathlib.Path) -> bool:
-    with requests.get(url, headers=HEADERS, stream=True, timeout=30) as r:
-        r.raise_for_status()
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(dest_path, "wb") as fp:
-            for chunk in r.iter_content(chunk_size=8192):
-                fp.write(chunk)
-    return True
+async def openlibrary_covers(engine: FetchEngine, books: list[dict]) -> dict:
+    """{title: cover URL or None} for every book, looked up concurrently."""
+    async def one(book):
+        try:
+            return await openlibrary_cover(engine, book["title"], book["author"])
+        except Exception as e:
+            tqdm.write(f"⚠️  OpenLibrary failed for {book['title']}: {e}")
+            return None
+
+    urls = await asyncio.gather(*(one(b) for b in books))
+    return {b["title"]: url for b, url in zip(books, urls)}
+
+
+async def fetch_cover(engine: FetchEngine, book: dict, cover_url: str | None,
+                      qid: str | None, filename: str | None) -> str:
+    title = book["title"]
+    outpath = pathlib.Path("." + book["image"])  # strip leading slash
+
+    # 1) Manual override (looked up in main)
+    if title in URL_OVERRIDES:
+        return "saved" if await engine.download(URL_OVERRIDES[title], outpath) else "skipped"
+
+    # 2) Open Library (looked up in main)
+    if cover_url:
+        try:
+            return "saved" if await engine.download(cover_url, outpath) else "skipped"
+        except Exception as e:
+            tqdm.write(f"⚠️  OpenLibrary failed for {title}: {e}")
+        # main only resolved books without a cover; this one needs its own lookup
+        qids, images = await resolve_images(engine, [title])
+        qid = qids.get(title)
+        filename = images.get(qid)
+
+    # 3) Fallback: Wikipedia → Wikidata → P18
+    return await save_p18_image(engine, title, qid, filename, outpath)
 
 # --------------------------------------------------------------------------- #
 # Main
 # --------------------------------------------------------------------------- #
-def main(json_path="books.json"):
+def main(json_path="books.json", cache=None, transport=None):
     books = json.loads(pathlib.Path(json_path).read_text())
-    saved, skipped, err = 0, 0, 0
-
-    for book in tqdm(books, unit="book"):
-        title   = book["title"]
-        author  = book["author"]
-        outpath = pathlib.Path("." + book["image"])  # strip leading slash
-
-        # 1) Manual override?
-        if title in URL_OVERRIDES:
-            try:
-                if _stream_to_file(URL_OVERRIDES[title], outpath):
-                    saved += 1
-                else:
-                    skipped += 1
-                continue
-            except Exception as e:
-                tqdm.write(f"❌ {title}: {e}")
-                err += 1
-                continue
-
-        # 2) Try Open Library
-        try:
-            cover_url = openlibrary_cover(title, author)
-            if cover_url:
-                if _stream_to_file(cover_url, outpath):
-                    saved += 1
-                else:
-                    skipped += 1
-                time.sleep(0.2)
-                continue  # success
-        except Exception as e:
-            tqdm.write(f"⚠️  OpenLibrary failed for {title}: {e}")
+    engine = FetchEngine(cache=cache, transport=transport)
 
-        # 3) Fallback: Wikipedia → Wikidata → P18
-        try:
-            qid = wikipedia_to_qid(title)
-            if not qid:
-                tqdm.write(f"⚠️  {title}: no Wikidata Q-id");  err += 1;  continue
-
-            filename = qid_to_image_filename(qid)
-            if not filename:
-                tqdm.write(f"⚠️  {title}: no P18 image");       err += 1;  continue
-
-            if download_commons_file(filename, outpath):
-                saved += 1
-            else:
-                skipped += 1
-        except Exception as e:
-            tqdm.write(f"❌ {title}: {e}")
-            err += 1
+    covers = dict(URL_OVERRIDES)
+    covers.update(engine.call(openlibrary_covers(
+        engine, [b for b in books if b["title"] not in URL_OVERRIDES])))
 
-        time.sleep(0.3)  # gentle on APIs
+    # Only books Open Library had no cover for need the Wikimedia fallback: one
+    # batched Wikipedia + one Wikidata request for all of them
+    titles = [b["title"] for b in books if not covers.get(b["title"])]
+    qids, images = engine.call(resolve_images(engine, titles)) if titles else ({}, {})
 
-    print(f"\nDone: {saved} downloaded, {skipped} skipped, {err} errors.")
+    async def worker(engine, book):
+        qid = qids.get(book["title"])
+        return await fetch_cover(engine, book, covers.get(book["title"]), qid, images.get(qid))
+
+    engine.run(books, worker, unit="book", label=lambda b: b["title"])
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download book covers for books.json")
+    add_cache_args(parser)
+    add_replay_args(parser)
+    instrument.add_report_args(parser)
+    args = parser.parse_args()
+    instrument.start_from_args("fetch_book_covers", args)
+
     if not pathlib.Path("books.json").exists():
         raise SystemExit("books.json not found in current directory.")
-    main()
-
+    cache = cache_from_args(args)
+    try:
+        main(cache=cache, transport=transport_from_args(args))
+    finally:
+        if cache:
+            cache.close()
+    instrument.finish(args.slowest)
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+fetch_engine.py
+Concurrent fetch engine shared by fetch_portraits / fetch_artworks / fetch_book_covers.
+
+How it works
+------------
+1. Session        : one pooled requests.Session, so connections stay alive between items
+2. Per-host cap   : an asyncio.Semaphore bounds the in-flight requests for every host
+3. Token bucket   : each API gets its own requests/second budget instead of a fixed sleep;
+                    the budget adapts (halved on 429/503/maxlag, ramped back up while
+                    responses are healthy) and pauses the host for Retry-After
+4. Retries        : throttled responses and dropped connections are retried with
+                    exponential backoff + jitter; API calls send MediaWiki `maxlag`
+5. Event loop     : blocking requests calls run in worker threads via asyncio.to_thread
+6. Cache          : an optional http_cache.MetadataCache is carried on the engine for
+                    the lookup layer, and lets downloads re-validate with ETags
+7. Downloads      : bodies stream into <name>.part (resumed with Range/If-Range after
+                    an interruption), are checked for Content-Type, Content-Length and
+                    a decode probe, and only then renamed onto the final path
+
+A script hands `FetchEngine.run` its list of items and an async worker that
+returns "saved", "skipped" or "error"; the engine drives the tqdm bar and
+prints the usual saved/skipped/error summary plus the throttled/retried/failed
+request counters in `engine.stats`. Each item is also an instrument.item, with
+"queue" (host slot + token bucket), "network" and "backoff" phases and a "bytes"
+counter for the run report.
+"""
+
+import asyncio
+import json
+import os
+import pathlib
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+
+import instrument
+
+HEADERS = {"User-Agent": "TimelineBot/0.2 (https://github.com/timeline)"}
+
+# In-flight requests allowed per host
+MAX_PER_HOST = 4
+
+# Sustained requests/second per API host; anything else gets DEFAULT_RATE
+RATE_LIMITS = {
+    "en.wikipedia.org":       10.0,
+    "www.wikidata.org":       10.0,
+    "commons.wikimedia.org":   5.0,
+    "upload.wikimedia.org":    5.0,
+    "openlibrary.org":         3.0,
+    "covers.openlibrary.org":  5.0,
+}
+DEFAULT_RATE = 5.0
+
+# Adaptive rate: throttling multiplies the rate by BACKOFF_FACTOR (never below
+# MIN_RATE); every healthy response adds RAMP_STEP x the configured rate back
+MIN_RATE = 0.5
+BACKOFF_FACTOR = 0.5
+RAMP_STEP = 0.05
+
+# Retries for throttled (429/503/maxlag) and transient (502/504, dropped connection) failures
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+BACKOFF_BASE = 1.0   # seconds, doubled per attempt
+BACKOFF_MAX = 60.0
+
+# Ask MediaWiki to refuse API requests while replication lag exceeds this (seconds)
+MAXLAG = 5
+
+# Download streaming
+CHUNK_SIZE = 256 * 1024
+ACCEPT_TYPES = ("image/",)
+
+
+class DownloadError(Exception):
+    """A download finished but failed validation (type, length or decode)."""
+
+
+class RetryableError(Exception):
+    """A transient failure worth retrying; `throttled` means the server asked us to slow down."""
+
+    def __init__(self, message: str, retry_after: float | None = None, throttled: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+def probe_image(path: pathlib.Path):
+    """Raise if `path` is not a decodable image (skipped when Pillow is missing)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return
+    with Image.open(path) as img:
+        img.verify()
+
+
+# --------------------------------------------------------------------------- #
+# Rate limiting
+# --------------------------------------------------------------------------- #
+class TokenBucket:
+    """
+    Token bucket with an adaptive rate (AIMD): `rate` tokens/second, bursts up
+    to `capacity`. `throttle()` cuts the rate and can pause the bucket outright
+    (Retry-After); `recover()` climbs back towards the configured rate.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, min_rate: float = MIN_RATE):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self, pause: float = 0.0):
+        """Server pushed back: cut the rate, drop the burst and pause for `pause` seconds."""
+        self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def recover(self):
+        """Healthy response: ramp back up additively, capped at the configured rate."""
+        self.rate = min(self.max_rate, self.rate + self.max_rate * RAMP_STEP)
+
+
+# --------------------------------------------------------------------------- #
+# Engine
+# --------------------------------------------------------------------------- #
+class FetchEngine:
+    """Pooled HTTP session + per-host concurrency caps + per-API token buckets."""
+
+    def __init__(self, headers=HEADERS, max_per_host=MAX_PER_HOST, rate_limits=None,
+                 cache=None, chunk_size=CHUNK_SIZE, accept_types=ACCEPT_TYPES,
+                 max_retries=MAX_RETRIES, maxlag=MAXLAG, transport=None):
+        self.cache = cache
+        self.max_retries = max_retries
+        self.maxlag = maxlag
+        self.stats = Counter()  # requests / throttled / retried / failed
+        self.chunk_size = chunk_size
+        self.accept_types = tuple(accept_types)
+        self.max_per_host = max_per_host
+        self.rate_limits = {**RATE_LIMITS, **(rate_limits or {})}
+        self._hosts = {}
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        # Pool must hold at least max_per_host sockets, or urllib3 drops keep-alives.
+        # `transport` swaps in another adapter, e.g. replay.CassetteAdapter for offline runs
+        self.transport = transport
+        adapter = transport or HTTPAdapter(pool_connections=len(self.rate_limits) + 4,
+                                           pool_maxsize=max_per_host * 2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _limits(self, url: str):
+        """Return (semaphore, token bucket) for the host of `url`."""
+        host = urlsplit(url).hostname or ""
+        if host not in self._hosts:
+            rate = self.rate_limits.get(host, DEFAULT_RATE)
+            self._hosts[host] = (asyncio.Semaphore(self.max_per_host), TokenBucket(rate))
+        return self._hosts[host]
+
+    async def _with_retries(self, url: str, fn, *args):
+        """
+        Run the blocking `fn(*args)` in a worker thread under the host's limits,
+        retrying RetryableError and connection failures with exponential backoff.
+
+        Throttling (429/503/maxlag) also slows the whole host down via its
+        bucket; any other success lets the bucket ramp back up.
+        """
+        sem, bucket = self._limits(url)
+        for attempt in range(self.max_retries + 1):
+            queued = time.perf_counter()
+            async with sem:
+                await bucket.acquire()
+                instrument.add_time("queue", time.perf_counter() - queued)
+                self.stats["requests"] += 1
+                try:
+                    with instrument.phase("network"):
+                        result = await asyncio.to_thread(fn, *args)
+                except (RetryableError, requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    error = e
+                except Exception:
+                    self.stats["failed"] += 1
+                    raise
+                else:
+                    bucket.recover()
+                    return result
+
+            retry_after = getattr(error, "retry_after", None)
+            if getattr(error, "throttled", False):
+                self.stats["throttled"] += 1
+                instrument.count("throttled")
+                bucket.throttle(retry_after or 0.0)
+            if attempt == self.max_retries:
+                break
+            self.stats["retried"] += 1
+            instrument.count("retries")
+            with instrument.phase("backoff"):
+                await asyncio.sleep(_backoff(attempt, retry_after))
+
+        self.stats["failed"] += 1
+        raise error
+
+    async def get_json(self, url: str, params=None, timeout=15) -> dict:
+        """GET `url` and decode the JSON body (MediaWiki APIs get `maxlag`)."""
+        if self.maxlag is not None and url.endswith("api.php"):
+            params = {**(params or {}), "maxlag": self.maxlag}
+        return await self._with_retries(url, self._get_json, url, params, timeout)
+
+    def _get_json(self, url: str, params, timeout) -> dict:
+        r = self.session.get(url, params=params, timeout=timeout)
+        _check_retryable(r)
+        r.raise_for_status()
+        instrument.count("bytes", len(r.content))
+        data = r.json()
+        # maxlag refusals arrive as HTTP 200 with an API error (and usually Retry-After)
+        error = data.get("error") if isinstance(data, dict) else None
+        if r.headers.get("MediaWiki-API-Error") == "maxlag" or (error or {}).get("code") == "maxlag":
+            raise RetryableError("maxlag: database replicas lagging",
+                                 _retry_after(r.headers.get("Retry-After")), throttled=True)
+        return data
+
+    async def download(self, url: str, dest_path: pathlib.Path, timeout=30) -> bool:
+        """
+        Stream `url` to dest_path.
+        Returns True if saved, False if already on disk (or unchanged upstream).
+
+        With a refreshing cache, files we hold validators for are re-checked
+        with a conditional GET; a 304 leaves them untouched.
+        """
+        headers = {}
+        if dest_path.exists():
+            if self.cache and self.cache.refresh:
+                headers = self.cache.validators("download", url)
+            if not headers:
+                return False
+        # Each attempt holds the host slot until the body has been read; a retry
+        # after a dropped connection resumes from the .part file
+        return await self._with_retries(url, self._stream_to_file, url, dest_path, timeout, headers)
+
+    def _stream_to_file(self, url: str, dest_path: pathlib.Path, timeout, headers=None) -> bool:
+        """
+        Download into <dest>.part, then validate and atomically rename.
+
+        An interrupted transfer leaves the .part file (plus a .part.json with the
+        response's validators) behind; the next attempt resumes it with a Range
+        request guarded by If-Range, so a changed upstream file starts over.
+        """
+        part = dest_path.with_name(dest_path.name + ".part")
+        meta_path = part.with_name(part.name + ".json")
+        # Identity encoding keeps Content-Length comparable with the bytes on disk
+        headers = {**(headers or {}), "Accept-Encoding": "identity"}
+
+        offset = 0
+        meta = _read_json(meta_path)
+        validator = meta.get("etag") or meta.get("last_modified")
+        if part.exists() and meta.get("url") == url and validator:
+            offset = part.stat().st_size
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        with self.session.get(url, headers=headers, stream=True, timeout=timeout) as r:
+            if r.status_code == 304:
+                return False
+            _check_retryable(r)
+            r.raise_for_status()
+
+            content_type = r.headers.get("Content-Type", "")
+            if not content_type.startswith(self.accept_types):
+                raise DownloadError(f"unexpected Content-Type {content_type!r}")
+
+            if r.status_code == 206 and _range_start(r.headers.get("Content-Range")) == offset:
+                mode, total = "ab", _range_total(r.headers.get("Content-Range"))
+            else:  # full body: server ignored the Range or the file changed upstream
+                mode, total = "wb", r.headers.get("Content-Length")
+                total = int(total) if total and "Content-Encoding" not in r.headers else None
+
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            meta_path.write_text(json.dumps({
+                "url": url,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+            }))
+            with open(part, mode) as fp:
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    fp.write(chunk)
+                    instrument.count("bytes", len(chunk))
+            etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+        size = part.stat().st_size
+        if total is not None and size != total:
+            raise DownloadError(f"truncated download: {size} of {total} bytes")  # keep .part to resume
+        try:
+            probe_image(part)
+        except Exception as e:
+            part.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            raise DownloadError(f"not a decodable image: {e}") from e
+
+        os.replace(part, dest_path)
+        meta_path.unlink(missing_ok=True)
+        if self.cache:
+            self.cache.put_validators("download", url, etag, last_modified)
+        return True
+
+    # ----------------------------------------------------------------------- #
+    # Driver
+    # ----------------------------------------------------------------------- #
+    def run(self, items, worker, unit="item", label=str) -> Counter:
+        """
+        Run `await worker(engine, item)` for every item concurrently.
+        The worker returns "saved", "skipped" or "error"; exceptions count as errors.
+        """
+        tally = self.call(self._run(list(items), worker, unit, label))
+        print(f"\nDone: {tally['saved']} downloaded, {tally['skipped']} skipped, "
+              f"{tally['error']} errors.")
+        if self.cache:
+            print(f"Cache: {self.cache.hits} hits, {self.cache.misses} misses.")
+        if hasattr(self.transport, "summary"):
+            print(self.transport.summary())
+        stats = self.stats
+        print(f"Requests: {stats['requests']} sent, {stats['throttled']} throttled, "
+              f"{stats['retried']} retried, {stats['failed']} failed.")
+        return tally
+
+    def call(self, coro):
+        """Run one coroutine (e.g. a batch lookup) to completion on a fresh event loop."""
+        self._hosts = {}  # asyncio primitives are bound to the loop that first uses them
+        return asyncio.run(coro)
+
+    async def _run(self, items, worker, unit, label) -> Counter:
+        tally = Counter()
+        with tqdm(total=len(items), unit=unit) as bar:
+            async def one(item):
+                with instrument.item(label(item)) as record:
+                    try:
+                        record.status = await worker(self, item)
+                    except Exception as e:
+                        tqdm.write(f"❌ {label(item)}: {e}")
+                        record.status = "error"
+                    finally:
+                        tally[record.status] += 1
+                        bar.update()
+
+            await asyncio.gather(*(one(item) for item in items))
+        return tally
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+def _read_json(path: pathlib.Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _check_retryable(r: requests.Response):
+    """Raise RetryableError for 429 / 5xx responses."""
+    if r.status_code in RETRY_STATUSES:
+        raise RetryableError(f"HTTP {r.status_code} for {r.url}",
+                             _retry_after(r.headers.get("Retry-After")),
+                             throttled=r.status_code in THROTTLE_STATUSES)
+
+
+def _retry_after(value: str | None) -> float | None:
+    """Retry-After as seconds: either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, retry_after: float | None = None) -> float:
+    """Exponential backoff with full jitter, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+def _range_start(content_range: str | None) -> int | None:
+    """'bytes 100-199/200' → 100"""
+    try:
+        return int(content_range.split()[1].split("-")[0])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _range_total(content_range: str | None) -> int | None:
+    """'bytes 100-199/200' → 200 ('*' → None)"""
+    try:
+        return int(content_range.rsplit("/", 1)[1])
+    except (AttributeError, IndexError, ValueError):
+        return None
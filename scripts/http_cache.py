@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+http_cache.py
+Persistent on-disk cache for the Wikimedia lookup chain (title → Q-id → P18 → file).
+
+How it works
+------------
+1. Storage        : one SQLite file next to the scripts, keyed by (endpoint, key)
+2. TTLs           : every row carries its own time-to-live; `--max-age` caps it
+3. Negatives      : "no Q-id" / "no P18" are stored too (value NULL, shorter TTL)
+4. Validators     : ETag / Last-Modified are kept so downloads can be re-checked
+                    with a conditional GET instead of fetched again
+5. `--refresh`    : skip reads entirely (rows are still rewritten)
+"""
+
+import argparse
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+
+import instrument
+
+CACHE_PATH = pathlib.Path(__file__).parent / "wikimedia-cache.sqlite"
+
+DAY = 24 * 60 * 60
+POSITIVE_TTL = 30 * DAY
+NEGATIVE_TTL = 1 * DAY
+
+# SQLite's default limit on bound parameters is 999
+_IN_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    endpoint      TEXT NOT NULL,
+    key           TEXT NOT NULL,
+    value         TEXT,
+    fetched_at    REAL NOT NULL,
+    ttl           REAL NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (endpoint, key)
+)
+"""
+
+
+class MetadataCache:
+    """SQLite-backed cache of JSON values with TTLs and HTTP validators."""
+
+    def __init__(self, path=CACHE_PATH, max_age: float | None = None, refresh=False):
+        self.path = pathlib.Path(path)
+        self.max_age = max_age
+        self.refresh = refresh
+        self.hits = self.misses = 0
+        # Downloads record validators from worker threads, so share one guarded connection
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+
+    def _fresh(self, fetched_at: float, ttl: float, now: float) -> bool:
+        if self.max_age is not None:
+            ttl = min(ttl, self.max_age)
+        return now - fetched_at < ttl
+
+    def get_many(self, endpoint: str, keys) -> dict:
+        """Return {key: value} for every fresh entry; value None is a cached negative."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not self.refresh:
+            now = time.time()
+            with self._lock:
+                for i in range(0, len(keys), _IN_CHUNK):
+                    chunk = keys[i:i + _IN_CHUNK]
+                    rows = self._db.execute(
+                        f"SELECT key, value, fetched_at, ttl FROM entries "
+                        f"WHERE endpoint = ? AND key IN ({','.join('?' * len(chunk))})",
+                        [endpoint, *chunk],
+                    )
+                    for key, value, fetched_at, ttl in rows:
+                        if self._fresh(fetched_at, ttl, now):
+                            found[key] = None if value is None else json.loads(value)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        instrument.count("cache_hits", len(found))
+        instrument.count("cache_misses", len(keys) - len(found))
+        return found
+
+    def put_many(self, endpoint: str, items: dict, ttl: float | None = None):
+        """Store {key: value}; None values are negative results with NEGATIVE_TTL."""
+        now = time.time()
+        rows = [
+            (endpoint, key,
+             None if value is None else json.dumps(value, ensure_ascii=False),
+             now,
+             ttl if ttl is not None else (NEGATIVE_TTL if value is None else POSITIVE_TTL))
+            for key, value in items.items()
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO entries (endpoint, key, value, fetched_at, ttl) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(endpoint, key) DO UPDATE SET "
+                "value = excluded.value, fetched_at = excluded.fetched_at, ttl = excluded.ttl",
+                rows,
+            )
+
+    # ----------------------------------------------------------------------- #
+    # HTTP validators
+    # ----------------------------------------------------------------------- #
+    def validators(self, endpoint: str, key: str) -> dict:
+        """Return conditional-request headers (If-None-Match / If-Modified-Since) for key."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified FROM entries WHERE endpoint = ? AND key = ?",
+                (endpoint, key),
+            ).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def put_validators(self, endpoint: str, key: str, etag: str | None,
+                       last_modified: str | None, value=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO entries (endpoint, key, value, fetched_at, ttl, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(endpoint, key) DO UPDATE SET value = excluded.value, "
+                "fetched_at = excluded.fetched_at, etag = excluded.etag, "
+                "last_modified = excluded.last_modified",
+                (endpoint, key, None if value is None else json.dumps(value),
+                 time.time(), POSITIVE_TTL, etag, last_modified),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# --------------------------------------------------------------------------- #
+# CLI helpers
+# --------------------------------------------------------------------------- #
+def add_cache_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignore cached lookups and re-validate existing downloads")
+    parser.add_argument("--max-age", type=float, metavar="DAYS",
+                        help="treat cache entries older than DAYS as stale")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not read or write the lookup cache")
+
+
+def cache_from_args(args) -> MetadataCache | None:
+    if args.no_cache:
+        return None
+    max_age = args.max_age * DAY if args.max_age is not None else None
+    return MetadataCache(CACHE_PATH, max_age=max_age, refresh=args.refresh)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+instrument.py
+Per-item timings and counters for the scripts, written as a JSON-lines run report.
+
+How it works
+------------
+1. Items          : `with instrument.item(name):` opens a record for one person /
+                    artwork / image; it is found again through a ContextVar, so asyncio
+                    tasks and asyncio.to_thread workers report into the right item
+2. Phases         : `with instrument.phase("network"):` adds wall time to a phase
+                    (queue, network, decode, resize, encode, write, ...)
+3. Counters       : `instrument.count("bytes", n)` for bytes, encode passes, cache
+                    hits / misses, retries; counts outside any item go to run totals
+4. Report         : `instrument.start(path)` enables reporting; every finished item is
+                    one JSON line, and `finish()` appends a run line with the totals and
+                    prints the slowest items with their phase breakdown
+
+With no report started, item() and phase() still measure (process-pool workers
+return `record.to_dict()` for the parent to `record()`), but nothing is written.
+
+Report lines:
+    {"event": "item", "item": "Plato", "status": "saved", "seconds": 0.84,
+     "phases": {"queue": 0.1, "network": 0.7}, "counters": {"bytes": 182311}}
+    {"event": "run", "script": "fetch_portraits", "seconds": 41.2, "items": 102,
+     "statuses": {...}, "phases": {...}, "counters": {...}}
+"""
+
+import argparse
+import contextvars
+import json
+import pathlib
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+SLOWEST = 10
+
+_current = contextvars.ContextVar("instrument_item", default=None)
+_report = None  # the active RunReport, if any
+
+
+class Item:
+    """Measurements for one unit of work."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = None
+        self.seconds = 0.0
+        self.phases = Counter()
+        self.counters = Counter()
+        self._start = time.perf_counter()
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "event": "item",
+            "item": self.name,
+            "status": self.status,
+            "seconds": round(self.seconds, 4),
+            "phases": {k: round(v, 4) for k, v in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class RunReport:
+    """Collects item records and totals for one script run."""
+
+    def __init__(self, script: str, path: pathlib.Path | None = None):
+        self.script = script
+        self.path = path
+        self.items = []
+        self.statuses = Counter()
+        self.phases = Counter()
+        self.counters = Counter()
+        self._start = time.perf_counter()
+        self._fp = None
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._fp = open(path, "w")
+
+    def add(self, record: dict):
+        self.items.append(record)
+        self.statuses[record["status"]] += 1
+        self.phases.update(record["phases"])
+        self.counters.update(record["counters"])
+        if self._fp:
+            self._fp.write(json.dumps(record) + "\n")
+            self._fp.flush()
+
+    def close(self, slowest=SLOWEST):
+        run = {
+            "event": "run",
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "seconds": round(time.perf_counter() - self._start, 4),
+            "items": len(self.items),
+            "statuses": dict(self.statuses),
+            "phases": {k: round(v, 4) for k, v in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+        if self._fp:
+            self._fp.write(json.dumps(run) + "\n")
+            self._fp.close()
+        print_summary(run, self.items, slowest)
+        if self.path:
+            print(f"Run report: {self.path}")
+
+
+# --------------------------------------------------------------------------- #
+# Recording API
+# --------------------------------------------------------------------------- #
+@contextmanager
+def item(name: str):
+    """Measure one unit of work; the yielded Item's `status` may be set by the caller."""
+    record = Item(name)
+    token = _current.set(record)
+    try:
+        yield record
+    except BaseException:
+        record.status = record.status or "error"
+        raise
+    finally:
+        record.finish()
+        _current.reset(token)
+        if _report:
+            _report.add(record.to_dict())
+
+
+@contextmanager
+def phase(name: str):
+    """Add the wall time of the block to phase `name` of the current item."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - start)
+
+
+def add_time(name: str, seconds: float):
+    record = _current.get()
+    if record:
+        record.phases[name] += seconds
+    elif _report:
+        _report.phases[name] += seconds
+
+
+def count(name: str, n: int = 1):
+    record = _current.get()
+    if record:
+        record.counters[name] += n
+    elif _report:
+        _report.counters[name] += n
+
+
+def record(data: dict):
+    """Add an item measured elsewhere (e.g. in a worker process) to the report."""
+    if _report:
+        _report.add(data)
+
+
+# --------------------------------------------------------------------------- #
+# Report lifecycle
+# --------------------------------------------------------------------------- #
+def start(script: str, path: pathlib.Path | None = None) -> RunReport:
+    global _report
+    _report = RunReport(script, path)
+    return _report
+
+
+def finish(slowest=SLOWEST):
+    global _report
+    if _report:
+        _report.close(slowest)
+        _report = None
+
+
+def print_summary(run: dict, items, slowest=SLOWEST):
+    if not items or not slowest:
+        return
+    total = sum(run["phases"].values()) or 1
+    phases = ", ".join(f"{k} {v:.1f}s ({v / total:.0%})"
+                       for k, v in sorted(run["phases"].items(), key=lambda kv: -kv[1]))
+    print(f"\nTime by phase: {phases}")
+    print(f"Slowest {min(slowest, len(items))} of {len(items)} items:")
+    for rec in sorted(items, key=lambda r: -r["seconds"])[:slowest]:
+        detail = ", ".join(f"{k} {v:.2f}s" for k, v in sorted(rec["phases"].items(), key=lambda kv: -kv[1]))
+        size = rec["counters"].get("bytes")
+        size = f", {size / 1024:.0f} KB" if size else ""
+        print(f"  {rec['seconds']:7.2f}s  {rec['item']:<40} {rec['status'] or ''}  [{detail}{size}]")
+
+
+def add_report_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--report", type=lambda p: pathlib.Path(p).resolve(), metavar="PATH",
+                        help="write a JSON-lines run report (one line per item + a run summary)")
+    parser.add_argument("--slowest", type=int, default=SLOWEST, metavar="N",
+                        help=f"list the N slowest items at the end (default {SLOWEST}, 0 = off)")
+
+
+def start_from_args(script: str, args) -> RunReport:
+    return start(script, args.report)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+intervals.py
+"Who was alive when": year-range queries over every timeline dataset.
+
+How it works
+------------
+1. Spans          : people live [born, died] (the current year while alive), books and
+                    artworks are the single year [published] / [created], events run
+                    [start, end]
+2. Interval tree  : a centred interval tree answers stabbing queries (what spans year
+                    t) in O(log n + k): each node keeps the spans crossing its centre
+                    sorted by start and by end, and only walks one side
+3. Overlaps       : spans meeting [a, b] are the ones stabbing a, plus those starting
+                    in (a, b] - found with bisect on a sorted list of starts
+4. Contemporaries : one overlap query per person, O(n log n + k) in all instead of
+                    comparing every pair; --min-overlap N keeps only lives that shared
+                    at least N years
+
+    tree = IntervalTree.from_dataset("people")
+    tree.stab(1900)              # → people alive in 1900
+    tree.overlap(1800, 1850)     # → people alive at some point in 1800-1850
+
+Usage: python scripts/intervals.py --at 1900 [people books ...]
+       python scripts/intervals.py --between 1800 1850 [people books ...]
+       python scripts/intervals.py --contemporaries [--of plato] [--min-overlap 10] [--output c.json]
+"""
+
+import argparse
+import bisect
+import datetime
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+
+THIS_YEAR = datetime.date.today().year
+
+# dataset → (start field, end field, label field)
+DATASETS = {
+    "people":   ("born", "died", "name"),
+    "books":    ("published", "published", "title"),
+    "artworks": ("created", "created", "title"),
+    "cosmic":   ("start", "end", "title"),
+    "humanity": ("start", "end", "title"),
+}
+
+
+def span(name: str, record: dict):
+    """(start, end) of one record; a person with no death year is alive now."""
+    start_field, end_field, _ = DATASETS[name]
+    end = record.get(end_field)
+    return record[start_field], THIS_YEAR if end is None else end
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+
+class IntervalTree:
+    """Static centred interval tree over (start, end, value) triples, ends inclusive."""
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals, key=lambda iv: iv[0])
+        self._starts = [iv[0] for iv in self.intervals]
+        self.root = self._build(self.intervals)
+
+    @classmethod
+    def from_dataset(cls, name: str, records=None):
+        """Tree over a dataset's spans; values are (dataset, record)."""
+        if records is None:
+            records = json.loads((DATA_DIR / f"{name}.json").read_text())
+        return cls([(*span(name, r), (name, r)) for r in records])
+
+    def __len__(self):
+        return len(self.intervals)
+
+    @staticmethod
+    def _build(intervals):
+        if not intervals:
+            return None
+        points = sorted(p for start, end, _ in intervals for p in (start, end))
+        node = _Node()
+        node.center = points[len(points) // 2]
+        left, right, here = [], [], []
+        for iv in intervals:
+            if iv[1] < node.center:
+                left.append(iv)
+            elif iv[0] > node.center:
+                right.append(iv)
+            else:
+                here.append(iv)
+        node.by_start = sorted(here, key=lambda iv: iv[0])
+        node.by_end = sorted(here, key=lambda iv: -iv[1])
+        node.left = IntervalTree._build(left)
+        node.right = IntervalTree._build(right)
+        return node
+
+    def stab(self, t) -> list:
+        """Values whose interval contains t, in start order."""
+        found = []
+        node = self.root
+        while node:
+            if t < node.center:
+                for iv in node.by_start:
+                    if iv[0] > t:
+                        break
+                    found.append(iv)
+                node = node.left
+            elif t > node.center:
+                for iv in node.by_end:
+                    if iv[1] < t:
+                        break
+                    found.append(iv)
+                node = node.right
+            else:
+                found.extend(node.by_start)
+                break
+        found.sort(key=lambda iv: iv[0])
+        return [iv[2] for iv in found]
+
+    def overlap(self, a, b) -> list:
+        """Values whose interval meets [a, b], in start order."""
+        if a > b:
+            a, b = b, a
+        lo = bisect.bisect_right(self._starts, a)
+        hi = bisect.bisect_right(self._starts, b)
+        return self.stab(a) + [iv[2] for iv in self.intervals[lo:hi]]
+
+
+def lifespan(person) -> int:
+    start, end = span("people", person)
+    return end - start
+
+
+def contemporaries(records, min_overlap: int = 0) -> dict:
+    """{person id: [ids of people whose lives overlapped by >= min_overlap years]}."""
+    tree = IntervalTree.from_dataset("people", records)
+    result = {}
+    for person in records:
+        if lifespan(person) < min_overlap:
+            result[person["id"]] = []
+            continue
+        # Sharing N years means starting by died - N and ending from born + N on
+        born, died = span("people", person)
+        lo, hi = born + min_overlap, died - min_overlap
+        if lo <= hi:
+            candidates = tree.overlap(lo, hi)
+        else:  # a life shorter than 2N: the others must span all of [hi, lo]
+            candidates = [v for v in tree.stab(hi) if span(*v)[1] >= lo]
+        result[person["id"]] = [other["id"] for _, other in candidates
+                                if other is not person and lifespan(other) >= min_overlap]
+    return result
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+def describe(name, record) -> str:
+    start, end = span(name, record)
+    label = record[DATASETS[name][2]]
+    years = f"{start}" if start == end else f"{start} – {'present' if record.get(DATASETS[name][1]) is None else end}"
+    return f"  {years:>26}  {label}  ({name})"
+
+
+def print_matches(names, query, what):
+    total = 0
+    for name in names:
+        matches = query(IntervalTree.from_dataset(name))
+        total += len(matches)
+        for dataset, record in matches:
+            print(describe(dataset, record))
+    print(f"{total} {what}")
+
+
+def main(args):
+    names = args.datasets or list(DATASETS)
+    if args.at is not None:
+        print_matches(names, lambda tree: tree.stab(args.at), f"spanning {args.at}")
+    elif args.between:
+        a, b = args.between
+        print_matches(names, lambda tree: tree.overlap(a, b), f"overlapping {a} – {b}")
+    else:
+        people = json.loads((DATA_DIR / "people.json").read_text())
+        table = contemporaries(people, args.min_overlap)
+        if args.of:
+            if args.of not in table:
+                sys.exit(f"No person with id '{args.of}' in people.json")
+            by_id = {p["id"]: p for p in people}
+            for other in table[args.of]:
+                print(describe("people", by_id[other]))
+            print(f"{len(table[args.of])} contemporaries of {by_id[args.of]['name']}")
+        pairs = sum(len(v) for v in table.values()) // 2
+        if args.output:
+            args.output.write_text("{\n" + ",\n".join(
+                f"  {json.dumps(k)}: {json.dumps(v)}" for k, v in table.items()) + "\n}\n")
+            print(f"Wrote {len(table)} people ({pairs} contemporary pairs) to {args.output}")
+        elif not args.of:
+            json.dump(table, sys.stdout, indent=1)
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Year-range queries over the timeline datasets")
+    parser.add_argument("datasets", nargs="*", metavar="dataset",
+                        help=f"any of {', '.join(DATASETS)} (default: all)")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--at", type=int, metavar="YEAR", help="everything spanning YEAR (BC years negative)")
+    query.add_argument("--between", type=int, nargs=2, metavar=("FROM", "TO"),
+                       help="everything overlapping FROM..TO")
+    query.add_argument("--contemporaries", action="store_true",
+                       help="each person's contemporaries (people only)")
+    parser.add_argument("--of", metavar="ID", help="with --contemporaries: list one person's")
+    parser.add_argument("--min-overlap", type=int, default=0, metavar="YEARS",
+                        help="with --contemporaries: minimum shared years (default 0)")
+    parser.add_argument("--output", type=Path, help="with --contemporaries: write the table as JSON")
+    args = parser.parse_args()
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(sorted(unknown))}")
+    if (args.of or args.output or args.min_overlap) and not args.contemporaries:
+        parser.error("--of, --min-overlap and --output go with --contemporaries")
+    if args.min_overlap < 0:
+        parser.error("--min-overlap cannot be negative")
+    main(args)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+replay.py
+Record / replay HTTP cassettes for the fetch scripts, so they can be benchmarked
+and regression-tested without a network.
+
+How it works
+------------
+1. Transport      : CassetteAdapter is a requests transport adapter that FetchEngine
+                    mounts instead of its pooled HTTPAdapter (`transport=`)
+2. Record         : requests go to the real server; every response (status, headers,
+                    decoded body) is stored as one JSON file per request
+3. Replay         : responses are served from the cassette directory only; a request
+                    that was never recorded raises CassetteMiss instead of going out
+4. Fault injection: each request can be delayed (`latency` ± `jitter` seconds, slept in
+                    the worker thread like real network wait) and fail with probability
+                    `error_rate` (a 503 + Retry-After, or a dropped connection)
+
+Injected latency and faults come from a RNG seeded with (seed, request, attempt),
+so the same cassette and settings give the same run regardless of thread timing.
+
+Usage (any fetch script):
+    python fetch_portraits.py --record cassettes/portraits
+    python fetch_portraits.py --replay cassettes/portraits --latency 0.08 --error-rate 0.05
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import pathlib
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+CASSETTE_VERSION = 1
+
+# Headers that describe the wire encoding rather than the body we store
+HOP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+# Request headers that change the response and therefore belong in the key
+KEY_HEADERS = ("Range", "If-Range", "If-None-Match", "If-Modified-Since")
+
+
+class CassetteMiss(Exception):
+    """Replay mode got a request that is not in the cassette."""
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """Stable key: method, URL (query sorted) and the response-shaping headers."""
+    base, _, query = request.url.partition("?")
+    parts = [request.method, base, "&".join(sorted(query.split("&"))) if query else ""]
+    parts += [f"{h}={request.headers[h]}" for h in KEY_HEADERS if h in request.headers]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:32]
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter in "record" or "replay" mode with optional latency and
+    error injection. `stats` counts recorded / replayed / injected_errors / misses.
+    """
+
+    def __init__(self, directory, mode="replay", latency=0.0, jitter=0.0,
+                 error_rate=0.0, seed=0, **kwargs):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown cassette mode {mode!r}")
+        super().__init__(**kwargs)
+        self.directory = pathlib.Path(directory)
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.stats = Counter()
+        self._attempts = Counter()
+        self._lock = threading.Lock()
+        if mode == "record":
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request)
+        with self._lock:
+            attempt = self._attempts[key]
+            self._attempts[key] += 1
+        rng = random.Random(f"{self.seed}:{key}:{attempt}")
+
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and rng.random() < self.error_rate:
+            self._count("injected_errors")
+            if rng.random() < 0.5:
+                raise requests.ConnectionError(f"injected connection error for {request.url}")
+            return self._build(request, {"status": 503, "headers": {"Retry-After": "0"}, "body": ""})
+
+        path = self.directory / f"{key}.json"
+        if self.mode == "record":
+            response = super().send(request, stream=False, timeout=timeout, verify=verify,
+                                    cert=cert, proxies=proxies)
+            entry = _entry(request, response)
+            _write_json(path, entry)
+            self._count("recorded")
+            return self._build(request, entry)
+
+        try:
+            entry = json.loads(path.read_text())
+        except FileNotFoundError:
+            self._count("misses")
+            raise CassetteMiss(f"not in cassette {self.directory}: {request.method} {request.url}")
+        self._count("replayed")
+        return self._build(request, entry)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _build(self, request, entry) -> requests.Response:
+        """Turn a stored entry into a streamable requests.Response."""
+        body = entry["body"]
+        data = base64.b64decode(body) if entry.get("base64") else body.encode()
+        headers = {**entry["headers"], "Content-Length": str(len(data))}
+        raw = HTTPResponse(body=io.BytesIO(data), headers=headers, status=entry["status"],
+                           preload_content=False, decode_content=False)
+        return self.build_response(request, raw)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"Cassette ({self.mode}, {self.directory}): {s['recorded']} recorded, "
+                f"{s['replayed']} replayed, {s['misses']} misses, "
+                f"{s['injected_errors']} injected errors.")
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+def _entry(request, response) -> dict:
+    data = response.content  # decoded (gzip etc. already undone)
+    headers = {k: v for k, v in response.headers.items() if k.lower() not in HOP_HEADERS}
+    entry = {"version": CASSETTE_VERSION, "method": request.method, "url": request.url,
+             "status": response.status_code, "headers": headers}
+    try:
+        entry["body"] = data.decode()
+    except UnicodeDecodeError:
+        entry["body"], entry["base64"] = base64.b64encode(data).decode(), True
+    return entry
+
+
+def _write_json(path: pathlib.Path, data: dict):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as fp:
+        json.dump(data, fp, indent=1)
+    os.replace(tmp, path)
+
+
+# --------------------------------------------------------------------------- #
+# CLI glue
+# --------------------------------------------------------------------------- #
+def add_replay_args(parser: argparse.ArgumentParser):
+    # Resolved at parse time: some scripts chdir into the data directory afterwards
+    cassette_dir = lambda p: pathlib.Path(p).resolve()  # noqa: E731
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", type=cassette_dir, metavar="DIR", help="record every HTTP response into DIR")
+    group.add_argument("--replay", type=cassette_dir, metavar="DIR", help="serve HTTP responses from DIR only (no network)")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="SECONDS",
+                        help="add this much latency to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, metavar="SECONDS",
+                        help="± random spread around --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, metavar="P",
+                        help="fail this fraction of requests (503 or dropped connection)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for injected latency/errors")
+
+
+def transport_from_args(args) -> CassetteAdapter | None:
+    if args.record:
+        mode, directory = "record", args.record
+    elif args.replay:
+        mode, directory = "replay", args.replay
+    else:
+        return None
+    return CassetteAdapter(directory, mode, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, seed=args.seed)
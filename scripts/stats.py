@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+stats.py
+Dataset statistics for an overview strip: histograms, lifespans, how many people
+were alive each decade, gender ratios and tag counts.
+
+How it works
+------------
+1. Columns        : each dataset is loaded once into NumPy arrays (years, gender,
+                    a record × tag matrix); everything after that is vectorised
+2. Histograms     : per-century counts come from np.bincount over year // 100
+3. Alive curve    : +1 at each birth, -1 the year after each death (or this year, for
+                    the living), then one cumsum gives the head-count for every year;
+                    ongoing events per century work the same way
+4. Ratios / tags  : bincount with weights for women / men per birth century; column
+                    sums of the tag matrix for tag counts
+
+--synthetic N replaces the datasets with N random records each, to time the maths
+on 100k+ rows without touching the real files.
+
+Output: static/stats.json, compact. Series are {"from": year, "step": years, "counts": [...]}.
+It is only rewritten when it changes; `--check` exits 1 when it is stale. The living
+count towards the current decade, so the file also goes stale when a decade turns.
+
+Usage: python scripts/stats.py [--output static/stats.json] [--synthetic 100000 --seed 1] [--check]
+"""
+
+import argparse
+import datetime
+import json
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("stats.py needs NumPy: pip install numpy")
+
+from datastore import write_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+STATS_JSON = ROOT_DIR / "static" / "stats.json"
+
+THIS_YEAR = datetime.date.today().year
+CENTURY = 100
+DECADE = 10
+LIFESPAN_BIN = 10
+
+
+# ----------------------------------------------------------------------------- #
+# Columns
+# ----------------------------------------------------------------------------- #
+def year_column(records, field, default=None):
+    """int64 array of a year field; missing / null values become `default`."""
+    return np.fromiter(((r.get(field) if r.get(field) is not None else default) for r in records),
+                       dtype=np.int64, count=len(records))
+
+
+def tag_matrix(records):
+    """(bool matrix records × tags, sorted tag names)."""
+    tags = sorted({t for r in records for t in r.get("tags", [])})
+    column = {t: n for n, t in enumerate(tags)}
+    pairs = [(row, column[t]) for row, r in enumerate(records) for t in r.get("tags", [])]
+    matrix = np.zeros((len(records), len(tags)), dtype=bool)
+    if pairs:
+        rows, cols = np.array(pairs).T
+        matrix[rows, cols] = True
+    return matrix, tags
+
+
+def load_columns() -> dict:
+    def read(name):
+        return json.loads((DATA_DIR / f"{name}.json").read_text())
+
+    people = read("people")
+    died = year_column(people, "died", THIS_YEAR)
+    events = {name: read(name) for name in ("cosmic", "humanity")}
+    columns = {
+        "people": {"born": year_column(people, "born"), "died": died,
+                   "alive": np.fromiter((p.get("died") is None for p in people), dtype=bool, count=len(people)),
+                   "gender": year_column(people, "gender", -1)},
+        "books": {"year": year_column(read("books"), "published")},
+        "artworks": {"year": year_column(read("artworks"), "created")},
+    }
+    for name, records in events.items():
+        matrix, tags = tag_matrix(records)
+        columns[name] = {"start": year_column(records, "start"), "end": year_column(records, "end"),
+                         "tags": matrix, "tag_names": tags}
+    return columns
+
+
+def synthetic_columns(n: int, seed: int = 0) -> dict:
+    """n random records per dataset, shaped roughly like the real ones."""
+    rng = np.random.default_rng(seed)
+    born = rng.integers(-800, 2000, n)
+    died = born + np.clip(rng.normal(62, 16, n), 1, 110).astype(np.int64)
+    alive = died > THIS_YEAR
+    tag_names = [f"tag{t}" for t in range(12)]
+    start = rng.integers(-11000, 2000, n)
+    columns = {
+        "people": {"born": born, "died": np.minimum(died, THIS_YEAR), "alive": alive,
+                   "gender": (rng.random(n) < 0.7).astype(np.int64)},
+        "books": {"year": rng.integers(-700, 2025, n)},
+        "artworks": {"year": rng.integers(-30000, 2025, n)},
+        "humanity": {"start": start, "end": start + rng.integers(0, 3000, n),
+                     "tags": rng.random((n, len(tag_names))) < 0.15, "tag_names": tag_names},
+    }
+    cosmic_start = -np.exp(rng.uniform(0, np.log(13.8e9), n)).astype(np.int64)
+    columns["cosmic"] = {"start": cosmic_start, "end": cosmic_start,
+                         "tags": rng.random((n, len(tag_names))) < 0.15, "tag_names": tag_names}
+    return columns
+
+
+# ----------------------------------------------------------------------------- #
+# Statistics
+# ----------------------------------------------------------------------------- #
+def histogram(years, step=CENTURY, weights=None) -> dict:
+    """Counts per `step` years, from the first bucket holding any year."""
+    if len(years) == 0:
+        return {"from": 0, "step": step, "counts": []}
+    bucket = np.floor_divide(years, step)
+    lo = bucket.min()
+    counts = np.bincount(bucket - lo, weights=weights)
+    return {"from": int(lo * step), "step": step, "counts": counts.astype(np.int64).tolist()}
+
+
+def running_count(starts, ends, step) -> dict:
+    """How many [start, end] spans are under way in each `step`-year bucket."""
+    if len(starts) == 0:
+        return {"from": 0, "step": step, "counts": []}
+    first = np.floor_divide(starts, step)
+    last = np.floor_divide(ends, step)
+    lo = first.min()
+    size = int(last.max() - lo) + 2
+    change = (np.bincount(first - lo, minlength=size)
+              - np.bincount(last - lo + 1, minlength=size))
+    return {"from": int(lo * step), "step": step, "counts": np.cumsum(change)[:-1].tolist()}
+
+
+def summary(values) -> dict:
+    if len(values) == 0:
+        return {}
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    return {"mean": round(float(values.mean()), 1), "median": round(float(median), 1),
+            "p10": round(float(p10), 1), "p90": round(float(p90), 1)}
+
+
+def people_stats(col) -> dict:
+    born, died, alive, gender = col["born"], col["died"], col["alive"], col["gender"]
+    lifespans = (died - born)[~alive]
+    women, men = gender == 0, gender == 1
+    alive_by_decade = running_count(born, died, DECADE)
+    counts = np.array(alive_by_decade["counts"])
+    peak = int(counts.argmax()) if len(counts) else 0
+    return {
+        "count": int(len(born)),
+        "living": int(alive.sum()),
+        "births": histogram(born),
+        "lifespan": {**summary(lifespans),
+                     "women": summary((died - born)[~alive & women]),
+                     "men": summary((died - born)[~alive & men]),
+                     "histogram": histogram(lifespans, LIFESPAN_BIN)},
+        "alive": alive_by_decade,
+        "peak": {"year": alive_by_decade["from"] + peak * DECADE,
+                 "alive": int(counts[peak]) if len(counts) else 0},
+        "gender": {"women": int(women.sum()), "men": int(men.sum()),
+                   "womenShare": round(float(women.sum() / max(1, (women | men).sum())), 3),
+                   "byCentury": {**histogram(born), "women": histogram(born, weights=women)["counts"],
+                                 "men": histogram(born, weights=men)["counts"]}},
+    }
+
+
+def event_stats(col, by_century=True) -> dict:
+    tags = col["tags"].sum(axis=0)
+    stats = {"count": int(len(col["start"])),
+             "tags": {name: int(n) for name, n in sorted(zip(col["tag_names"], tags), key=lambda kv: -kv[1])}}
+    if by_century:
+        stats["starts"] = histogram(col["start"])
+        stats["ongoing"] = running_count(col["start"], col["end"], CENTURY)
+    return stats
+
+
+def compute(columns) -> dict:
+    stats = {"people": people_stats(columns["people"])}
+    for name in ("books", "artworks"):
+        year = columns[name]["year"]
+        stats[name] = {"count": int(len(year)), "byCentury": histogram(year)}
+    # Deep time does not fit in centuries: tag counts only for cosmic
+    stats["cosmic"] = event_stats(columns["cosmic"], by_century=False)
+    stats["humanity"] = event_stats(columns["humanity"])
+    return stats
+
+
+def main(output=STATS_JSON, synthetic=None, seed=0, check=False):
+    start = time.perf_counter()
+    columns = synthetic_columns(synthetic, seed) if synthetic else load_columns()
+    loaded = time.perf_counter()
+    stats = compute(columns)
+    done = time.perf_counter()
+
+    rows = sum(len(next(iter(col.values()))) for col in columns.values())
+    people = stats["people"]
+    print(f"{rows:,} records: load {(loaded - start) * 1000:.0f}ms, compute {(done - loaded) * 1000:.0f}ms")
+    print(f"People: {people['count']:,} ({people['living']:,} living), median lifespan "
+          f"{people['lifespan'].get('median', '?')} years, {people['gender']['womenShare']:.0%} women, "
+          f"most alive at once: {people['peak']['alive']:,} around {people['peak']['year']}")
+
+    if not output:
+        return 0
+    text = json.dumps(stats, separators=(",", ":")) + "\n"
+    current = output.read_text() if output.exists() else None
+    shown = output.relative_to(ROOT_DIR) if output.is_relative_to(ROOT_DIR) else output
+    if check:
+        if text != current:
+            print(f"{shown} is out of date; run scripts/stats.py")
+            return 1
+        print(f"{shown} is up to date")
+        return 0
+    if text == current:
+        print(f"{shown} unchanged")
+        return 0
+    write_atomic(output, text.encode())
+    print(f"Wrote {shown} ({len(text) / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute overview statistics for the timeline datasets")
+    parser.add_argument("--output", type=Path, default=None,
+                        help=f"where to write the JSON (default {STATS_JSON.relative_to(ROOT_DIR)}; "
+                             "not written with --synthetic unless given)")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="benchmark on N random records per dataset instead of the real data")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --synthetic (default 0)")
+    parser.add_argument("--check", action="store_true",
+                        help="only report whether stats.json is up to date (exit 1 if not)")
+    args = parser.parse_args()
+    if args.synthetic is not None and args.synthetic < 1:
+        parser.error("--synthetic must be at least 1")
+    if args.check and args.synthetic:
+        parser.error("--check compares against the real datasets; drop --synthetic")
+    output = args.output or (None if args.synthetic else STATS_JSON)
+    sys.exit(main(output, args.synthetic, args.seed, args.check))
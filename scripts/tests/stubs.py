@@ -0,0 +1,41 @@
+"""A scripted requests transport for the fetch / cache tests: no network, no cassette files."""
+
+import io
+
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+
+def jpeg(size=(40, 30)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, "red").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class ScriptedTransport(HTTPAdapter):
+    """
+    Answers requests from a list of (status, headers, body) in order. A callable
+    entry is called with the request instead; an exception instance is raised.
+    Every request sent is kept in `requests`.
+    """
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests.append(request)
+        response = self.responses.pop(0)
+        if callable(response):
+            response = response(request)
+        if isinstance(response, Exception):
+            raise response
+        status, headers, body = response
+        if isinstance(body, str):
+            body = body.encode()
+        # Content-Length is left as given, so a short body can pose as a dropped transfer
+        raw = HTTPResponse(body=io.BytesIO(body), headers=headers, status=status,
+                           preload_content=False, decode_content=False, enforce_content_length=False)
+        return self.build_response(request, raw)
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from add_person import batch_import
+from stubs import ScriptedTransport
+
+JSON = {"Content-Type": "application/json"}
+
+
+def pageprops(**qids):
+    """A Wikipedia pageprops response resolving each title to its Q-id."""
+    pages = [{"title": title.replace("_", " "), "pageprops": {"wikibase_item": qid}}
+             for title, qid in qids.items()]
+    return (200, JSON, json.dumps({"query": {"pages": pages}}))
+
+
+def entities(qid, born=None, died=None):
+    """A wbgetentities response with P569/P570 as (time, precision) and P21 male."""
+    def claim(value):
+        return [{"mainsnak": {"snaktype": "value", "datavalue": {"value": value}}}]
+
+    claims = {"P21": claim({"entity-type": "item", "id": "Q6581097"})}
+    for pid, date in (("P569", born), ("P570", died)):
+        if date:
+            claims[pid] = claim({"time": date[0], "precision": date[1]})
+    return (200, JSON, json.dumps({"entities": {qid: {"claims": claims}}}))
+
+
+@pytest.fixture
+def people_json(tmp_path):
+    path = tmp_path / "people.json"
+    path.write_text("[]\n")
+    return path
+
+
+def test_year_precision_dates_are_filled_in(people_json):
+    transport = ScriptedTransport([
+        pageprops(Plato="Q859"),
+        entities("Q859", born=("-0428-00-00T00:00:00Z", 9), died=("-0348-00-00T00:00:00Z", 9)),
+    ])
+    added = batch_import([{"name": "Plato"}], people_json, download=False, transport=transport)
+    assert [(p["born"], p["died"], p["gender"]) for p in added] == [(-428, -348, 1)]
+    assert json.loads(people_json.read_text())[0]["born"] == -428
+
+
+def test_century_precision_birth_is_not_written(people_json, capsys):
+    transport = ScriptedTransport([
+        pageprops(Homer="Q6691"),
+        entities("Q6691", born=("-0800-00-00T00:00:00Z", 7)),
+    ])
+    added = batch_import([{"name": "Homer"}], people_json, download=False, transport=transport)
+    assert added == []
+    assert json.loads(people_json.read_text()) == []
+    assert "Homer: no born (Q6691, born only known to the decade or century)" in capsys.readouterr().out
+
+
+def test_century_precision_death_is_not_taken_for_alive(people_json, capsys):
+    transport = ScriptedTransport([
+        pageprops(Sappho="Q17892"),
+        entities("Q17892", born=("-0630-00-00T00:00:00Z", 9), died=("-0500-00-00T00:00:00Z", 7)),
+    ])
+    assert batch_import([{"name": "Sappho"}], people_json, download=False, transport=transport) == []
+    assert "Sappho: no died" in capsys.readouterr().out
+
+
+def test_year_from_the_batch_file_wins_over_a_coarse_one(people_json):
+    transport = ScriptedTransport([
+        pageprops(Homer="Q6691"),
+        entities("Q6691", born=("-0800-00-00T00:00:00Z", 7), died=("-0700-00-00T00:00:00Z", 7)),
+    ])
+    added = batch_import([{"name": "Homer", "born": "-800", "died": "-701"}], people_json,
+                         download=False, transport=transport)
+    assert [(p["born"], p["died"]) for p in added] == [(-800, -701)]
@@ -0,0 +1,78 @@
+import json
+import random
+
+import pytest
+from PIL import Image
+
+import build_atlas
+from build_atlas import shelf_pack
+
+
+def test_rows_and_sheets_start_at_the_origin():
+    placements, sheets = shelf_pack([(2048, 96), (10, 96)], padding=2)
+    assert placements == [(0, 0, 0), (0, 0, 98)]
+    assert sheets == [(2048, 194)]
+
+
+def test_oversized_box_is_rejected():
+    with pytest.raises(ValueError):
+        shelf_pack([(3000, 96)])
+
+
+def test_boxes_stay_inside_their_sheet_and_apart():
+    rng = random.Random(0)
+    sizes = [(rng.randint(20, 400), rng.randint(20, 200)) for _ in range(300)]
+    placements, sheets = shelf_pack(sizes, sheet_width=1024, sheet_height=1024)
+    assert len(sheets) > 1
+    for n, ((sheet, x, y), (w, h)) in enumerate(zip(placements, sizes)):
+        sheet_w, sheet_h = sheets[sheet]
+        assert x + w <= sheet_w <= 1024 and y + h <= sheet_h <= 1024
+        for (other_sheet, ox, oy), (ow, oh) in zip(placements[:n], sizes[:n]):
+            if other_sheet == sheet:
+                assert x >= ox + ow or ox >= x + w or y >= oy + oh or oy >= y + h
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """A two-portrait people.json with its images under a throwaway static/."""
+    data, static = tmp_path / "data", tmp_path / "static"
+    (static / "images/people").mkdir(parents=True)
+    data.mkdir()
+    for name, color in (("plato", "red"), ("kant", "blue")):
+        Image.new("RGB", (80, 100), color).save(static / f"images/people/{name}.jpg")
+    (data / "people.json").write_text(json.dumps(
+        [{"id": name, "image": f"/images/people/{name}.jpg"} for name in ("plato", "kant")]))
+    monkeypatch.setattr(build_atlas, "ROOT_DIR", tmp_path)
+    monkeypatch.setattr(build_atlas, "DATA_DIR", data)
+    monkeypatch.setattr(build_atlas, "STATIC_DIR", static)
+    monkeypatch.setattr(build_atlas, "ATLAS_DIR", static / "images/atlas")
+    monkeypatch.setattr(build_atlas, "ATLAS_MANIFEST", data / "atlas.json")
+    return tmp_path
+
+
+def test_check_passes_after_a_build_and_nothing_is_rewritten(tree):
+    assert build_atlas.main(["people"], check=True) == 1
+    assert not (tree / "data/atlas.json").exists()
+
+    assert build_atlas.main(["people"]) == 0
+    atlas = json.loads((tree / "data/atlas.json").read_text())["people"]
+    assert atlas["items"] == {"plato": [0, 0, 0, 77, 96], "kant": [0, 79, 0, 77, 96]}
+    sheet = tree / "static" / atlas["sheets"][0]["src"].lstrip("/")
+    mtime = sheet.stat().st_mtime_ns
+
+    assert build_atlas.main(["people"], check=True) == 0
+    assert build_atlas.main(["people"]) == 0
+    assert sheet.stat().st_mtime_ns == mtime
+
+
+def test_check_notices_a_replaced_image_of_the_same_size(tree):
+    build_atlas.main(["people"])
+    Image.new("RGB", (80, 100), "green").save(tree / "static/images/people/kant.jpg")
+    assert build_atlas.main(["people"], check=True) == 1
+
+
+def test_check_notices_a_missing_sheet(tree):
+    build_atlas.main(["people"])
+    for sheet in (tree / "static/images/atlas").iterdir():
+        sheet.unlink()
+    assert build_atlas.main(["people"], check=True) == 1
@@ -0,0 +1,154 @@
+"""
+build_layout.layout must give exactly the rows the components' assignRows scan
+gives, with living people's bars running to OPEN_END_YEAR instead of today.
+"""
+
+import datetime
+import json
+import math
+import random
+
+import pytest
+
+from build_layout import (CHART_MAX_ROWS, DATA_DIR, DATASETS, EVENT_MAX_ROWS, OPEN_END_YEAR,
+                          YEAR_PIXEL_RATIO, event_x_scale, js_length, layout)
+
+
+# --------------------------------------------------------------------------- #
+# Line-by-line ports of assignRows in TimelineChart.svelte / EventTimeline.svelte
+# --------------------------------------------------------------------------- #
+def chart_start(p):
+    return p.get("born") or p.get("published") or p.get("created") or 0
+
+
+def chart_end(p, this_year=OPEN_END_YEAR):
+    return p.get("died") or p.get("created") or p.get("published") or this_year
+
+
+def is_dot(p):
+    return "title" in p and ("published" in p or "created" in p)
+
+
+def chart_overlaps(person, p, this_year=OPEN_END_YEAR):
+    if is_dot(person) and is_dot(p):
+        title_width = max(js_length(person.get("title")), js_length(p.get("title"))) * 6
+        return abs(chart_start(person) - chart_start(p)) < max(50, title_width / YEAR_PIXEL_RATIO)
+    return (chart_start(person) <= chart_end(p, this_year) + 70
+            and chart_end(person, this_year) >= chart_start(p) - 70)
+
+
+def event_overlaps(to_x):
+    def overlaps(item, other):
+        buffer = 80 + max(js_length(item.get("title")), js_length(other.get("title"))) * 7 / 2
+        return (to_x(item["start"]) <= to_x(other["end"]) + buffer
+                and to_x(item["end"]) >= to_x(other["start"]) - buffer)
+    return overlaps
+
+
+def assign_rows_js(items, start, overlaps, max_rows):
+    items = sorted(items, key=start)
+    rows = {}
+    for i, item in enumerate(items):
+        rows[item["id"]] = max_rows
+        for row in range(1, max_rows + 1):
+            if not any(rows[p["id"]] == row and overlaps(item, p) for p in items[:i]):
+                rows[item["id"]] = row
+                break
+    return rows
+
+
+def reference(items, chart, scale=None):
+    if chart == "chart":
+        start, overlaps, max_rows = chart_start, chart_overlaps, CHART_MAX_ROWS
+    else:
+        start, max_rows = (lambda i: i["start"]), EVENT_MAX_ROWS
+        overlaps = event_overlaps(event_x_scale(items, scale))
+    ordered = sorted(items, key=start)
+    result = {}
+    for side, parity in (("top", 0), ("bottom", 1)):
+        rows = assign_rows_js(ordered[parity::2], start, overlaps, max_rows)
+        result.update({i: [side, row] for i, row in rows.items()})
+    return result
+
+
+# --------------------------------------------------------------------------- #
+# Datasets
+# --------------------------------------------------------------------------- #
+def title(rng):
+    return "".join(rng.choice("abcdefghij ") for _ in range(rng.randint(0, 40)))
+
+
+def random_people(rng, n):
+    people = []
+    for k in range(n):
+        born = rng.randint(-800, 2010)
+        died = None if born > 1940 and rng.random() < 0.5 else born + rng.randint(1, 100)
+        people.append({"id": f"p{k}", "name": title(rng), "born": born, "died": died})
+    return people
+
+
+def random_dots(rng, n, field):
+    return [{"id": f"d{k}", "title": title(rng), field: rng.randint(-3000, 2020)} for k in range(n)]
+
+
+def random_events(rng, n, log):
+    events = []
+    for k in range(n):
+        if log:
+            start = -round(math.exp(rng.uniform(0, math.log(13.8e9))))
+        else:
+            start = rng.randint(-10000, 2000)
+        end = start if rng.random() < 0.5 else min(2025, start + rng.randint(0, abs(start) // 4 + 50))
+        events.append({"id": f"e{k}", "title": title(rng), "start": start, "end": end})
+    if log:
+        events.append({"id": "big-bang", "title": "Big Bang", "start": -13_800_000_000, "end": -13_800_000_000})
+    return events
+
+
+@pytest.mark.parametrize("name", DATASETS)
+def test_real_datasets_match_assign_rows(name):
+    filename, chart, scale = DATASETS[name]
+    items = json.loads((DATA_DIR / filename).read_text())
+    assert layout(items, chart, scale) == reference(items, chart, scale)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_datasets_match_assign_rows(seed):
+    rng = random.Random(seed)
+    n = rng.choice([1, 2, 7, 60, 200])
+    cases = [
+        (random_people(rng, n), "chart", None),
+        (random_dots(rng, n, "published"), "chart", None),
+        (random_dots(rng, n, "created"), "chart", None),
+        (random_events(rng, n, log=False), "event", "linear"),
+        (random_events(rng, n, log=True), "event", "log"),
+    ]
+    for items, chart, scale in cases:
+        assert layout(items, chart, scale) == reference(items, chart, scale)
+
+
+def test_rows_overflow_onto_the_last_row():
+    # Everyone alive at once: 30 per side fill rows 1..25, the last 6 share row 25
+    people = [{"id": f"p{k}", "name": "x", "born": 1900, "died": 1950} for k in range(60)]
+    rows = layout(people, "chart")
+    assert rows == reference(people, "chart")
+    assert sum(row == CHART_MAX_ROWS for _, row in rows.values()) == 2 * (30 - CHART_MAX_ROWS + 1)
+
+
+def test_zero_length_event_axis_puts_everything_on_row_one():
+    # timeToX is 0 / 0 = NaN there, so assignRows never sees an overlap
+    events = [{"id": f"e{k}", "title": "t", "start": 100, "end": 100} for k in range(5)]
+    assert layout(events, "event", "linear") == {
+        "e0": ["top", 1], "e1": ["bottom", 1], "e2": ["top", 1], "e3": ["bottom", 1], "e4": ["top", 1]}
+
+
+@pytest.mark.parametrize("this_year", [datetime.date.today().year, OPEN_END_YEAR])
+def test_living_people_do_not_overlap_until_the_open_end_year(this_year):
+    rng = random.Random(1)
+    people = random_people(rng, 200) + [
+        {"id": f"young{k}", "name": "x", "born": 2000 + k, "died": None} for k in range(10)]
+    rows = layout(people, "chart")
+    for a in people:
+        for b in people:
+            if a is not b and rows[a["id"]] == rows[b["id"]] and rows[a["id"]][1] < CHART_MAX_ROWS:
+                assert not chart_overlaps(a, b, this_year)
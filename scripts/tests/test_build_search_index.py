@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from build_search_index import DATA_DIR, DATASETS, GRAM, build_index, fold, tokenize
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_index({builder: json.loads((DATA_DIR / filename).read_text())
+                        for filename, builder in DATASETS.items()})
+
+
+def postings(gaps):
+    ids, total = [], 0
+    for gap in gaps:
+        total += gap
+        ids.append(total)
+    return ids
+
+
+def test_fold():
+    assert fold("Gödel") == "godel"
+    assert fold("ÆSOP Straße Łódź") == "aesop strasse lodz"
+    assert tokenize("K–Pg extinction, 66 Ma") == ["k", "pg", "extinction", "66", "ma"]
+
+
+def test_postings_match_a_scan_of_the_documents(index):
+    text = [row[index["columns"].index("text")] for row in index["docs"]]
+    words = [set(t.split()) for t in text]
+    for prefix, gaps in index["prefixes"].items():
+        assert 0 < len(prefix) < GRAM
+        assert postings(gaps) == [n for n, ws in enumerate(words) if any(w.startswith(prefix) for w in ws)]
+    for gram, gaps in index["grams"].items():
+        assert len(gram) == GRAM
+        assert postings(gaps) == [n for n, ws in enumerate(words) if any(gram in w for w in ws)]
+
+
+def test_every_record_is_a_document(index):
+    columns = index["columns"]
+    docs = {(row[columns.index("type")], row[columns.index("id")]) for row in index["docs"]}
+    total = sum(len(json.loads((DATA_DIR / filename).read_text())) for filename in DATASETS)
+    assert len(docs) == len(index["docs"]) == total
+    assert ("person", "plato") in docs
+
@@ -0,0 +1,126 @@
+import json
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from build_layout import event_x_scale
+from build_tiles import DATA_DIR, DATASETS, build_pyramid, normalised_axis, tile_files
+
+
+def random_events(rng, n, log):
+    events = []
+    for k in range(n):
+        if log:
+            start = -round(math.exp(rng.uniform(0, math.log(13.8e9))))
+        else:
+            start = rng.randint(-10000, 2000)
+        end = start if rng.random() < 0.5 else min(2025, start + rng.randint(0, abs(start) // 4 + 50))
+        tags = rng.sample(["life", "war", "art", "physics"], rng.randint(0, 2))
+        events.append({"id": f"e{k}", "title": f"Event {k}", "start": start, "end": end, "tags": tags})
+    return events
+
+
+def pyramid_cases():
+    """(records, scale, capacity): the real datasets plus random ones, small capacities to force depth."""
+    for name, scale in DATASETS.items():
+        records = json.loads((DATA_DIR / f"{name}.json").read_text())
+        for capacity in (1, 2, 8):
+            yield pytest.param(records, scale, capacity, id=f"{name}-{capacity}")
+    for seed in range(8):
+        rng = random.Random(seed)
+        log = seed % 2 == 0
+        yield pytest.param(random_events(rng, rng.choice([1, 5, 60, 300]), log),
+                           "log" if log else "linear", rng.choice([1, 3, 8]), id=f"random-{seed}")
+
+
+CASES = list(pyramid_cases())
+
+
+def subtrees(tiles):
+    """{(z, i): ids of the events stored in the tile or anywhere below it}"""
+    below = {}
+    for z, i in sorted(tiles, reverse=True):  # deepest level first
+        ids = [e["id"] for e in tiles[(z, i)]["events"]]
+        for child in ((z + 1, 2 * i), (z + 1, 2 * i + 1)):
+            ids += below.get(child, [])
+        below[(z, i)] = ids
+    return below
+
+
+@pytest.mark.parametrize("records, scale, capacity", CASES)
+def test_each_event_is_in_exactly_one_tile_per_level(records, scale, capacity):
+    tiles = build_pyramid(records, scale, capacity)
+    stored = Counter(e["id"] for tile in tiles.values() for e in tile["events"])
+    assert stored == Counter(r["id"] for r in records)  # every event stored once
+
+    level_of = {e["id"]: z for (z, _), tile in tiles.items() for e in tile["events"]}
+    below = subtrees(tiles)
+    for z in range(max(z for z, _ in tiles) + 1):
+        at_level = Counter(n for (tz, _), ids in below.items() if tz == z for n in ids)
+        # Down to the level it is stored at, an event sits under exactly one tile
+        assert at_level == Counter(n for n, lz in level_of.items() if lz >= z)
+
+
+@pytest.mark.parametrize("records, scale, capacity", CASES)
+def test_summaries_add_up_over_their_children(records, scale, capacity):
+    tiles = build_pyramid(records, scale, capacity)
+    by_id = {r["id"]: r for r in records}
+    for (z, i), tile in tiles.items():
+        children = [tiles[c] for c in ((z + 1, 2 * i), (z + 1, 2 * i + 1)) if c in tiles]
+        summary = tile["summary"]
+        assert tile["split"] == bool(children)
+        assert summary["count"] == len(tile["events"]) + sum(c["summary"]["count"] for c in children)
+
+        tags = Counter(t for e in tile["events"] for t in by_id[e["id"]].get("tags", []))
+        for c in children:
+            tags.update(c["summary"]["tags"])
+        assert summary["tags"] == dict(tags)
+
+        own = [by_id[e["id"]] for e in tile["events"]]
+        starts = [r["start"] for r in own] + [c["summary"]["start"] for c in children]
+        ends = [r["end"] for r in own] + [c["summary"]["end"] for c in children]
+        assert (summary["start"], summary["end"]) == (min(starts), max(ends))
+        assert tile["reach"] == max([e["u"][1] for e in tile["events"]] + [c["reach"] for c in children])
+
+
+@pytest.mark.parametrize("records, scale, capacity", CASES)
+def test_tiles_cover_the_axis(records, scale, capacity):
+    tiles = build_pyramid(records, scale, capacity)
+    assert tiles[(0, 0)]["range"] == [0, 1]
+    assert tiles[(0, 0)]["summary"]["count"] == len(records)
+    for (z, i), tile in tiles.items():
+        width = 1 / 2 ** z
+        assert tile["range"] == [i * width, (i + 1) * width]
+        if z:
+            assert (z - 1, i // 2) in tiles  # no orphans
+        for event in tile["events"]:
+            u0, u1 = event["u"]
+            assert 0 <= u0 <= u1 <= 1
+            # Starts inside its tile; loose tiles let it run on by at most one tile width
+            assert tile["range"][0] - 1e-6 <= u0 <= tile["range"][1] + 1e-6
+            assert u1 <= tile["range"][1] + width + 1e-6
+
+
+@pytest.mark.parametrize("name", DATASETS)
+def test_axis_spans_the_dataset(name):
+    records = json.loads((DATA_DIR / f"{name}.json").read_text())
+    scale = DATASETS[name]
+    axis = normalised_axis(records, scale)
+    first, last = min(r["start"] for r in records), max(r["end"] for r in records)
+    assert axis(first) == 0 and axis(last) == pytest.approx(1)
+    # Monotonic along the chart's own x-scale (piecewise asinh for cosmic)
+    to_x = event_x_scale(records, scale)
+    times = sorted({t for r in records for t in (r["start"], r["end"])})
+    assert all(axis(a) <= axis(b) for a, b in zip(times, times[1:]))
+    assert all(to_x(a) <= to_x(b) for a, b in zip(times, times[1:]))
+
+
+def test_index_lists_every_tile_with_its_subtree_count():
+    files, tiles, index = tile_files("cosmic", capacity=2)
+    assert set(files) == {"index.json"} | {f"{z}/{i}.json" for z, i in tiles}
+    assert json.loads(files["index.json"]) == index
+    assert index["depth"] == max(z for z, _ in tiles)
+    assert {(int(z), int(i)): n for z, level in index["tiles"].items() for i, n in level.items()} == {
+        key: tile["summary"]["count"] for key, tile in tiles.items()}
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from PIL import Image
+
+import build_variants
+from build_variants import (VARIANT_SIZES, build_variants as build, merge_manifest,
+                            stale_variants, variant_sizes)
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    """A throwaway static/ tree for the variant outputs."""
+    monkeypatch.setattr(build_variants, "STATIC_DIR", tmp_path)
+    monkeypatch.setattr(build_variants, "IMAGES_DIR", tmp_path / "images")
+    return tmp_path
+
+
+def source(tmp_path, size):
+    path = tmp_path / "source.jpg"
+    Image.new("RGB", size, "blue").save(path, "JPEG")
+    return path
+
+
+def test_variant_sizes_never_upscale():
+    assert variant_sizes(2000, 1000) == list(VARIANT_SIZES)
+    assert variant_sizes(300, 400) == [96, 240, 400]
+    assert variant_sizes(50, 80) == [80]
+
+
+def test_manifest_entry_lists_every_size_and_format(static):
+    _, entry, written, error, _ = build("/images/people/plato.jpg", source(static, (640, 800)),
+                                        ["webp", "jpeg"])
+    assert error is None
+    assert written == 8
+    assert (entry["width"], entry["height"]) == (640, 800)
+    assert list(entry["sources"]) == ["webp", "jpeg"]
+    assert entry["sources"]["jpeg"] == [
+        {"width": 76, "height": 96, "src": "/images/people/variants/plato-96.jpg"},
+        {"width": 192, "height": 240, "src": "/images/people/variants/plato-240.jpg"},
+        {"width": 384, "height": 480, "src": "/images/people/variants/plato-480.jpg"},
+        {"width": 640, "height": 800, "src": "/images/people/variants/plato-800.jpg"},
+    ]
+    for fmt, pil_format in (("webp", "WEBP"), ("jpeg", "JPEG")):
+        for variant in entry["sources"][fmt]:
+            with Image.open(static / variant["src"].lstrip("/")) as img:
+                assert img.format == pil_format
+                assert img.size == (variant["width"], variant["height"])
+    # The entry round-trips through the JSON manifest unchanged
+    assert json.loads(json.dumps(entry)) == entry
+
+
+def test_existing_variants_are_not_re_encoded(static):
+    src = source(static, (300, 200))
+    assert build("/images/books/a.jpg", src, ["jpeg"])[2] == 3
+    assert build("/images/books/a.jpg", src, ["jpeg"])[2] == 0
+    assert build("/images/books/a.jpg", src, ["jpeg"], force=True)[2] == 3
+
+
+def test_unreadable_source_is_an_error(static):
+    bad = static / "bad.jpg"
+    bad.write_bytes(b"not an image")
+    _, entry, written, error, _ = build("/images/books/bad.jpg", bad, ["jpeg"])
+    assert (entry, written) == (None, 0)
+    assert error
+
+
+def entry_for(image_path, sizes=(96,)):
+    stem = image_path.rsplit("/", 1)[1].split(".")[0]
+    folder = image_path.rsplit("/", 1)[0]
+    return {"width": 96, "height": 96, "sources": {"jpeg": [
+        {"width": s, "height": s, "src": f"{folder}/variants/{stem}-{s}.jpg"} for s in sizes]}}
+
+
+def test_regenerating_drops_entries_of_removed_images():
+    old = {path: entry_for(path) for path in
+           ("/images/people/plato.jpg", "/images/people/gone.jpg", "/images/books/beowulf.jpg")}
+    new = {"/images/people/plato.jpg": entry_for("/images/people/plato.jpg", (96, 240))}
+    assert merge_manifest(old, ["people"], new) == {
+        "/images/people/plato.jpg": new["/images/people/plato.jpg"],
+        "/images/books/beowulf.jpg": old["/images/books/beowulf.jpg"],  # not rebuilt: kept
+    }
+
+
+def test_unlisted_variant_files_are_stale(static):
+    manifest = {"/images/people/plato.jpg": entry_for("/images/people/plato.jpg")}
+    for name in ("people/variants/plato-96.jpg", "people/variants/plato-240.jpg",
+                 "people/variants/gone-96.jpg", "books/variants/beowulf-96.jpg"):
+        path = static / "images" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    assert stale_variants(manifest, ["people"]) == [
+        static / "images/people/variants/gone-96.jpg",
+        static / "images/people/variants/plato-240.jpg",
+    ]
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from datastore import DATA_DIR, DATASETS, Dataset
+
+
+def people_file(tmp_path, records):
+    path = tmp_path / "people.json"
+    path.write_text(json.dumps(records, indent=2) + "\n")
+    return path
+
+
+def ids(dataset):
+    return [r["id"] for r in dataset]
+
+
+@pytest.mark.parametrize("name", DATASETS)
+def test_every_dataset_round_trips_byte_for_byte(name):
+    path = DATA_DIR / DATASETS[name][0]
+    dataset = Dataset.open(name)
+    assert dataset.dumps() == path.read_text()
+    assert dataset.save() is False
+
+
+def test_insert_goes_after_equal_keys(tmp_path):
+    path = people_file(tmp_path, [{"id": "a", "born": 1}, {"id": "b", "born": 5}, {"id": "c", "born": 9}])
+    people = Dataset.open("people", path)
+    assert people.add({"id": "x", "born": 5})
+    assert people.add({"id": "y", "born": 5})
+    assert people.add({"id": "z"})  # no year sorts as 0
+    assert ids(people) == ["z", "a", "b", "x", "y", "c"]
+    # Same order as the old append + stable sort
+    assert people.records == sorted(people.records, key=lambda r: r.get("born", 0) or 0)
+
+
+def test_add_rejects_duplicate_ids(tmp_path):
+    people = Dataset.open("people", people_file(tmp_path, [{"id": "a", "born": 1}]))
+    assert not people.add({"id": "a", "born": 2})
+    assert people.add_many([{"id": "a", "born": 3}, {"id": "b", "born": 0}]) == [{"id": "a", "born": 3}]
+    assert ids(people) == ["b", "a"]
+
+
+def test_update_moves_record_to_its_new_position(tmp_path):
+    path = people_file(tmp_path, [{"id": r, "born": b} for r, b in
+                                  (("a", 1), ("b", 5), ("c", 5), ("d", 9))])
+    people = Dataset.open("people", path)
+    people.update("a", born=5)
+    assert ids(people) == ["b", "c", "a", "d"]
+    people.update("d", born=-100)
+    assert ids(people) == ["d", "b", "c", "a"]
+    people.update("b", name="Bee")  # same key: stays put
+    assert ids(people) == ["d", "b", "c", "a"] and people.get("b")["name"] == "Bee"
+    people.remove("c")
+    assert ids(people) == ["d", "b", "a"] and "c" not in people
+
+    assert people.save()
+    assert [r["id"] for r in json.loads(path.read_text())] == ["d", "b", "a"]
+    assert Dataset.open("people", path).dumps() == path.read_text()
+
+
+def test_curated_datasets_keep_their_order(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([{"id": "b", "published": 9}, {"id": "a", "published": 1}]))
+    books = Dataset.open("books", path)
+    books.add({"id": "c", "published": 5})
+    books.update("a", published=20)
+    assert ids(books) == ["b", "a", "c"]
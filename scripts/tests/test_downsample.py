@@ -0,0 +1,41 @@
+import random
+
+import pytest
+from PIL import Image
+
+from downsample import MAX_QUALITY, MIN_QUALITY, QUALITY_STEP, encode_jpeg, find_quality
+
+
+def noisy_image(seed, size=(160, 120)):
+    """Random noise compresses badly, so the budgets below actually bite."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", size)
+    img.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+                 for _ in range(size[0] * size[1])])
+    return img
+
+
+def linear_quality(img, target_bytes):
+    """The old loop: first quality from the top of the grid that fits, else the lowest."""
+    for quality in range(MAX_QUALITY, MIN_QUALITY - 1, -QUALITY_STEP):
+        if len(encode_jpeg(img, quality)) <= target_bytes:
+            return quality
+    return MIN_QUALITY
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matches_linear_search(seed):
+    img = noisy_image(seed)
+    sizes = [len(encode_jpeg(img, q)) for q in range(MAX_QUALITY, MIN_QUALITY - 1, -QUALITY_STEP)]
+    # Every boundary of the grid, plus budgets nothing / everything fits in
+    budgets = {1, sizes[0] * 2} | {s for s in sizes} | {s - 1 for s in sizes}
+    for target in sorted(budgets):
+        quality, data, passes = find_quality(img, target)
+        assert quality == linear_quality(img, target), target
+        assert data == encode_jpeg(img, quality)
+        assert passes <= 5
+
+
+def test_top_quality_takes_one_encode():
+    quality, _, passes = find_quality(noisy_image(0), 10 ** 9)
+    assert (quality, passes) == (MAX_QUALITY, 1)
@@ -0,0 +1,48 @@
+import pytest
+
+import fetch_book_covers
+from fetch_book_covers import fetch_cover
+from fetch_engine import FetchEngine
+from stubs import ScriptedTransport, jpeg
+
+BOOK = {"title": "Beowulf", "author": "Unknown", "image": "/images/books/beowulf.jpg"}
+COVER = "https://covers.openlibrary.org/b/id/1-L.jpg"
+
+
+@pytest.fixture
+def resolved(monkeypatch, tmp_path):
+    """Run in tmp_path and answer the Wikimedia lookup without a network; records the titles asked for."""
+    monkeypatch.chdir(tmp_path)
+    asked = []
+
+    async def resolve_images(engine, names):
+        asked.extend(names)
+        return {"Beowulf": "Q48328"}, {"Q48328": "Beowulf Cotton MS.jpg"}
+
+    monkeypatch.setattr(fetch_book_covers, "resolve_images", resolve_images)
+    return asked
+
+
+def engine_for(responses):
+    transport = ScriptedTransport(responses)
+    rates = {"covers.openlibrary.org": 1000.0, "commons.wikimedia.org": 1000.0}
+    return FetchEngine(transport=transport, rate_limits=rates), transport
+
+
+def test_open_library_cover_is_downloaded(resolved, tmp_path):
+    engine, transport = engine_for([(200, {"Content-Type": "image/jpeg"}, jpeg())])
+    assert engine.call(fetch_cover(engine, BOOK, COVER, None, None)) == "saved"
+    assert (tmp_path / "images/books/beowulf.jpg").exists()
+    assert [r.url for r in transport.requests] == [COVER]
+    assert resolved == []
+
+
+def test_failed_open_library_download_falls_back_to_wikimedia(resolved, tmp_path):
+    engine, transport = engine_for([
+        (200, {"Content-Type": "text/html"}, "<html>no cover</html>"),
+        (200, {"Content-Type": "image/jpeg"}, jpeg()),
+    ])
+    assert engine.call(fetch_cover(engine, BOOK, COVER, None, None)) == "saved"
+    assert (tmp_path / "images/books/beowulf.jpg").exists()
+    assert resolved == ["Beowulf"]
+    assert "Beowulf_Cotton_MS.jpg" in transport.requests[1].url
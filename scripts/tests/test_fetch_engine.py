@@ -0,0 +1,155 @@
+import json
+
+import pytest
+import requests
+
+import fetch_engine
+from fetch_engine import DownloadError, FetchEngine, RetryableError, _backoff, _retry_after
+from stubs import ScriptedTransport, jpeg
+
+API = "https://en.wikipedia.org/w/api.php"
+IMAGE = "https://upload.wikimedia.org/a.jpg"
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Record the (attempt, Retry-After) of every backoff instead of sleeping it."""
+    calls = []
+
+    def backoff(attempt, retry_after=None):
+        calls.append((attempt, retry_after))
+        return 0.0
+
+    monkeypatch.setattr(fetch_engine, "_backoff", backoff)
+    return calls
+
+
+def engine_for(responses, **kwargs):
+    transport = ScriptedTransport(responses)
+    # Fast buckets, so a throttled host only pauses for its Retry-After
+    rates = {"en.wikipedia.org": 1000.0, "upload.wikimedia.org": 1000.0}
+    return FetchEngine(transport=transport, rate_limits=rates, **kwargs), transport
+
+
+# --------------------------------------------------------------------------- #
+# Retries
+# --------------------------------------------------------------------------- #
+def test_throttled_request_is_retried_with_retry_after(no_backoff):
+    engine, transport = engine_for([
+        (429, {"Retry-After": "0.01"}, ""),
+        (502, {}, ""),
+        (200, {"Content-Type": "application/json"}, '{"ok": 1}'),
+    ])
+    assert engine.call(engine.get_json(API, params={"action": "query"})) == {"ok": 1}
+    assert no_backoff == [(0, 0.01), (1, None)]
+    assert engine.stats == {"requests": 3, "throttled": 1, "retried": 2}
+    assert "maxlag=5" in transport.requests[0].url
+
+
+def test_connection_errors_are_retried():
+    engine, _ = engine_for([requests.ConnectionError("reset"),
+                            (200, {}, '{"ok": 1}')])
+    assert engine.call(engine.get_json(API)) == {"ok": 1}
+    assert engine.stats["retried"] == 1
+
+
+def test_maxlag_refusal_with_http_200_is_retried(no_backoff):
+    maxlag = json.dumps({"error": {"code": "maxlag", "info": "Waiting for a database server"}})
+    engine, _ = engine_for([
+        (200, {"Retry-After": "0.02", "MediaWiki-API-Error": "maxlag"}, maxlag),
+        (200, {}, maxlag),  # code in the body only
+        (200, {}, '{"query": {}}'),
+    ])
+    assert engine.call(engine.get_json(API)) == {"query": {}}
+    assert no_backoff == [(0, 0.02), (1, None)]
+    assert engine.stats["throttled"] == 2
+
+
+def test_gives_up_after_max_retries():
+    engine, transport = engine_for([(503, {}, "")] * 3, max_retries=2)
+    with pytest.raises(RetryableError):
+        engine.call(engine.get_json(API))
+    assert len(transport.requests) == 3
+    assert engine.stats["failed"] == 1
+
+
+def test_client_errors_are_not_retried():
+    engine, transport = engine_for([(404, {}, "")])
+    with pytest.raises(requests.HTTPError):
+        engine.call(engine.get_json(API))
+    assert len(transport.requests) == 1
+
+
+def test_retry_after_and_backoff():
+    assert _retry_after("3") == 3.0
+    assert _retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # in the past
+    assert _retry_after("soon") is None and _retry_after(None) is None
+    # The real _backoff (the fixture only patches the module attribute)
+    assert all(0 <= _backoff(n) <= min(fetch_engine.BACKOFF_MAX, 2 ** n) for n in range(10))
+    assert _backoff(0, retry_after=7.5) == 7.5
+
+
+# --------------------------------------------------------------------------- #
+# Downloads
+# --------------------------------------------------------------------------- #
+def test_download_validates_and_renames(tmp_path):
+    data = jpeg()
+    engine, _ = engine_for([(200, {"Content-Type": "image/jpeg", "Content-Length": str(len(data))}, data)])
+    dest = tmp_path / "a.jpg"
+    assert engine.call(engine.download(IMAGE, dest)) is True
+    assert dest.read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.jpg"]
+    # Already on disk: nothing is requested
+    assert engine.call(engine.download(IMAGE, dest)) is False
+
+
+def test_interrupted_download_resumes_with_range_and_if_range(tmp_path):
+    data = jpeg((200, 150))
+    half = len(data) // 2
+    headers = {"Content-Type": "image/jpeg", "ETag": '"v1"'}
+    engine, transport = engine_for([
+        (200, {**headers, "Content-Length": str(len(data))}, data[:half]),  # connection cut short
+        (206, {**headers, "Content-Range": f"bytes {half}-{len(data) - 1}/{len(data)}"}, data[half:]),
+    ])
+    dest = tmp_path / "a.jpg"
+    with pytest.raises(DownloadError, match="truncated"):
+        engine.call(engine.download(IMAGE, dest))
+    assert not dest.exists()
+    assert (tmp_path / "a.jpg.part").read_bytes() == data[:half]
+
+    assert engine.call(engine.download(IMAGE, dest)) is True
+    resumed = transport.requests[1].headers
+    assert resumed["Range"] == f"bytes={half}-" and resumed["If-Range"] == '"v1"'
+    assert dest.read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.jpg"]
+
+
+def test_changed_upstream_file_restarts_from_scratch(tmp_path):
+    old, new = jpeg((200, 150)), jpeg((60, 60))
+    engine, transport = engine_for([
+        (200, {"Content-Type": "image/jpeg", "ETag": '"v1"', "Content-Length": str(len(old))}, old[:100]),
+        # If-Range did not match: the server sends the whole new file
+        (200, {"Content-Type": "image/jpeg", "ETag": '"v2"', "Content-Length": str(len(new))}, new),
+    ])
+    dest = tmp_path / "a.jpg"
+    with pytest.raises(DownloadError):
+        engine.call(engine.download(IMAGE, dest))
+    assert engine.call(engine.download(IMAGE, dest)) is True
+    assert "Range" in transport.requests[1].headers
+    assert dest.read_bytes() == new
+
+
+def test_wrong_content_type_is_rejected(tmp_path):
+    engine, _ = engine_for([(200, {"Content-Type": "text/html"}, "<html>rate limited</html>")])
+    dest = tmp_path / "a.jpg"
+    with pytest.raises(DownloadError, match="Content-Type"):
+        engine.call(engine.download(IMAGE, dest))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_undecodable_body_is_rejected_and_discarded(tmp_path):
+    engine, _ = engine_for([(200, {"Content-Type": "image/jpeg", "Content-Length": "9"}, "not a jpg")])
+    dest = tmp_path / "a.jpg"
+    with pytest.raises(DownloadError, match="decodable"):
+        engine.call(engine.download(IMAGE, dest))
+    assert list(tmp_path.iterdir()) == []
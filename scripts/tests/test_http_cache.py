@@ -0,0 +1,150 @@
+import argparse
+import json
+
+import pytest
+
+import http_cache
+from fetch_engine import FetchEngine
+from http_cache import DAY, NEGATIVE_TTL, POSITIVE_TTL, MetadataCache, add_cache_args, cache_from_args
+from stubs import ScriptedTransport
+from wikimedia import P_BORN, P_GENDER, P_IMAGE, fetch_claims
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable time.time() for the cache, starting at day 1000."""
+    now = [1000 * DAY]
+    monkeypatch.setattr(http_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = MetadataCache(tmp_path / "cache.sqlite")
+    yield c
+    c.close()
+
+
+def test_positive_entries_expire_after_their_ttl(cache, clock):
+    cache.put_many("pageprops", {"Plato": "Q859"})
+    clock[0] += POSITIVE_TTL - 1
+    assert cache.get_many("pageprops", ["Plato"]) == {"Plato": "Q859"}
+    clock[0] += 2
+    assert cache.get_many("pageprops", ["Plato"]) == {}
+
+
+def test_negatives_are_cached_with_the_short_ttl(cache, clock):
+    cache.put_many("pageprops", {"Nobody": None, "Plato": "Q859"})
+    clock[0] += NEGATIVE_TTL - 1
+    assert cache.get_many("pageprops", ["Nobody", "Plato"]) == {"Nobody": None, "Plato": "Q859"}
+    clock[0] += 2
+    assert cache.get_many("pageprops", ["Nobody", "Plato"]) == {"Plato": "Q859"}
+
+
+def test_explicit_ttl_wins(cache, clock):
+    cache.put_many("wbgetentities", {"Q1": {"P18": []}}, ttl=NEGATIVE_TTL)
+    clock[0] += NEGATIVE_TTL + 1
+    assert cache.get_many("wbgetentities", ["Q1"]) == {}
+
+
+def test_hits_and_misses_are_counted(cache, clock):
+    cache.put_many("pageprops", {"Plato": "Q859"})
+    cache.get_many("pageprops", ["Plato", "Plato", "Kant"])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_survive_reopening(tmp_path, clock):
+    first = MetadataCache(tmp_path / "cache.sqlite")
+    first.put_many("pageprops", {"Plato": "Q859"})
+    first.close()
+    second = MetadataCache(tmp_path / "cache.sqlite")
+    assert second.get_many("pageprops", ["Plato"]) == {"Plato": "Q859"}
+    second.close()
+
+
+def test_validators_become_conditional_headers(cache, clock):
+    assert cache.validators("download", "u") == {}
+    cache.put_validators("download", "u", '"abc"', "Tue, 01 Jan 2030 00:00:00 GMT")
+    assert cache.validators("download", "u") == {
+        "If-None-Match": '"abc"', "If-Modified-Since": "Tue, 01 Jan 2030 00:00:00 GMT"}
+
+
+# --------------------------------------------------------------------------- #
+# --refresh / --max-age
+# --------------------------------------------------------------------------- #
+def cache_for(tmp_path, monkeypatch, argv):
+    monkeypatch.setattr(http_cache, "CACHE_PATH", tmp_path / "cache.sqlite")
+    parser = argparse.ArgumentParser()
+    add_cache_args(parser)
+    return cache_from_args(parser.parse_args(argv))
+
+
+def test_max_age_caps_the_ttl(tmp_path, monkeypatch, clock):
+    cache = cache_for(tmp_path, monkeypatch, ["--max-age", "2"])
+    cache.put_many("pageprops", {"Plato": "Q859"})
+    clock[0] += 2 * DAY - 1
+    assert cache.get_many("pageprops", ["Plato"]) == {"Plato": "Q859"}
+    clock[0] += 2
+    assert cache.get_many("pageprops", ["Plato"]) == {}
+    cache.close()
+
+
+def test_refresh_skips_reads_but_still_writes(tmp_path, monkeypatch, clock):
+    cache = cache_for(tmp_path, monkeypatch, ["--refresh"])
+    cache.put_many("pageprops", {"Plato": "Q859"})
+    assert cache.get_many("pageprops", ["Plato"]) == {}
+    assert cache.misses == 1
+    cache.close()
+
+    cache = cache_for(tmp_path, monkeypatch, [])
+    assert cache.get_many("pageprops", ["Plato"]) == {"Plato": "Q859"}
+    cache.close()
+
+
+def test_no_cache(tmp_path, monkeypatch):
+    assert cache_for(tmp_path, monkeypatch, ["--no-cache"]) is None
+    assert not (tmp_path / "cache.sqlite").exists()
+
+
+# --------------------------------------------------------------------------- #
+# fetch_claims
+# --------------------------------------------------------------------------- #
+def entities(**claims):
+    """A wbgetentities response: entities(Q1={"P18": ["a.jpg"]})."""
+    return (200, {"Content-Type": "application/json"}, json.dumps({"entities": {
+        qid: {"claims": {pid: [{"mainsnak": {"snaktype": "value", "datavalue": {"value": v}}}
+                               for v in values]
+                         for pid, values in props.items()}}
+        for qid, props in claims.items()}}))
+
+
+def test_fetch_claims_merges_partial_cached_rows(cache, clock):
+    born = {"time": "+1879-03-14T00:00:00Z", "precision": 11}
+    male = {"entity-type": "item", "id": "Q6581097"}
+    cache.put_many("wbgetentities", {"Q937": {P_IMAGE: ["Einstein.jpg"], P_GENDER: [male]},
+                                     "Q859": {P_IMAGE: ["Plato.jpg"], P_BORN: []}})
+    transport = ScriptedTransport([entities(Q937={P_IMAGE: ["Einstein.jpg"], P_BORN: [born]})])
+    engine = FetchEngine(cache=cache, transport=transport)
+
+    claims = engine.call(fetch_claims(engine, ["Q937", "Q859"], (P_IMAGE, P_BORN)))
+
+    # Only the row missing P569 is fetched; the complete one is served from the cache
+    assert len(transport.requests) == 1
+    assert "ids=Q937&" in transport.requests[0].url
+    assert claims == {"Q937": {P_IMAGE: ["Einstein.jpg"], P_BORN: [born]},
+                      "Q859": {P_IMAGE: ["Plato.jpg"], P_BORN: []}}
+    # The rewritten row keeps the cached P21 that was not asked for this time
+    assert cache.get_many("wbgetentities", ["Q937"]) == {
+        "Q937": {P_IMAGE: ["Einstein.jpg"], P_GENDER: [male], P_BORN: [born]}}
+
+
+def test_fetch_claims_caches_unknown_and_empty_entities_with_the_short_ttl(cache, clock):
+    transport = ScriptedTransport([entities(Q1={}, Q3={P_IMAGE: ["a.jpg"]})])
+    engine = FetchEngine(cache=cache, transport=transport)
+
+    assert engine.call(fetch_claims(engine, ["Q1", "Q2", "Q3"])) == {
+        "Q1": {P_IMAGE: []}, "Q3": {P_IMAGE: ["a.jpg"]}}
+    assert cache.get_many("wbgetentities", ["Q1", "Q2", "Q3"]) == {
+        "Q1": {P_IMAGE: []}, "Q2": None, "Q3": {P_IMAGE: ["a.jpg"]}}
+    clock[0] += NEGATIVE_TTL + 1
+    assert cache.get_many("wbgetentities", ["Q1", "Q2", "Q3"]) == {"Q3": {P_IMAGE: ["a.jpg"]}}
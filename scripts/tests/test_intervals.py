@@ -0,0 +1,79 @@
+import json
+import random
+
+import pytest
+
+from intervals import DATA_DIR, DATASETS, IntervalTree, contemporaries, span
+
+
+def random_intervals(rng, n, lo=-500, hi=500):
+    intervals = []
+    for k in range(n):
+        start = rng.randint(lo, hi)
+        intervals.append((start, start + rng.choice([0, 0, rng.randint(0, 50), rng.randint(0, 400)]), k))
+    return intervals
+
+
+def scan_stab(intervals, t):
+    return sorted(v for s, e, v in intervals if s <= t <= e)
+
+
+def scan_overlap(intervals, a, b):
+    a, b = min(a, b), max(a, b)
+    return sorted(v for s, e, v in intervals if s <= b and e >= a)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_stab_and_overlap_match_a_linear_scan(seed):
+    rng = random.Random(seed)
+    intervals = random_intervals(rng, rng.choice([0, 1, 5, 50, 400]))
+    tree = IntervalTree(intervals)
+    assert len(tree) == len(intervals)
+    for _ in range(100):
+        t = rng.randint(-700, 1000)
+        found = tree.stab(t)
+        assert sorted(found) == scan_stab(intervals, t)
+        assert len(found) == len(set(found))
+        a, b = rng.randint(-700, 1000), rng.randint(-700, 1000)
+        found = tree.overlap(a, b)
+        assert sorted(found) == scan_overlap(intervals, a, b)
+        assert len(found) == len(set(found))
+
+
+def test_endpoints_are_inclusive():
+    tree = IntervalTree([(10, 20, "a"), (20, 20, "b"), (21, 30, "c")])
+    assert tree.stab(20) == ["a", "b"]
+    assert tree.stab(21) == ["c"]
+    assert tree.overlap(0, 10) == ["a"]
+    assert tree.overlap(30, 21) == ["c"]
+
+
+@pytest.mark.parametrize("name", DATASETS)
+def test_real_datasets_match_a_linear_scan(name):
+    records = json.loads((DATA_DIR / f"{name}.json").read_text())
+    tree = IntervalTree.from_dataset(name, records)
+    intervals = [(*span(name, r), r["id"]) for r in records]
+    years = sorted({y for s, e, _ in intervals for y in (s - 1, s, e, e + 1)})
+    for t in years[::max(1, len(years) // 200)]:
+        assert sorted(r["id"] for _, r in tree.stab(t)) == scan_stab(intervals, t)
+        assert sorted(r["id"] for _, r in tree.overlap(t, t + 75)) == scan_overlap(intervals, t, t + 75)
+
+
+@pytest.mark.parametrize("min_overlap", [0, 1, 10, 40])
+def test_contemporaries_match_every_pair(min_overlap):
+    rng = random.Random(min_overlap)
+    people = []
+    for k in range(150):
+        born = rng.randint(1700, 2000)
+        people.append({"id": f"p{k}", "born": born,
+                       "died": None if born > 1950 and rng.random() < 0.5 else born + rng.randint(0, 90)})
+    people += json.loads((DATA_DIR / "people.json").read_text())
+
+    table = contemporaries(people, min_overlap)
+    spans = {p["id"]: span("people", p) for p in people}
+    for person in people:
+        born, died = spans[person["id"]]
+        expected = sorted(
+            other["id"] for other in people if other is not person
+            and min(died, spans[other["id"]][1]) - max(born, spans[other["id"]][0]) >= min_overlap)
+        assert sorted(table[person["id"]]) == expected, person["id"]
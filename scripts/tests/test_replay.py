@@ -0,0 +1,118 @@
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+import replay
+from replay import CassetteAdapter, CassetteMiss, request_key
+from stubs import jpeg
+
+API = "https://en.wikipedia.org/w/api.php"
+IMAGE = "https://upload.wikimedia.org/a.jpg"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Stand in for the network behind record mode; returns the URLs it served."""
+    served = []
+    bodies = {API: (b'{"query": {"pages": []}}', "application/json"), IMAGE: (jpeg(), "image/jpeg")}
+
+    def send(self, request, **kwargs):
+        served.append(request.url)
+        body, content_type = bodies[request.url.split("?")[0]]
+        response = requests.Response()
+        response.status_code, response._content = 200, body
+        response.headers.update({"Content-Type": content_type, "Content-Encoding": "gzip"})
+        response.request, response.url = request, request.url
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    return served
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(replay.time, "sleep", calls.append)
+    return calls
+
+
+def session(adapter):
+    s = requests.Session()
+    s.mount("https://", adapter)
+    return s
+
+
+def test_record_then_replay_returns_the_same_bytes(tmp_path, upstream):
+    recorder = CassetteAdapter(tmp_path, "record")
+    recorded = [session(recorder).get(url, params={"b": 2, "a": 1}) for url in (API, IMAGE)]
+    assert recorder.stats == {"recorded": 2}
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+    player = CassetteAdapter(tmp_path, "replay")
+    s = session(player)
+    # The key sorts the query, so parameter order does not matter
+    replayed = [s.get(url, params={"a": 1, "b": 2}) for url in (API, IMAGE)]
+    assert player.stats == {"replayed": 2}
+    assert len(upstream) == 2
+    for before, after in zip(recorded, replayed):
+        assert after.status_code == 200
+        assert after.content == before.content
+        assert after.headers["Content-Type"] == before.headers["Content-Type"]
+        # The stored body is already decoded, so the wire encoding is not replayed
+        assert "Content-Encoding" not in after.headers
+
+
+def test_replay_raises_for_unrecorded_requests(tmp_path):
+    player = CassetteAdapter(tmp_path, "replay")
+    with pytest.raises(CassetteMiss):
+        session(player).get(API, params={"titles": "Plato"})
+    assert player.stats == {"misses": 1}
+
+
+def test_key_covers_response_shaping_headers():
+    plain = requests.Request("GET", IMAGE).prepare()
+    ranged = requests.Request("GET", IMAGE, headers={"Range": "bytes=10-"}).prepare()
+    other = requests.Request("GET", IMAGE, headers={"User-Agent": "x"}).prepare()
+    assert request_key(plain) != request_key(ranged)
+    assert request_key(plain) == request_key(other)
+
+
+def injected(tmp_path, upstream, seed, n=40):
+    """Which of n distinct requests failed, and how, under error_rate 0.5."""
+    adapter = CassetteAdapter(tmp_path, "record", error_rate=0.5, seed=seed)
+    s = session(adapter)
+    outcomes = []
+    for i in range(n):
+        try:
+            outcomes.append(s.get(API, params={"i": i}).status_code)
+        except requests.ConnectionError:
+            outcomes.append("dropped")
+    return outcomes, adapter
+
+
+def test_same_seed_fails_the_same_requests(tmp_path, upstream):
+    first, adapter = injected(tmp_path, upstream, seed=7)
+    second, _ = injected(tmp_path, upstream, seed=7)
+    other, _ = injected(tmp_path, upstream, seed=8)
+    assert first == second
+    assert first != other
+    assert {503, "dropped", 200} <= set(first)
+    assert adapter.stats["injected_errors"] == sum(o != 200 for o in first)
+
+
+def test_injected_503_asks_for_an_immediate_retry(tmp_path, upstream):
+    outcomes, _ = injected(tmp_path, upstream, seed=7)
+    adapter = CassetteAdapter(tmp_path, "record", error_rate=0.5, seed=7)
+    r = session(adapter).get(API, params={"i": outcomes.index(503)})
+    assert (r.status_code, r.headers["Retry-After"]) == (503, "0")
+
+
+def test_latency_and_jitter_are_slept(tmp_path, sleeps, upstream):
+    session(CassetteAdapter(tmp_path, "record", latency=0.25)).get(API)
+    assert sleeps == [0.25]
+
+    session(CassetteAdapter(tmp_path, "replay", latency=0.25, jitter=0.1, seed=1)).get(API)
+    assert 0.15 <= sleeps[1] <= 0.35
+    again = CassetteAdapter(tmp_path, "replay", latency=0.25, jitter=0.1, seed=1)
+    session(again).get(API)
+    assert sleeps[2] == sleeps[1]
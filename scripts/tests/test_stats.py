@@ -0,0 +1,104 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from stats import CENTURY, DECADE, event_stats, histogram, people_stats, running_count, tag_matrix, year_column
+
+
+def plain_histogram(years, step, weights=None):
+    if not years:
+        return {"from": 0, "step": step, "counts": []}
+    weights = weights or [1] * len(years)
+    lo, hi = min(y // step for y in years), max(y // step for y in years)
+    counts = [0] * (hi - lo + 1)
+    for year, weight in zip(years, weights):
+        counts[year // step - lo] += weight
+    return {"from": lo * step, "step": step, "counts": counts}
+
+
+def plain_running_count(spans, step):
+    if not spans:
+        return {"from": 0, "step": step, "counts": []}
+    lo = min(s // step for s, _ in spans)
+    hi = max(e // step for _, e in spans)
+    counts = [sum(s // step <= bucket <= e // step for s, e in spans) for bucket in range(lo, hi + 1)]
+    return {"from": lo * step, "step": step, "counts": counts}
+
+
+def random_spans(rng, n):
+    spans = []
+    for _ in range(n):
+        start = rng.randint(-3000, 2020)
+        spans.append((start, start + rng.choice([0, rng.randint(0, 9), rng.randint(0, 300)])))
+    return spans
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("step", [DECADE, CENTURY, 7])
+def test_histogram_matches_a_loop(seed, step):
+    rng = random.Random(seed)
+    years = [rng.randint(-5000, 2025) for _ in range(rng.choice([0, 1, 5, 200]))]
+    weights = [rng.randint(0, 1) for _ in years]
+    assert histogram(np.array(years, dtype=np.int64), step) == plain_histogram(years, step)
+    assert histogram(np.array(years, dtype=np.int64), step, weights=np.array(weights, dtype=bool)) == \
+        plain_histogram(years, step, weights)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("step", [DECADE, CENTURY])
+def test_running_count_matches_a_loop(seed, step):
+    rng = random.Random(seed)
+    spans = random_spans(rng, rng.choice([0, 1, 5, 200]))
+    starts = np.array([s for s, _ in spans], dtype=np.int64)
+    ends = np.array([e for _, e in spans], dtype=np.int64)
+    assert running_count(starts, ends, step) == plain_running_count(spans, step)
+
+
+EVENTS = [
+    {"id": "a", "start": -3100, "end": -2900, "tags": ["writing", "state"]},
+    {"id": "b", "start": -2560, "end": -2560, "tags": ["state"]},
+    {"id": "c", "start": -44, "end": 476, "tags": ["state", "war"]},
+    {"id": "d", "start": 1969, "end": 1969},
+    {"id": "e", "start": 1914, "end": 1918, "tags": ["war"]},
+]
+
+
+def event_columns(records):
+    matrix, names = tag_matrix(records)
+    return {"start": year_column(records, "start"), "end": year_column(records, "end"),
+            "tags": matrix, "tag_names": names}
+
+
+def test_event_tags_and_centuries_match_a_loop():
+    stats = event_stats(event_columns(EVENTS))
+    tags = Counter(t for e in EVENTS for t in e.get("tags", []))
+    assert stats["count"] == len(EVENTS)
+    assert stats["tags"] == dict(tags)
+    assert list(stats["tags"].values()) == sorted(tags.values(), reverse=True)
+    assert stats["starts"] == plain_histogram([e["start"] for e in EVENTS], CENTURY)
+    assert stats["ongoing"] == plain_running_count([(e["start"], e["end"]) for e in EVENTS], CENTURY)
+    assert event_stats(event_columns(EVENTS), by_century=False).keys() == {"count", "tags"}
+
+
+def test_people_per_century_and_gender_match_a_loop():
+    rng = random.Random(3)
+    people = []
+    for _ in range(300):
+        born = rng.randint(-800, 1950)
+        people.append({"born": born, "died": born + rng.randint(20, 95), "gender": rng.randint(0, 1)})
+    col = {"born": year_column(people, "born"), "died": year_column(people, "died"),
+           "alive": np.zeros(len(people), dtype=bool), "gender": year_column(people, "gender")}
+    stats = people_stats(col)
+
+    births = [p["born"] for p in people]
+    by_century = stats["gender"]["byCentury"]
+    assert stats["births"] == plain_histogram(births, CENTURY)
+    assert by_century["women"] == plain_histogram(births, CENTURY, [p["gender"] == 0 for p in people])["counts"]
+    assert by_century["men"] == plain_histogram(births, CENTURY, [p["gender"] == 1 for p in people])["counts"]
+    assert stats["alive"] == plain_running_count([(p["born"], p["died"]) for p in people], DECADE)
+    assert stats["gender"]["women"] == sum(p["gender"] == 0 for p in people)
+    lifespans = [p["died"] - p["born"] for p in people]
+    assert stats["lifespan"]["histogram"] == plain_histogram(lifespans, 10)
+    assert stats["lifespan"]["mean"] == round(sum(lifespans) / len(lifespans), 1)
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import validate_data
+from validate_data import validate
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """An empty data dir plus static/ and docs/ image roots under tmp_path."""
+    data = tmp_path / "src/lib/data"
+    data.mkdir(parents=True)
+    monkeypatch.setattr(validate_data, "ROOT_DIR", tmp_path)
+    monkeypatch.setattr(validate_data, "DATA_DIR", data)
+    monkeypatch.setattr(validate_data, "IMAGE_ROOTS", (tmp_path / "static", tmp_path / "docs"))
+    return tmp_path
+
+
+def write(tree, filename, records):
+    (tree / "src/lib/data" / filename).write_text(json.dumps(records))
+
+
+def image(tree, path, size=100, roots=("static", "docs")):
+    for root in roots:
+        file = tree / root / path.lstrip("/")
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_bytes(b"\0" * size)
+
+
+def event(id, start, end, kind="range"):
+    return {"id": id, "title": id.title(), "kind": kind, "start": start, "end": end}
+
+
+def person(id, born=-428, died=-348):
+    return {"id": id, "name": id.title(), "born": born, "died": died,
+            "image": f"/images/people/{id}.jpg", "gender": 1}
+
+
+def errors(problems):
+    return [(where, message) for level, where, message in problems if level == "error"]
+
+
+def test_clean_datasets_pass(tree):
+    write(tree, "humanity.json", [event("writing", -3400, -3100), event("moon", 1969, 1969, "point")])
+    write(tree, "people.json", [person("plato")])
+    image(tree, "/images/people/plato.jpg")
+    assert validate("humanity", 1024) == []
+    assert validate("people", 1024) == []
+    assert validate_data.main(["humanity", "people"]) == 0
+
+
+def test_start_after_end(tree):
+    write(tree, "cosmic.json", [event("oops", 10, 5)])
+    assert errors(validate("cosmic", 1024)) == [("cosmic.json[0] oops", "start 10 is after end 5")]
+    assert validate_data.main(["cosmic"]) == 1
+
+
+def test_born_after_died(tree):
+    write(tree, "people.json", [person("plato", born=-348, died=-428)])
+    image(tree, "/images/people/plato.jpg")
+    assert errors(validate("people", 1024)) == [("people.json[0] plato", "born -348 is after died -428")]
+
+
+def test_duplicate_id(tree):
+    write(tree, "humanity.json", [event("writing", -3400, -3100), event("writing", -3200, -3000)])
+    assert errors(validate("humanity", 1024)) == [
+        ("humanity.json[1] writing", "duplicate id (first at [0])")]
+
+
+def test_image_missing_from_docs(tree):
+    write(tree, "people.json", [person("plato")])
+    image(tree, "/images/people/plato.jpg", roots=("static",))
+    assert errors(validate("people", 1024)) == [
+        ("people.json[0] plato", "image missing: docs/images/people/plato.jpg")]
+
+
+def test_image_over_budget(tree):
+    write(tree, "people.json", [person("plato")])
+    image(tree, "/images/people/plato.jpg", size=3 * 1024)
+    assert errors(validate("people", 2 * 1024)) == [
+        ("people.json[0] plato", "image over budget: static/images/people/plato.jpg 3 KB > 2 KB"),
+        ("people.json[0] plato", "image over budget: docs/images/people/plato.jpg 3 KB > 2 KB"),
+    ]
+    assert validate_data.main(["people"], max_image_kb=2) == 1
+
+
+def test_schema_errors_and_unknown_fields(tree):
+    bad = {**person("plato"), "gender": 2, "born": "428 BC", "nmae": "typo"}
+    write(tree, "people.json", [bad])
+    image(tree, "/images/people/plato.jpg")
+    problems = validate("people", 1024)
+    assert errors(problems) == [
+        ("people.json[0] plato", "'born' should be int, got \"428 BC\""),
+        ("people.json[0] plato", "'gender' is 2, expected one of [0, 1]"),
+    ]
+    assert ("warning", "people.json[0] plato", "unknown field 'nmae'") in problems
+    assert validate_data.main(["people"]) == 1
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+validate_data.py
+Check every timeline dataset in one pass, fast enough to gate each commit.
+
+How it works
+------------
+1. Schema         : each record's fields are checked against SCHEMAS (type, required,
+                    allowed values); unknown fields are warnings (likely typos)
+2. Ranges         : born <= died for people, start <= end for events (and start == end
+                    for `kind: "point"`)
+3. Ids            : duplicate ids within a dataset are errors
+4. Images         : every `image` must exist under static/ and docs/ (the built site)
+                    and stay within the size budget (--max-image-kb)
+
+Only json.load and os.stat are used - no Pillow, no network - so the whole run
+takes a few milliseconds. Exits 1 if any error was found.
+
+Usage: python scripts/validate_data.py [people books ...] [--max-image-kb 1024] [--strict]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+DATA_DIR = ROOT_DIR / "src" / "lib" / "data"
+IMAGE_ROOTS = (ROOT_DIR / "static", ROOT_DIR / "docs")
+
+MAX_IMAGE_KB = 1024  # downsample.py's default target
+
+INT = (int,)
+NUMBER = (int, float)
+STR = (str,)
+
+# field → (accepted types, required, allowed values or None); None in the types = nullable
+EVENT = {
+    "id":        (STR, True, None),
+    "title":     (STR, True, None),
+    "subtitle":  (STR, False, None),
+    "kind":      (STR, True, {"point", "range"}),
+    "start":     (NUMBER, True, None),
+    "end":       (NUMBER, True, None),
+    "approx":    ((bool,), False, None),
+    "labelTime": (STR, False, None),
+    "tags":      ((list,), False, None),
+    "region":    (STR, False, None),
+}
+SCHEMAS = {
+    "people": ("people.json", {
+        "id":     (STR, True, None),
+        "name":   (STR, True, None),
+        "born":   (INT, True, None),
+        "died":   (INT + (type(None),), True, None),  # null = still alive
+        "image":  (STR, True, None),
+        "gender": (INT, True, {0, 1}),
+    }, ("born", "died")),
+    "books": ("books.json", {
+        "id":        (STR, True, None),
+        "title":     (STR, True, None),
+        "author":    (STR, True, None),
+        "published": (INT, True, None),
+        "image":     (STR, True, None),
+    }, None),
+    "artworks": ("artworks.json", {
+        "id":      (STR, True, None),
+        "title":   (STR, True, None),
+        "artist":  (STR, True, None),
+        "created": (INT, True, None),
+        "image":   (STR, True, None),
+    }, None),
+    "cosmic":   ("cosmic.json", EVENT, ("start", "end")),
+    "humanity": ("humanity.json", EVENT, ("start", "end")),
+}
+
+
+def check_record(record, schema, span, max_image_bytes):
+    """Yield (level, message) for one record."""
+    if not isinstance(record, dict):
+        yield "error", f"expected an object, got {type(record).__name__}"
+        return
+
+    for field, (types, required, allowed) in schema.items():
+        if field not in record:
+            if required:
+                yield "error", f"missing '{field}'"
+            continue
+        value = record[field]
+        # bool is an int subclass: only accept it where bool is asked for
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            expected = "/".join("null" if t is type(None) else t.__name__ for t in types)
+            yield "error", f"'{field}' should be {expected}, got {json.dumps(value)}"
+        elif allowed and value not in allowed:
+            yield "error", f"'{field}' is {json.dumps(value)}, expected one of {sorted(allowed)}"
+    for field in record.keys() - schema.keys():
+        yield "warning", f"unknown field '{field}'"
+
+    tags = record.get("tags")
+    if isinstance(tags, list) and not all(isinstance(t, str) for t in tags):
+        yield "error", "'tags' should only hold strings"
+
+    if span:
+        lo, hi = (record.get(f) for f in span)
+        if isinstance(lo, (int, float)) and isinstance(hi, (int, float)):
+            if lo > hi:
+                yield "error", f"{span[0]} {lo} is after {span[1]} {hi}"
+            elif record.get("kind") == "point" and lo != hi:
+                yield "error", f"point event with start {lo} != end {hi}"
+
+    image = record.get("image")
+    if isinstance(image, str):
+        for root in IMAGE_ROOTS:
+            path = root / image.lstrip("/")
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                yield "error", f"image missing: {path.relative_to(ROOT_DIR)}"
+                continue
+            if size > max_image_bytes:
+                yield "error", (f"image over budget: {path.relative_to(ROOT_DIR)} "
+                                f"{size / 1024:.0f} KB > {max_image_bytes / 1024:.0f} KB")
+
+
+def validate(name, max_image_bytes):
+    """Return [(level, location, message)] for one dataset."""
+    filename, schema, span = SCHEMAS[name]
+    path = DATA_DIR / filename
+    try:
+        records = json.loads(path.read_text())
+    except (OSError, ValueError) as e:
+        return [("error", filename, f"cannot read: {e}")]
+    if not isinstance(records, list):
+        return [("error", filename, "expected a JSON list")]
+
+    problems = []
+    seen = {}
+    for n, record in enumerate(records):
+        record_id = record.get("id") if isinstance(record, dict) else None
+        where = f"{filename}[{n}]" + (f" {record_id}" if record_id else "")
+        if record_id is not None:
+            if record_id in seen:
+                problems.append(("error", where, f"duplicate id (first at [{seen[record_id]}])"))
+            else:
+                seen[record_id] = n
+        problems.extend((level, where, message)
+                        for level, message in check_record(record, schema, span, max_image_bytes))
+    return problems
+
+
+def main(names, max_image_kb=MAX_IMAGE_KB, strict=False):
+    start = time.perf_counter()
+    counts = {"error": 0, "warning": 0}
+    for name in names:
+        for level, where, message in validate(name, max_image_kb * 1024):
+            counts[level] += 1
+            print(f"{'❌' if level == 'error' else '⚠️ '} {where}: {message}")
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{len(names)} datasets checked in {elapsed:.0f}ms: "
+          f"{counts['error']} errors, {counts['warning']} warnings")
+    return 1 if counts["error"] or (strict and counts["warning"]) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the timeline datasets")
+    parser.add_argument("datasets", nargs="*", metavar="dataset",
+                        help=f"any of {', '.join(SCHEMAS)} (default: all)")
+    parser.add_argument("--max-image-kb", type=int, default=MAX_IMAGE_KB,
+                        help=f"size budget per image in KB (default {MAX_IMAGE_KB})")
+    parser.add_argument("--strict", action="store_true", help="treat warnings as errors")
+    args = parser.parse_args()
+    unknown = set(args.datasets) - set(SCHEMAS)
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(sorted(unknown))}")
+    sys.exit(main(args.datasets or list(SCHEMAS), args.max_image_kb, args.strict))
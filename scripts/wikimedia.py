@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+wikimedia.py
+Shared Wikimedia client: every script (fetch_*, add_person, get_img) goes through
+these lookups and the FetchEngine they run on, so tuning happens in one place.
+
+How it works
+------------
+1. Overrides      : map a raw name → an unambiguous page title or a ready Q-id
+2. Q-id passthru  : anything that already looks like "Q1234" skips the network
+3. Batching       : up to 50 titles per action=query&prop=pageprops request
+4. Matching       : the `normalized` and `redirects` maps walk each answer back
+                    to the title we were asked about
+5. Claims         : up to 50 Q-ids per wbgetentities request with props=claims,
+                    so labels/sitelinks/descriptions never cross the wire;
+                    person_facts turns P569/P570/P21 into people.json years/gender
+6. Cache          : when the engine carries a MetadataCache, fresh answers (including
+                    "no Q-id" / "no P18") are served from disk and only misses are batched
+7. Commons file   : resolve File:… to a real image URL via Special:FilePath and
+                    download it through the engine (validated, atomic)
+"""
+
+import asyncio
+import pathlib
+import re
+from urllib.parse import quote
+
+from tqdm import tqdm
+
+from fetch_engine import FetchEngine
+from http_cache import NEGATIVE_TTL
+
+WIKI_API = "https://en.wikipedia.org/w/api.php"
+WIKIDATA_API = "https://www.wikidata.org/w/api.php"
+COMMONS_FILE = "https://commons.wikimedia.org/wiki/Special:FilePath/{}"
+
+# Wikidata properties we know how to use
+P_IMAGE  = "P18"
+P_GENDER = "P21"
+P_BORN   = "P569"
+P_DIED   = "P570"
+
+# P21 values → the `gender` field of people.json (1 = male, 0 = female)
+GENDERS = {"Q6581097": 1, "Q6581072": 0}
+
+# Wikidata time precision: 9 = year, 8 = decade, 7 = century, 6 = millennium
+PRECISION_YEAR = 9
+
+# MediaWiki accepts at most 50 titles per query for non-bot clients
+BATCH_SIZE = 50
+
+QID_RE = re.compile(r"Q\d+")
+
+
+def is_qid(value: str) -> bool:
+    return bool(QID_RE.fullmatch(value))
+
+
+def _chunks(seq, size=BATCH_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+# --------------------------------------------------------------------------- #
+# Title → Q-id
+# --------------------------------------------------------------------------- #
+async def _query_pageprops(engine: FetchEngine, titles: list[str]) -> dict[str, str | None]:
+    """One batch: return {requested title: Q-id or None}."""
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "titles": "|".join(titles),
+        "prop": "pageprops",
+        "ppprop": "wikibase_item",
+        "redirects": 1,
+    }
+    normalized, redirects, page_qid = {}, {}, {}
+    while True:
+        data = await engine.get_json(WIKI_API, params=params)
+        query = data.get("query", {})
+        normalized.update({n["from"]: n["to"] for n in query.get("normalized", [])})
+        redirects.update({r["from"]: r["to"] for r in query.get("redirects", [])})
+        for page in query.get("pages", []):
+            qid = page.get("pageprops", {}).get("wikibase_item")
+            page_qid[page["title"]] = qid or page_qid.get(page["title"])
+        if "continue" not in data:
+            break
+        params = {**params, **data["continue"]}
+
+    result = {}
+    for title in titles:
+        resolved = normalized.get(title, title)
+        resolved = redirects.get(resolved, resolved)
+        result[title] = page_qid.get(resolved)
+    return result
+
+
+async def resolve_qids(engine: FetchEngine, names, overrides=None) -> dict[str, str | None]:
+    """
+    Return {name: Q-id or None} for every name.
+
+    `overrides` maps a name to the page title (or Q-id) to look up instead,
+    e.g. OVERRIDE_LOOKUP in fetch_portraits.py or ARTWORK_OVERRIDES in
+    fetch_artworks.py.  N titles cost about N/50 requests.
+    """
+    overrides = overrides or {}
+    lookup = {name: overrides.get(name, name) for name in names}
+
+    result = {name: target for name, target in lookup.items() if is_qid(target)}
+    titles = sorted({t for t in lookup.values() if not is_qid(t)})
+
+    title_qid = engine.cache.get_many("pageprops", titles) if engine.cache else {}
+    todo = [t for t in titles if t not in title_qid]
+
+    batches = await asyncio.gather(*(_query_pageprops(engine, chunk) for chunk in _chunks(todo)))
+    fetched = {k: v for batch in batches for k, v in batch.items()}
+    if engine.cache:
+        engine.cache.put_many("pageprops", fetched)
+    title_qid.update(fetched)
+
+    for name, target in lookup.items():
+        if name not in result:
+            result[name] = title_qid.get(target)
+    return result
+
+
+async def wikipedia_to_qid(engine: FetchEngine, title: str) -> str | None:
+    """Return the Wikidata Q-identifier for a single Wikipedia page title."""
+    return (await resolve_qids(engine, [title]))[title]
+
+
+# --------------------------------------------------------------------------- #
+# Q-id → claims
+# --------------------------------------------------------------------------- #
+async def _query_claims(engine: FetchEngine, qids: list[str], props) -> dict[str, dict]:
+    """One batch: return {requested Q-id: {property: [datavalue values]}}."""
+    params = {
+        "action": "wbgetentities",
+        "format": "json",
+        "ids": "|".join(qids),
+        "props": "claims",
+    }
+    data = await engine.get_json(WIKIDATA_API, params=params)
+
+    result = {}
+    for qid, entity in data.get("entities", {}).items():
+        if "missing" in entity:
+            continue
+        # Redirected items come back under their target id
+        requested = entity.get("redirects", {}).get("from", qid)
+        claims = entity.get("claims", {})
+        result[requested] = {
+            pid: [c["mainsnak"]["datavalue"]["value"]
+                  for c in claims.get(pid, [])
+                  if c["mainsnak"].get("snaktype") == "value" and c.get("rank") != "deprecated"]
+            for pid in props
+        }
+    return result
+
+
+async def fetch_claims(engine: FetchEngine, qids, props=(P_IMAGE,)) -> dict[str, dict]:
+    """
+    Return {Q-id: {property: [values]}} for every Q-id Wikidata knows.
+
+    Only the listed properties are kept, e.g. (P_IMAGE, P_BORN, P_DIED, P_GENDER).
+    Values are the raw `datavalue.value` payloads: a filename string for P18,
+    a {"time": ..., "precision": ...} dict for P569/P570, an entity ref for P21.
+    """
+    qids = sorted({q for q in qids if q})
+
+    # A cached row only counts if it holds every property asked for this time
+    cached = engine.cache.get_many("wbgetentities", qids) if engine.cache else {}
+    claims = {q: c for q, c in cached.items() if c is None or all(p in c for p in props)}
+    todo = [q for q in qids if q not in claims]
+
+    batches = await asyncio.gather(*(_query_claims(engine, chunk, props) for chunk in _chunks(todo)))
+    fetched = {k: v for batch in batches for k, v in batch.items()}
+    if engine.cache:
+        # Merge with previously cached properties; unknown Q-ids and entities with
+        # none of the asked-for claims ("no P18") are negatives with a short TTL
+        merged = {q: ({**(cached.get(q) or {}), **fetched[q]} if q in fetched else None)
+                  for q in todo}
+        empty = {q: c for q, c in merged.items() if not c or not any(c.values())}
+        engine.cache.put_many("wbgetentities", {q: c for q, c in merged.items() if q not in empty})
+        engine.cache.put_many("wbgetentities", empty, ttl=NEGATIVE_TTL)
+    claims.update(fetched)
+    return {q: c for q, c in claims.items() if c is not None}
+
+
+async def image_filenames(engine: FetchEngine, qids) -> dict[str, str | None]:
+    """Return {Q-id: Commons file name of the first P18 image, or None}."""
+    claims = await fetch_claims(engine, qids, (P_IMAGE,))
+    return {qid: next(iter(c.get(P_IMAGE, [])), None) for qid, c in claims.items()}
+
+
+async def qid_to_image_filename(engine: FetchEngine, qid: str) -> str | None:
+    """Return the Commons file name (e.g. 'Albert Einstein Head.jpg') for one Q-id."""
+    return (await image_filenames(engine, [qid])).get(qid)
+
+
+async def resolve_images(engine: FetchEngine, names, overrides=None):
+    """Return ({name: Q-id or None}, {Q-id: P18 file name or None}) in two batched passes."""
+    qids = await resolve_qids(engine, names, overrides)
+    images = await image_filenames(engine, qids.values())
+    return qids, images
+
+
+def wikidata_year(value) -> tuple[int, int] | None:
+    """
+    Convert a P569/P570 time value to (year, precision).
+
+    Wikidata writes years with a sign and no year 0 ("-0469-00-00T00:00:00Z" is
+    469 BC), which is exactly people.json's convention, so the signed year is
+    used as is. Coarser precisions keep the stored year and report the precision
+    so callers can decide whether to trust it.
+    """
+    try:
+        time, precision = value["time"], value.get("precision", PRECISION_YEAR)
+        year = int(time[:time.index("-", 1)])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (year, precision) if year else None
+
+
+def _first_year(values):
+    """First parseable time value, preferring year precision or better."""
+    parsed = [y for y in map(wikidata_year, values) if y]
+    parsed.sort(key=lambda y: y[1] < PRECISION_YEAR)  # stable: keeps claim order
+    return parsed[0] if parsed else None
+
+
+async def person_facts(engine: FetchEngine, qids) -> dict[str, dict]:
+    """
+    Return {Q-id: {"image", "born", "died", "gender", "precision"}} in one batched
+    claims pass. Years are ints (negative = BC) or None; `precision` maps "born" /
+    "died" to the Wikidata precision of each year found.
+    """
+    claims = await fetch_claims(engine, qids, (P_IMAGE, P_BORN, P_DIED, P_GENDER))
+    facts = {}
+    for qid, c in claims.items():
+        born, died = _first_year(c.get(P_BORN, [])), _first_year(c.get(P_DIED, []))
+        genders = [GENDERS.get(v.get("id")) for v in c.get(P_GENDER, []) if isinstance(v, dict)]
+        facts[qid] = {
+            "image": next(iter(c.get(P_IMAGE, [])), None),
+            "born": born[0] if born else None,
+            "died": died[0] if died else None,
+            "gender": next((g for g in genders if g is not None), None),
+            "precision": {k: y[1] for k, y in (("born", born), ("died", died)) if y},
+        }
+    return facts
+
+
+# --------------------------------------------------------------------------- #
+# Commons files
+# --------------------------------------------------------------------------- #
+def commons_file_url(filename: str) -> str:
+    """Special:FilePath URL for a Commons file name (302s to upload.wikimedia.org)."""
+    # 1. MediaWiki expects underscores, not spaces
+    fname = filename.replace(" ", "_")
+
+    # 2. URL-encode *except* underscores, parentheses, apostrophes, dots, dashes
+    #    (keeps filenames readable and avoids double-encoding)
+    safe = "_().'-"
+    return COMMONS_FILE.format(quote(fname, safe=safe))
+
+
+async def download_commons_file(engine: FetchEngine, filename: str,
+                                dest_path: pathlib.Path) -> bool:
+    """
+    Resolve image via Special:FilePath and stream to dest_path.
+    Returns True if saved, False if already on disk.
+    """
+    return await engine.download(commons_file_url(filename), dest_path)
+
+
+async def save_p18_image(engine: FetchEngine, label: str, qid: str | None,
+                         filename: str | None, dest_path: pathlib.Path) -> str:
+    """
+    Download an already-resolved P18 image for one item.
+    Returns "saved", "skipped" (already on disk) or "error" (no Q-id / no P18).
+    """
+    if not qid:
+        tqdm.write(f"⚠️  {label}: no Wikidata Q-id")
+        return "error"
+
+    if not filename:
+        tqdm.write(f"⚠️  {label}: no P18 image")
+        return "error"
+
+    if await download_commons_file(engine, filename, dest_path):
+        return "saved"
+    return "skipped"  # already existed
@@ -0,0 +1,27 @@
+import { resolveBasePath } from './paths';
+
+/**
+ * Inline style showing one thumbnail of a sprite atlas (scripts/build_atlas.py).
+ *
+ * The style only sets CSS variables and the sheet; pair it with the
+ * `atlas-thumb` rules, which crop the thumbnail to a `--size` square like
+ * `object-fit: cover`.
+ * @param {{ sheets: { src: string, webp?: string, width: number, height: number }[], items: Record<string, number[]> } | undefined} atlas - One dataset's atlas
+ * @param {string} id - The item id
+ * @returns {string | null} The style, or null when the item has no thumbnail
+ */
+export function atlasStyle(atlas, id) {
+	const entry = atlas?.items[id];
+	if (!entry) {
+		return null;
+	}
+	const [sheet, x, y, w, h] = entry;
+	const { src, webp, width, height } = atlas.sheets[sheet];
+	const jpeg = `url(${resolveBasePath(src)})`;
+	let style = `--x:${x};--y:${y};--w:${w};--h:${h};--sw:${width};--sh:${height};background-image:${jpeg}`;
+	if (webp) {
+		// Browsers without image-set() keep the JPEG declared above
+		style += `;background-image:image-set(url(${resolveBasePath(webp)}) type('image/webp'), ${jpeg} type('image/jpeg'))`;
+	}
+	return style;
+}
@@ -0,0 +1,109 @@
+/**
+ * Client side of the prebuilt search index (scripts/build_search_index.py).
+ *
+ * Query words of `gram`+ letters intersect the postings of their trigrams and
+ * are checked against each candidate's folded text; shorter words look up the
+ * word-prefix postings. Both are sorted id lists, so a query costs about the
+ * length of its shortest posting list, however large the datasets get.
+ */
+
+/**
+ * Fetches and unpacks the index
+ * @param {string} url - Where search-index.json is served
+ * @returns {Promise<object>} The index, ready for searchIndex()
+ */
+export async function loadSearchIndex(url) {
+	const response = await fetch(url);
+	if (!response.ok) {
+		throw new Error(`Search index: ${response.status} ${response.statusText}`);
+	}
+	const raw = await response.json();
+	const docs = raw.docs.map((row) =>
+		Object.fromEntries(
+			raw.columns.map((column, i) => [column, row[i]]).filter(([, v]) => v != null)
+		)
+	);
+	return {
+		gram: raw.gram,
+		fold: raw.fold,
+		docs,
+		grams: undelta(raw.grams),
+		prefixes: undelta(raw.prefixes)
+	};
+}
+
+/**
+ * Accent- and case-folds text the same way the indexer does
+ * @param {string} text - Text to fold
+ * @param {Record<string, string>} table - Extra letter replacements (index.fold)
+ * @returns {string} The folded text
+ */
+export function fold(text, table) {
+	const folded = text.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase();
+	return Array.from(folded, (c) => table[c] ?? c).join('');
+}
+
+/**
+ * Finds the documents matching every word of a query
+ * @param {object} index - From loadSearchIndex()
+ * @param {string} term - The query as typed
+ * @returns {object[]} Matching documents, display-name matches first, then by date
+ */
+export function searchIndex(index, term) {
+	const words = fold(term, index.fold).match(/[\p{L}\p{N}]+/gu) || [];
+	if (words.length === 0) return [];
+
+	let candidates = null;
+	for (const word of words) {
+		const lists =
+			word.length < index.gram
+				? [index.prefixes[word] || []]
+				: trigrams(word, index.gram).map((g) => index.grams[g] || []);
+		let ids = lists.sort((a, b) => a.length - b.length).reduce(intersect);
+		if (word.length >= index.gram) {
+			// Trigrams can all occur without the word itself: check the text
+			ids = ids.filter((id) => index.docs[id].text.includes(word));
+		}
+		candidates = candidates ? intersect(candidates, ids) : ids;
+		if (candidates.length === 0) return [];
+	}
+
+	const results = candidates.map((id) => {
+		const doc = index.docs[id];
+		const name = fold(doc.displayName, index.fold);
+		return { doc, nameMatch: words.every((w) => name.includes(w)) };
+	});
+	results.sort((a, b) => b.nameMatch - a.nameMatch || a.doc.sort - b.doc.sort);
+	return results.map((r) => r.doc);
+}
+
+function trigrams(word, size) {
+	const grams = new Set();
+	for (let i = 0; i + size <= word.length; i++) grams.add(word.slice(i, i + size));
+	return [...grams];
+}
+
+function intersect(a, b) {
+	const out = [];
+	let i = 0;
+	let j = 0;
+	while (i < a.length && j < b.length) {
+		if (a[i] < b[j]) i++;
+		else if (a[i] > b[j]) j++;
+		else {
+			out.push(a[i]);
+			i++;
+			j++;
+		}
+	}
+	return out;
+}
+
+function undelta(postings) {
+	const out = {};
+	for (const [key, gaps] of Object.entries(postings)) {
+		let id = 0;
+		out[key] = gaps.map((gap) => (id += gap));
+	}
+	return out;
+}
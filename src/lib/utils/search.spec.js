@@ -0,0 +1,69 @@
+import { readFileSync } from 'node:fs';
+import { afterEach, beforeAll, describe, expect, it, vi } from 'vitest';
+import { fold, loadSearchIndex, searchIndex } from './search';
+
+const raw = JSON.parse(
+	readFileSync(new URL('../../../static/search-index.json', import.meta.url), 'utf8')
+);
+
+// What searchIndex should return, found by scanning every document
+function scan(index, term) {
+	const words = fold(term, index.fold).match(/[\p{L}\p{N}]+/gu) || [];
+	if (words.length === 0) return [];
+	return index.docs.filter((doc) => {
+		const tokens = doc.text.split(' ');
+		return words.every((w) =>
+			w.length < index.gram ? tokens.some((t) => t.startsWith(w)) : doc.text.includes(w)
+		);
+	});
+}
+
+function ids(docs) {
+	return docs.map((doc) => `${doc.type}:${doc.id}`).sort();
+}
+
+describe('search index', () => {
+	let index;
+
+	beforeAll(async () => {
+		vi.stubGlobal('fetch', async () => ({ ok: true, json: async () => raw }));
+		index = await loadSearchIndex('/search-index.json');
+	});
+
+	afterEach(() => {
+		vi.unstubAllGlobals();
+	});
+
+	it('folds accents and case like the indexer', () => {
+		expect(fold('Schrödinger ÆSOP Straße', index.fold)).toBe('schrodinger aesop strasse');
+	});
+
+	it('matches short words by word prefix', () => {
+		const results = searchIndex(index, 'pl');
+		expect(ids(results)).toContain('person:plato');
+		expect(results.every((doc) => doc.text.split(' ').some((t) => t.startsWith('pl')))).toBe(true);
+		// "pl" inside a word is not a prefix match
+		expect(ids(searchIndex(index, 'ap'))).not.toContain('person:plato');
+	});
+
+	it('matches longer words anywhere in a word, through their trigrams', () => {
+		expect(ids(searchIndex(index, 'lato'))).toContain('person:plato');
+		expect(ids(searchIndex(index, 'Schrodinger'))).toContain('person:schrodinger');
+		expect(ids(searchIndex(index, 'SCHRÖD'))).toContain('person:schrodinger');
+	});
+
+	it('puts display-name matches first', () => {
+		const results = searchIndex(index, 'plato');
+		expect(results[0].displayName).toBe('Plato');
+	});
+
+	it('agrees with a full scan', () => {
+		const queries = ['a', 'e', 'ar', 'the', 'ston', 'age of', 'war 19', '1500', 'ma', 'xyzzy', ''];
+		for (const doc of index.docs.slice(0, 60)) {
+			queries.push(doc.displayName, doc.displayName.slice(1, 5), doc.text.split(' ')[0].slice(0, 2));
+		}
+		for (const term of queries) {
+			expect(ids(searchIndex(index, term)), term).toEqual(ids(scan(index, term)));
+		}
+	});
+});